@@ -0,0 +1,64 @@
+"""Đo thời gian khởi động nguội: từ lúc chạy tiến trình đến khi form đăng nhập hiển thị
+
+Mỗi lần đo chạy `python -m finance_app.main --profile-startup --exit-at-login` trong một
+tiến trình mới và lấy thời điểm tiến trình in ra mốc `login_visible`.
+
+Chạy từ thư mục gốc repo:
+    python benchmarks/bench_cold_start.py [số_lần_chạy]
+
+Không có màn hình (CI) thì đặt QT_QPA_PLATFORM=offscreen (mặc định nếu chưa đặt).
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from finance_app.utils.startup_profiler import MARK_PREFIX
+
+DEFAULT_RUNS = 5
+
+def run_once(env):
+    """Chạy ứng dụng một lần; trả về (giây tới login_visible, {mốc: ms bên trong tiến trình})"""
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'finance_app.main', '--profile-startup', '--exit-at-login'],
+        cwd=ROOT_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+        text=True, encoding='utf-8', errors='replace'
+    )
+    visible_at = None
+    marks = {}
+    for line in process.stderr:
+        if not line.startswith(MARK_PREFIX):
+            continue
+        _, phase, elapsed = line.split()
+        marks[phase] = float(elapsed[:-2])
+        if phase == 'login_visible':
+            visible_at = time.perf_counter() - started
+    process.wait()
+    if visible_at is None:
+        raise RuntimeError(f"Ứng dụng thoát (mã {process.returncode}) trước khi form đăng nhập hiển thị")
+    return visible_at, marks
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_RUNS
+    env = dict(os.environ)
+    env.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [ROOT_DIR, env.get('PYTHONPATH')]))
+
+    results = []
+    print(f"{'lần':>4} {'tổng (ms)':>10} {'imports':>9} {'qapp':>8} {'login':>8}")
+    for i in range(runs):
+        total, marks = run_once(env)
+        results.append(total)
+        print(f"{i + 1:>4} {total * 1000:>10.1f} {marks.get('imports', 0):>9.1f} "
+              f"{marks.get('qapplication', 0):>8.1f} {marks.get('login_visible', 0):>8.1f}")
+    print(f"trung vị {statistics.median(results) * 1000:.1f}ms, nhanh nhất {min(results) * 1000:.1f}ms "
+          f"(mốc bên trong tiến trình tính từ khi main.py bắt đầu chạy)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Đo tốc độ save_json với 10k/100k/1M giao dịch (thụt lề và JSON gọn)
+
+Chạy từ thư mục gốc repo:
+    python benchmarks/bench_save_json.py [số_bản_ghi ...]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from finance_app.utils.file_helper import save_json, load_json
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+
+def make_transactions(count):
+    """Tạo danh sách giao dịch giả có cấu trúc giống transactions.json"""
+    return [
+        {
+            'transaction_id': f"txn_{i + 1:03d}",
+            'user_id': f"user_{i % 50 + 1:03d}",
+            'amount': 10000 + i % 5000 * 100,
+            'category_id': f"cat_{i % 20 + 1:03d}",
+            'type': 'expense' if i % 4 else 'income',
+            'description': f"Giao dịch mẫu {i}",
+            'date': f"2024-{i % 12 + 1:02d}-{i % 28 + 1:02d}",
+            'tags': [],
+            'location': '',
+            'is_active': True,
+            'created_at': '2024-01-01T00:00:00',
+            'updated_at': '2024-01-01T00:00:00'
+        }
+        for i in range(count)
+    ]
+
+def bench(records, compact, directory):
+    file_path = os.path.join(directory, 'transactions.json')
+    start = time.perf_counter()
+    if not save_json(file_path, records, compact=compact):
+        raise RuntimeError(f"Không thể lưu {file_path}")
+    elapsed = time.perf_counter() - start
+    size = os.path.getsize(file_path)
+    start = time.perf_counter()
+    load_json(file_path)
+    load_elapsed = time.perf_counter() - start
+    return elapsed, load_elapsed, size
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES
+    print(f"{'bản ghi':>10} {'chế độ':>8} {'lưu (s)':>9} {'bản ghi/s':>12} {'đọc (s)':>9} {'MB':>8}")
+    with tempfile.TemporaryDirectory() as directory:
+        for count in sizes:
+            records = make_transactions(count)
+            for compact in (False, True):
+                elapsed, load_elapsed, size = bench(records, compact, directory)
+                print(f"{count:>10} {'gọn' if compact else 'indent':>8} {elapsed:>9.3f} "
+                      f"{count / elapsed:>12.0f} {load_elapsed:>9.3f} {size / 1_048_576:>8.1f}")
+
+if __name__ == "__main__":
+    main()
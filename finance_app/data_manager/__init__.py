@@ -2,7 +2,10 @@ import os
 import json
 
 def init_data_files():
-    """Initialize necessary data files if they don't exist"""
+    """Initialize necessary data files if they don't exist
+
+    Called once by main() at startup; importing the package performs no I/O.
+    """
     data_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data')
     
     # Create data directory if it doesn't exist
@@ -33,5 +36,3 @@ def init_data_files():
             with open(file_path, 'w', encoding='utf-8') as f:
                 json.dump(default_content, f, ensure_ascii=False, indent=4)
 
-# Initialize data files when module is imported
-init_data_files()
@@ -0,0 +1,115 @@
+# budget_index.py
+
+from bisect import bisect_left, bisect_right
+from datetime import date
+
+
+class BudgetIntervalIndex:
+    """Chỉ mục khoảng ngày của budget theo người dùng, được data store cập nhật tăng dần.
+
+    Ngày được parse một lần thành số ordinal. Budget của mỗi người dùng được sắp xếp
+    theo ngày bắt đầu; cùng với độ dài lớn nhất của các budget, truy vấn "budget nào
+    giao với khoảng ngày" chỉ cần bisect một đoạn nhỏ: O(log n + k). Budget không có
+    ngày kết thúc được xem là kéo dài vô hạn và được giữ riêng.
+    """
+
+    def __init__(self, budgets):
+        self._by_user = {}     # user_id -> {budget_id: budget} theo thứ tự lưu
+        self._starts = {}      # user_id -> (danh sách ordinal bắt đầu, danh sách (ordinal kết thúc, budget)) cùng thứ tự
+        self._open = {}        # user_id -> {budget_id: (ordinal bắt đầu, budget)} không có ngày kết thúc
+        self._max_length = {}  # user_id -> số ngày dài nhất của budget có ngày kết thúc
+        self._positions = {}   # budget_id -> (user_id, ordinal bắt đầu, ordinal kết thúc) đang được đánh chỉ mục
+        for budget in budgets:
+            if budget.get('budget_id') not in self._positions:
+                self._add(budget)
+
+    def _add(self, budget):
+        budget_id, user_id = budget.get('budget_id'), budget.get('user_id')
+        self._by_user.setdefault(user_id, {})[budget_id] = budget
+        start, end = _ordinal(budget.get('start_date')), _ordinal(budget.get('end_date'))
+        if start is None or (end is None and budget.get('end_date')):
+            # Ngày không hợp lệ: vẫn thuộc người dùng nhưng không giao với khoảng ngày nào
+            self._positions[budget_id] = (user_id, None, None)
+            return
+        self._positions[budget_id] = (user_id, start, end)
+        if end is None:
+            self._open.setdefault(user_id, {})[budget_id] = (start, budget)
+            return
+        starts, entries = self._starts.setdefault(user_id, ([], []))
+        pos = bisect_right(starts, start)
+        starts.insert(pos, start)
+        entries.insert(pos, (end, budget))
+        if end - start > self._max_length.get(user_id, 0):
+            self._max_length[user_id] = end - start
+
+    def _remove(self, budget_id):
+        # Vị trí cũ được lưu riêng vì budget thường đã bị sửa tại chỗ trước khi ghi
+        position = self._positions.pop(budget_id, None)
+        if position is None:
+            return None
+        user_id, start, end = position
+        if start is None:
+            return position
+        if end is None:
+            self._open[user_id].pop(budget_id, None)
+            return position
+        starts, entries = self._starts[user_id]
+        for pos in range(bisect_left(starts, start), bisect_right(starts, start)):
+            if entries[pos][1].get('budget_id') == budget_id:
+                del starts[pos]
+                del entries[pos]
+                break
+        # _max_length không giảm khi xóa: chỉ làm đoạn cần quét rộng hơn, kết quả vẫn đúng
+        return position
+
+    def apply_upsert(self, budgets):
+        for budget in budgets:
+            budget_id = budget.get('budget_id')
+            position = self._remove(budget_id)
+            # Budget sửa tại chỗ giữ nguyên thứ tự trong danh sách của người dùng
+            if position is not None and position[0] != budget.get('user_id'):
+                self._by_user[position[0]].pop(budget_id, None)
+            self._add(budget)
+
+    def apply_delete(self, budget_id):
+        position = self._remove(budget_id)
+        if position is not None:
+            self._by_user[position[0]].pop(budget_id, None)
+
+    def user_budgets(self, user_id):
+        """Mọi budget của người dùng (kể cả đã xóa mềm) theo thứ tự lưu"""
+        return list(self._by_user.get(user_id, {}).values())
+
+    def overlapping(self, user_id, start_date, end_date):
+        """Các budget của người dùng có khoảng ngày giao với [start_date, end_date], O(log n + k)
+
+        Args:
+            start_date, end_date (date): Khoảng ngày cần lọc
+        Returns:
+            list: Budget sắp xếp theo ngày bắt đầu
+        """
+        low_ordinal, high_ordinal = start_date.toordinal(), end_date.toordinal()
+        matches = []
+        indexed = self._starts.get(user_id)
+        if indexed:
+            starts, entries = indexed
+            # Budget bắt đầu trước low - độ dài lớn nhất chắc chắn đã kết thúc trước low
+            low = bisect_left(starts, low_ordinal - self._max_length.get(user_id, 0))
+            high = bisect_right(starts, high_ordinal)
+            matches = [(start, budget) for start, (end, budget) in zip(starts[low:high], entries[low:high])
+                       if end >= low_ordinal]
+        open_budgets = [(start, budget) for start, budget in self._open.get(user_id, {}).values()
+                        if start <= high_ordinal]
+        if open_budgets:
+            matches.extend(open_budgets)
+            matches.sort(key=lambda item: item[0])
+        return [budget for _, budget in matches]
+
+
+def _ordinal(value):
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(str(value)[:10]).toordinal()
+    except ValueError:
+        return None
@@ -1,10 +1,21 @@
 # budget_manager.py
 
-from finance_app.utils.file_helper import load_json, save_json, generate_id, get_current_datetime, validate_date_format
-from datetime import datetime, timedelta
+from finance_app.utils.file_helper import get_current_datetime, validate_date_format
+from datetime import date, datetime, timedelta
 import calendar
+import logging
 from finance_app.data_manager.user_manager import UserManager
 from finance_app.data_manager.category_manager import CategoryManager
+from finance_app.data_manager.storage import collection_name
+from finance_app.data_manager.data_store import get_data_store
+from finance_app.data_manager.budget_spend import BudgetSpendIndex
+from finance_app.data_manager.budget_index import BudgetIntervalIndex
+from finance_app.data_manager.history_log import get_append_log
+
+logger = logging.getLogger(__name__)
+
+# Trường tính từ giao dịch (with_spending), không được lưu trong budget
+DERIVED_SPEND_FIELDS = ('spent_amount', 'remaining_amount', 'spent_percent')
 
 class BudgetManager:
     def __init__(self, budget_file='budgets.json', history_file='budget_change_history.json'):
@@ -16,17 +27,22 @@ class BudgetManager:
         os.makedirs(data_dir, exist_ok=True)
         self.budget_file = os.path.join(data_dir, budget_file)
         self.history_file = os.path.join(data_dir, history_file)
+        self.store = get_data_store(data_dir)
+        self.budget_collection = collection_name(budget_file)
+        self.history_collection = collection_name(history_file)
+        # Lịch sử được lưu dạng log chỉ ghi thêm; collection history_file là hộp chờ: bản ghi
+        # lịch sử được ghi vào đó cùng batch với budget rồi mới chuyển sang log
+        self.history_log_file = os.path.splitext(self.history_file)[0] + '.jsonl'
+        # Số tiền đã chi được tính từ giao dịch, không lưu trong budget
+        self.transaction_collection = collection_name('transactions.json')
         self.budgets = None # Defer loading
-        self.history = None # Defer loading
         self.user_manager = UserManager()
         self.category_manager = CategoryManager()
         self.current_user_id = None
 
     def _load_data_if_needed(self):
-        if self.budgets is None:
-            self.budgets = self.load_budgets_internal()
-        if self.history is None:
-            self.history = self.load_history_internal()
+        # List dùng chung trong data store; đọc lại nếu dữ liệu trên đĩa bị thay đổi
+        self.budgets = self.load_budgets_internal()
 
     def set_current_user(self, user_id):
         """Thiết lập người dùng hiện tại
@@ -37,29 +53,109 @@ class BudgetManager:
         self.category_manager.set_current_user(user_id)
 
     def load_budgets_internal(self):
-        """Tải danh sách budgets từ file, thêm auto_renew nếu thiếu"""
-        budgets = load_json(self.budget_file)
+        """Tải danh sách budgets từ file, thêm auto_renew nếu thiếu
+
+        Bỏ các trường số tiền đã chi do dữ liệu cũ lưu sẵn (spent_amount...): giá trị đó đã cũ,
+        chỉ with_spending() mới trả về số liệu đúng. Lần ghi budget sau sẽ lưu bản đã bỏ.
+        """
+        budgets = self.store.acquire(self.budget_collection, self)
         for budget in budgets:
             if 'auto_renew' not in budget:
                 budget['auto_renew'] = True  # Mặc định gia hạn tự động
+            for field in DERIVED_SPEND_FIELDS:
+                budget.pop(field, None)
         return budgets
     
-    def load_history_internal(self):
-        """Tải lịch sử thay đổi budgets từ file"""
-        return load_json(self.history_file)
+    def _history_log(self):
+        """Log lịch sử thay đổi budgets (chỉ ghi thêm, chỉ mục theo budget_id), mở khi cần
+
+        Bản ghi còn trong hộp chờ (kể cả lịch sử cũ trước khi có log) được chuyển vào log trước.
+        """
+        history_log = get_append_log(self.history_log_file, 'budget_id')
+        self._flush_history(history_log)
+        return history_log
+
+    def _stage_history(self, entries):
+        """Ghi bản ghi lịch sử vào hộp chờ; gọi trong cùng batch với budget để cả hai cùng được lưu"""
+        self.store.acquire(self.history_collection, self).extend(entries)
+        self.store.upsert_many(self.history_collection, entries)
+
+    def _flush_history(self, history_log=None):
+        """Chuyển bản ghi lịch sử đã commit trong hộp chờ sang log rồi làm rỗng hộp chờ
+
+        Bản ghi đã có trong log (ứng dụng dừng sau khi ghi log, trước khi làm rỗng hộp chờ)
+        không bị ghi lặp.
+
+        Returns:
+            bool: False nếu chưa chuyển được; bản ghi vẫn nằm trong hộp chờ và được thử lại lần sau
+        """
+        if history_log is None:
+            history_log = get_append_log(self.history_log_file, 'budget_id')
+        with self.store.lock:
+            pending = self.store.acquire(self.history_collection, self)
+            if not pending:
+                return True
+            logged = {}
+            entries = []
+            for entry in pending:
+                budget_id = entry.get('budget_id')
+                if budget_id not in logged:
+                    logged[budget_id] = {h.get('history_id') for h in history_log.read(budget_id)}
+                if entry.get('history_id') not in logged[budget_id]:
+                    entries.append(entry)
+            if not history_log.append_many(entries):
+                logger.error(f"Không thể ghi {len(entries)} bản ghi lịch sử budget vào log, sẽ thử lại sau")
+                return False
+            # Giữ bộ đếm hist_ (dữ liệu cũ có thể chưa lưu bộ đếm) để ID lịch sử mới không trùng
+            self.store.allocate_ids(self.history_collection, 'hist', 0)
+            return self.store.save_all(self.history_collection, [])
     
     def save_budgets(self, budgets=None):
         """Lưu danh sách budgets vào file"""
         if budgets is None:
             budgets = self.budgets
-        return save_json(self.budget_file, budgets)
+        return self.store.save_all(self.budget_collection, budgets)
+
+    def _save_budget(self, budget):
+        """Lưu một budget (backend SQLite chỉ ghi đúng một dòng)"""
+        return self.store.upsert(self.budget_collection, budget)
 
-    def save_history(self, history=None):
-        """Lưu lịch sử thay đổi vào file"""
-        self._load_data_if_needed() # Ensure history is loaded before saving
-        if history is None:
-            history = self.history
-        return save_json(self.history_file, history)
+    def _interval_index(self):
+        """Chỉ mục khoảng ngày của budget theo người dùng, được cập nhật sau mỗi lần ghi budget"""
+        self._load_data_if_needed()
+        return self.store.derived(self.budget_collection, 'budget_intervals', BudgetIntervalIndex)
+
+    def _spend_index(self):
+        """Số tiền đã chi theo budget, được data store cập nhật sau mỗi lần ghi giao dịch"""
+        self._load_data_if_needed()
+        self.store.acquire(self.transaction_collection, self)
+        spend = self.store.derived(self.transaction_collection, 'budget_spend', BudgetSpendIndex)
+        spend.sync(self.budgets)
+        return spend
+
+    def get_spent_amount(self, budget):
+        """Số tiền đã chi của một budget"""
+        with self.store.lock:
+            return self._spend_index().spent(budget['budget_id'])
+
+    def with_spending(self, budgets):
+        """Bản sao các budget kèm spent_amount, remaining_amount, spent_percent
+
+        Không quét lại giao dịch: O(số budget) kể cả khi người dùng có rất nhiều giao dịch.
+        """
+        with self.store.lock:
+            spend = self._spend_index()
+            result = []
+            for budget in budgets:
+                spent = spend.spent(budget['budget_id'])
+                amount = budget.get('amount', 0)
+                result.append({
+                    **budget,
+                    'spent_amount': spent,
+                    'remaining_amount': amount - spent,
+                    'spent_percent': (spent / amount) * 100 if amount > 0 else 0
+                })
+            return result
 
     def get_all_budgets(self, user_id=None, target_user_id=None, active_only=True):
         """
@@ -102,51 +198,38 @@ class BudgetManager:
         Returns:
             list: List of budget dictionaries
         """
-        self._load_data_if_needed() # Load data if not already loaded
-        budgets = [b for b in self.budgets if b['user_id'] == user_id]
-        
-        if not period:
-            return budgets
+        with self.store.lock:
+            index = self._interval_index()
+            if not period:
+                return index.user_budgets(user_id)
+                
+            today = date.today()
+            start_date = None
+            end_date = None
             
-        today = datetime.now()
-        start_date = None
-        end_date = None
-        
-        # Convert period to lowercase for comparison
-        period = period.lower()
-        
-        if period == 'tháng này':
-            # Current month
-            start_date = datetime(today.year, today.month, 1)
-            end_date = datetime(today.year, today.month, calendar.monthrange(today.year, today.month)[1])
-        elif period == 'quý này':
-            # Current quarter
-            quarter = (today.month - 1) // 3
-            start_date = datetime(today.year, quarter * 3 + 1, 1)
-            end_month = (quarter + 1) * 3
-            if end_month > 12:
-                end_month = 12
-            end_date = datetime(today.year, end_month, calendar.monthrange(today.year, end_month)[1])
-        elif period == 'năm nay':
-            # Current year
-            start_date = datetime(today.year, 1, 1)
-            end_date = datetime(today.year, 12, 31)
+            # Convert period to lowercase for comparison
+            period = period.lower()
             
-        if start_date and end_date:
-            filtered_budgets = []
-            for budget in budgets:
-                budget_start = datetime.strptime(budget['start_date'], '%Y-%m-%d')
-                if budget.get('end_date'):
-                    budget_end = datetime.strptime(budget['end_date'], '%Y-%m-%d')
-                else:
-                    budget_end = end_date
-                    
-                # Check if budget period overlaps with filter period
-                if (budget_start <= end_date and budget_end >= start_date):
-                    filtered_budgets.append(budget)
-            return filtered_budgets
-            
-        return budgets
+            if period == 'tháng này':
+                # Current month
+                start_date = today.replace(day=1)
+                end_date = today.replace(day=calendar.monthrange(today.year, today.month)[1])
+            elif period == 'quý này':
+                # Current quarter
+                quarter = (today.month - 1) // 3
+                start_date = date(today.year, quarter * 3 + 1, 1)
+                end_month = (quarter + 1) * 3
+                end_date = date(today.year, end_month, calendar.monthrange(today.year, end_month)[1])
+            elif period == 'năm nay':
+                # Current year
+                start_date = date(today.year, 1, 1)
+                end_date = date(today.year, 12, 31)
+                
+            if start_date and end_date:
+                # Budget period overlaps with filter period
+                return index.overlapping(user_id, start_date, end_date)
+                
+            return index.user_budgets(user_id)
     
     def get_user_budgets_by_date_range(self, user_id, start_date_str=None, end_date_str=None):
         """Get all budgets for a user that overlap with the given date range.
@@ -159,61 +242,32 @@ class BudgetManager:
         Returns:
             list: List of budget dictionaries.
         """
-        self._load_data_if_needed()
-        user_budgets = [b for b in self.budgets if b['user_id'] == user_id and b.get('is_active', True)]
-
-        if not start_date_str or not end_date_str:
-            # If no date range is provided, return all active user budgets
-            # or consider returning budgets for the current month/default period.
-            # For now, returning all active if no specific range.
-            return user_budgets
-
-        try:
-            filter_start_date = datetime.strptime(start_date_str, '%Y-%m-%d')
-            filter_end_date = datetime.strptime(end_date_str, '%Y-%m-%d')
-        except ValueError:
-            # Invalid date format, return empty or all, or raise error
-            # For now, returning all active budgets of the user if date parsing fails.
-            # Consider logging this error.
-            return user_budgets
-
-        filtered_budgets = []
-        for budget in user_budgets:
-            try:
-                budget_start_date = datetime.strptime(budget['start_date'], '%Y-%m-%d')
-                # Budgets might not have an end_date if they are continuous or based on period only
-                # For simplicity, if end_date is missing or empty, we might need a rule.
-                # Assuming if budget has no end_date, it's ongoing.
-                # If budget has an end_date, use it for comparison.
-                budget_end_date_str = budget.get('end_date')
-                if budget_end_date_str:
-                    budget_end_date = datetime.strptime(budget_end_date_str, '%Y-%m-%d')
-                else:
-                    # If a budget has no end_date, how does it interact with a filter_end_date?
-                    # Option 1: Assume it's ongoing indefinitely beyond filter_end_date if budget_start_date <= filter_end_date
-                    # Option 2: If budget is e.g. monthly and filter is for a specific month, it should match.
-                    # The original get_user_budgets had logic for 'monthly', 'quarterly', etc.
-                    # This date range filter is more generic.
-                    # For now, let's assume a budget without an end_date is active until the filter_end_date if it started before/during the filter period.
-                    # This might need more sophisticated handling based on budget.period if available.
-                    budget_end_date = filter_end_date # Effectively, consider it active for the purpose of the filter period if it started.
+        with self.store.lock:
+            index = self._interval_index()
+            filter_range = None
+            if start_date_str and end_date_str:
+                try:
+                    filter_range = (datetime.strptime(start_date_str, '%Y-%m-%d').date(),
+                                    datetime.strptime(end_date_str, '%Y-%m-%d').date())
+                except ValueError:
+                    # Invalid date format: return all active budgets of the user
+                    filter_range = None
 
-                # Check for overlap: (StartA <= EndB) and (EndA >= StartB)
-                if budget_start_date <= filter_end_date and budget_end_date >= filter_start_date:
-                    filtered_budgets.append(budget)
-            except ValueError:
-                # Skip budget if its dates are malformed, or log an error
-                continue
-        
-        return filtered_budgets
+            if filter_range is None:
+                budgets = index.user_budgets(user_id)
+            else:
+                # A budget without an end_date is ongoing: it overlaps once it has started
+                budgets = index.overlapping(user_id, *filter_range)
+            return [b for b in budgets if b.get('is_active', True)]
     
     def get_budget_by_id(self, user_id, budget_id, is_admin=False):
         """Get a budget by id, check permission"""
-        self._load_data_if_needed() # Load data if not already loaded
-        for b in self.budgets:
-            if b['budget_id'] == budget_id:
-                if is_admin or b['user_id'] == user_id:
-                    return b
+        with self.store.lock:
+            self._load_data_if_needed() # Load data if not already loaded
+            for b in self.budgets:
+                if b['budget_id'] == budget_id:
+                    if is_admin or b['user_id'] == user_id:
+                        return b
         return None
     
     def create_budget(self, user_id=None, category_id=None, amount=None, period='monthly', 
@@ -252,41 +306,42 @@ class BudgetManager:
         if not validate_date_format(start_date) or (end_date and not validate_date_format(end_date)):
             return False, "Format ngày không hợp lệ (YYYY-MM-DD)"
         
-        new_budget = {
-            'budget_id': generate_id('budget', self.budgets),
+        # Budget và lịch sử của nó được lưu cùng nhau; ghi lỗi thì batch đưa dữ liệu về như cũ
+        try:
+            with self.store.batch():
+                new_budget = self._new_budget(
+                    self.store.next_id(self.budget_collection, 'budget'), user_id, category_id, amount,
+                    period, alert_threshold, notes, start_date, end_date, auto_renew
+                )
+                self.budgets.append(new_budget)
+                self._save_budget(new_budget)
+                self._stage_history([self._history_entry(
+                    self.store.next_id(self.history_collection, 'hist'), new_budget['budget_id'],
+                    user_id, 'create', None, amount, None, alert_threshold, 'Tạo ngân sách mới', user_id
+                )])
+        except OSError:
+            return False, "Lỗi khi lưu file"
+        self._flush_history()
+        return True, new_budget
+    
+    def _new_budget(self, budget_id, user_id, category_id, amount, period, alert_threshold,
+                    notes, start_date, end_date, auto_renew):
+        now = get_current_datetime()
+        return {
+            'budget_id': budget_id,
             'user_id': user_id,
             'category_id': category_id,
             'amount': amount,
             'period': period,
             'start_date': start_date,
             'end_date': end_date,
-            'spent_amount': 0,
-            'remaining_amount': amount,
             'alert_threshold': alert_threshold,
             'is_active': True,
-            'created_at': get_current_datetime(),
-            'updated_at': get_current_datetime(),
+            'created_at': now,
+            'updated_at': now,
             'notes': notes,
             'auto_renew': auto_renew
         }
-        
-        self.budgets.append(new_budget)
-        
-        self.add_history(
-            budget_id=new_budget['budget_id'],
-            user_id=user_id,
-            change_type='create',
-            old_amount=None,
-            new_amount=amount,
-            old_alert_threshold=None,
-            new_alert_threshold=alert_threshold,
-            reason='Tạo ngân sách mới',
-            changed_by=user_id
-        )
-        
-        if self.save_budgets() and self.save_history():
-            return True, new_budget
-        return False, "Lỗi khi lưu file"
     
     def update_budget(self, user_id=None, budget_id=None, **kwargs):
         """
@@ -307,77 +362,38 @@ class BudgetManager:
         old_alert_threshold = budget.get('alert_threshold')
         
         allowed_fields = ['amount', 'alert_threshold', 'notes', 'start_date', 'end_date', 'is_active', 'auto_renew']
-        updated_fields = []
+        updated_fields = [field for field in allowed_fields if field in kwargs]
         
-        for field in allowed_fields:
-            if field in kwargs:
-                if field == 'amount' and kwargs[field] <= 0:
-                    return False, "Số tiền ngân sách phải > 0"
-                
-                if field == 'alert_threshold' and not (0 <= kwargs[field] <= 100):
-                    return False, "Ngưỡng cảnh báo phải từ 0-100%"
-                
-                if field in ['start_date', 'end_date'] and kwargs[field] and not validate_date_format(kwargs[field]):
-                    return False, "Format ngày không hợp lệ (YYYY-MM-DD)"
-                
-                budget[field] = kwargs[field]
-                updated_fields.append(field)
-        
-        budget['updated_at'] = get_current_datetime()
-        
-        if 'amount' in kwargs:
-            budget['remaining_amount'] = kwargs['amount'] - budget['spent_amount']
-        
-        if 'amount' in kwargs or 'alert_threshold' in kwargs:
-            reason = kwargs.get('reason', f"Cập nhật budget - {', '.join(updated_fields)}")
-            self.add_history(
-                budget_id=budget_id,
-                user_id=user_id,
-                change_type='update',
-                old_amount=old_amount,
-                new_amount=budget.get('amount'),
-                old_alert_threshold=old_alert_threshold,
-                new_alert_threshold=budget.get('alert_threshold'),
-                reason=reason,
-                changed_by=user_id
-            )
-        
-        if self.save_budgets() and self.save_history():
-            return True, budget
-        return False, "Lỗi khi lưu file"
-    
-    def update_spent_amount(self, user_id=None, budget_id=None, spent_amount=None):
-        """Cập nhật số tiền đã chi cho budget"""
-        self._load_data_if_needed() # Load data if not already loaded
-        if user_id is None:
-            user_id = self.current_user_id
-            
-        if user_id is None or budget_id is None or spent_amount is None:
-            return False, "Thiếu thông tin bắt buộc"
+        # Kiểm tra hết trước khi sửa để budget không bị sửa dở khi dữ liệu không hợp lệ
+        for field in updated_fields:
+            if field == 'amount' and kwargs[field] <= 0:
+                return False, "Số tiền ngân sách phải > 0"
             
-        budget = self.get_budget_by_id(user_id, budget_id)
-        
-        budget['spent_amount'] = spent_amount
-        budget['remaining_amount'] = budget['amount'] - spent_amount
-        budget['updated_at'] = get_current_datetime()
-        
-        if self.save_budgets():
-            return True, budget
-        return False, "Lỗi khi lưu file"
-    
-    def add_transaction_to_budget(self, user_id=None, budget_id=None, transaction_amount=None):
-        """Thêm giao dịch vào budget và cập nhật spent_amount"""
-        self._load_data_if_needed() # Load data if not already loaded
-        if user_id is None:
-            user_id = self.current_user_id
-            
-        if user_id is None or budget_id is None or transaction_amount is None:
-            return False, "Thiếu thông tin bắt buộc"
+            if field == 'alert_threshold' and not (0 <= kwargs[field] <= 100):
+                return False, "Ngưỡng cảnh báo phải từ 0-100%"
             
-        budget = self.get_budget_by_id(user_id, budget_id)
+            if field in ['start_date', 'end_date'] and kwargs[field] and not validate_date_format(kwargs[field]):
+                return False, "Format ngày không hợp lệ (YYYY-MM-DD)"
         
-        new_spent = budget['spent_amount'] + transaction_amount
-        return self.update_spent_amount(user_id, budget_id, new_spent)
+        try:
+            with self.store.batch():
+                for field in updated_fields:
+                    budget[field] = kwargs[field]
+                
+                budget['updated_at'] = get_current_datetime()
+                self._save_budget(budget)
+                
+                if 'amount' in kwargs or 'alert_threshold' in kwargs:
+                    reason = kwargs.get('reason', f"Cập nhật budget - {', '.join(updated_fields)}")
+                    self._stage_history([self._history_entry(
+                        self.store.next_id(self.history_collection, 'hist'), budget_id, user_id, 'update',
+                        old_amount, budget.get('amount'), old_alert_threshold, budget.get('alert_threshold'),
+                        reason, user_id
+                    )])
+        except OSError:
+            return False, "Lỗi khi lưu file"
+        self._flush_history()
+        return True, budget
     
     def delete_budget(self, user_id=None, budget_id=None):
         """Xóa budget và lịch sử liên quan"""
@@ -395,7 +411,7 @@ class BudgetManager:
         budget['is_active'] = False
         budget['updated_at'] = get_current_datetime()
         
-        if self.save_budgets():
+        if self._save_budget(budget):
             return True, "Đã xóa budget thành công"
         return False, "Lỗi khi lưu file"
     
@@ -410,17 +426,16 @@ class BudgetManager:
         if user_id is None:
             return []
             
-        budgets = self.get_all_budgets(user_id, target_user_id)
+        budgets = self.with_spending(self.get_all_budgets(user_id, target_user_id))
         alerts = []
         
         for budget in budgets:
             if budget['amount'] > 0:
-                spent_percent = (budget['spent_amount'] / budget['amount']) * 100
-                if spent_percent >= budget['alert_threshold']:
+                if budget['spent_percent'] >= budget['alert_threshold']:
                     alerts.append({
                         'budget_id': budget['budget_id'],
                         'category_id': budget['category_id'],
-                        'spent_percent': spent_percent,
+                        'spent_percent': budget['spent_percent'],
                         'threshold': budget['alert_threshold'],
                         'amount': budget['amount'],
                         'spent_amount': budget['spent_amount'],
@@ -431,13 +446,24 @@ class BudgetManager:
     
     def add_history(self, budget_id=None, user_id=None, change_type=None, old_amount=None, new_amount=None, 
                    old_alert_threshold=None, new_alert_threshold=None, reason=None, changed_by=None):
-        """Thêm một bản ghi vào lịch sử thay đổi budgets"""
-        self._load_data_if_needed() # Load data if not already loaded
+        """Ghi thêm một bản ghi vào lịch sử thay đổi budgets (O(1), không đọc lại lịch sử)"""
         if None in [budget_id, user_id, change_type, reason, changed_by]:
             return False
             
-        history_entry = {
-            'history_id': generate_id('hist', self.history),
+        try:
+            with self.store.batch():
+                self._stage_history([self._history_entry(
+                    self.store.next_id(self.history_collection, 'hist'), budget_id, user_id, change_type,
+                    old_amount, new_amount, old_alert_threshold, new_alert_threshold, reason, changed_by
+                )])
+        except OSError:
+            return False
+        return self._flush_history()
+    
+    def _history_entry(self, history_id, budget_id, user_id, change_type, old_amount, new_amount,
+                       old_alert_threshold, new_alert_threshold, reason, changed_by):
+        return {
+            'history_id': history_id,
             'budget_id': budget_id,
             'user_id': user_id,
             'change_type': change_type,
@@ -449,9 +475,6 @@ class BudgetManager:
             'changed_by': changed_by,
             'changed_at': get_current_datetime()
         }
-        
-        self.history.append(history_entry)
-        return True
     
     def get_budget_history(self, user_id=None, budget_id=None):
         """
@@ -464,8 +487,8 @@ class BudgetManager:
         if user_id is None or budget_id is None:
             return []
             
-        budget = self.get_budget_by_id(user_id, budget_id)
-        return [h for h in self.history if h['budget_id'] == budget_id]
+        # Chỉ đọc đúng các dòng của budget này trong log
+        return self._history_log().read(budget_id)
     
     def get_budget_summary(self, user_id, is_admin=False):
         """
@@ -475,8 +498,8 @@ class BudgetManager:
         if not user_id:
             return {}
         
-        budgets = self.get_user_budgets(user_id, is_admin)
-        active_budgets = [b for b in budgets if b.get('is_active', True)]
+        budgets = self.get_user_budgets(user_id)
+        active_budgets = self.with_spending([b for b in budgets if b.get('is_active', True)])
         total_amount = sum(b['amount'] for b in active_budgets)
         total_spent = sum(b['spent_amount'] for b in active_budgets)
         over_budget = len([b for b in active_budgets if b['spent_amount'] > b['amount']])
@@ -490,30 +513,83 @@ class BudgetManager:
             'budgets': active_budgets
         }
     
-    def renew_monthly_budgets(self):
-        """Tự động gia hạn các budgets hàng tháng nếu cần"""
-        self._load_data_if_needed() # Load data if not already loaded
-        today = datetime.now()
-        first_day = today.replace(day=1).strftime('%Y-%m-%d')
-        last_day = today.replace(day=calendar.monthrange(today.year, today.month)[1]).strftime('%Y-%m-%d')
-        
-        for budget in self.budgets:
-            if (budget.get('is_active') and budget.get('auto_renew') and 
-                budget.get('period') == 'monthly' and 
-                budget.get('end_date') < first_day):
-                
-                # Tạo budget mới cho tháng hiện tại
-                self.create_budget(
-                    user_id=budget['user_id'],
-                    category_id=budget['category_id'],
-                    amount=budget['amount'],
-                    period='monthly',
-                    alert_threshold=budget['alert_threshold'],
-                    notes=budget['notes'],
-                    start_date=first_day,
-                    end_date=last_day,
-                    auto_renew=True
-                )
+    def renew_monthly_budgets(self, today=None):
+        """Gia hạn sang tháng hiện tại các budget hàng tháng đã hết hạn (auto_renew)
+
+        Mọi budget được xét trong một lượt: người dùng và danh mục được tra qua chỉ mục,
+        ID được cấp theo khối, budget mới và lịch sử được ghi một lần (một batch).
+        Chạy lại nhiều lần trong tháng không tạo trùng: (người dùng, danh mục) đã có budget
+        hàng tháng còn hiệu lực trong tháng này thì bỏ qua; nhiều budget cũ của cùng danh mục
+        chỉ gia hạn từ budget mới nhất.
+
+        Args:
+            today (date, optional): Ngày xác định tháng cần gia hạn (mặc định hôm nay)
+
+        Returns:
+            dict: {"status", "renewed": [budget mới...], "errors": [(budget_id, thông_báo)...]}
+        """
+        today = today or date.today()
+        first_day = today.replace(day=1).isoformat()
+        last_day = today.replace(day=calendar.monthrange(today.year, today.month)[1]).isoformat()
+
+        with self.store.lock:
+            self._load_data_if_needed()
+            current = set()
+            expired = {}
+            for budget in self.budgets:
+                if not budget.get('is_active', True) or budget.get('period') != 'monthly':
+                    continue
+                key = (budget['user_id'], budget['category_id'])
+                end_date = budget.get('end_date')
+                if not end_date or end_date >= first_day:
+                    current.add(key)
+                elif budget.get('auto_renew') and end_date > expired.get(key, {}).get('end_date', ''):
+                    expired[key] = budget
+
+            errors = []
+            renewals = []
+            for key, budget in expired.items():
+                if key in current:
+                    continue
+                user_id, category_id = key
+                category = self.category_manager.get_category_by_id(user_id, category_id)
+                if not self.user_manager.get_user_by_id(user_id):
+                    errors.append((budget['budget_id'], f"Không tìm thấy người dùng với ID: {user_id}"))
+                elif not category or not category.get('is_active', True):
+                    errors.append((budget['budget_id'], f"Danh mục {category_id} không còn hoạt động"))
+                else:
+                    renewals.append(budget)
+
+            if not renewals:
+                return {"status": "success", "renewed": [], "errors": errors}
+
+            try:
+                with self.store.batch():
+                    budget_ids = self.store.allocate_ids(self.budget_collection, 'budget', len(renewals))
+                    history_ids = self.store.allocate_ids(self.history_collection, 'hist', len(renewals))
+                    new_budgets = []
+                    history_entries = []
+                    for budget_id, history_id, old in zip(budget_ids, history_ids, renewals):
+                        new_budget = self._new_budget(
+                            budget_id, old['user_id'], old['category_id'], old['amount'], 'monthly',
+                            old.get('alert_threshold', 80), old.get('notes', ''), first_day, last_day, True
+                        )
+                        new_budget['renewed_from'] = old['budget_id']
+                        new_budgets.append(new_budget)
+                        history_entries.append(self._history_entry(
+                            history_id, budget_id, old['user_id'], 'create', None, old['amount'],
+                            None, new_budget['alert_threshold'],
+                            f"Tự động gia hạn từ ngân sách {old['budget_id']}", 'system'
+                        ))
+                    self.budgets.extend(new_budgets)
+                    self.store.upsert_many(self.budget_collection, new_budgets)
+                    self._stage_history(history_entries)
+            except OSError:
+                return {"status": "error", "renewed": [], "errors": errors + [(None, "Lỗi khi lưu file")]}
+            self._flush_history()
+
+        logger.info(f"Đã gia hạn {len(new_budgets)} ngân sách cho tháng {first_day[:7]}")
+        return {"status": "success", "renewed": new_budgets, "errors": errors}
     
     def delete_user_budgets(self, user_id):
         """Xóa tất cả budgets và lịch sử liên quan của một người dùng"""
@@ -521,10 +597,12 @@ class BudgetManager:
         if not user_id:
             return False, "Thiếu thông tin người dùng"
         
-        self.budgets = [b for b in self.budgets if b['user_id'] != user_id]
-        self.history = [h for h in self.history if h['user_id'] != user_id]
+        self.budgets[:] = [b for b in self.budgets if b['user_id'] != user_id]
+        # Thao tác hiếm: ghi lại log lịch sử không còn các dòng của người dùng
+        history_log = self._history_log()
+        history = [h for h in history_log.read_all() if h.get('user_id') != user_id]
         
-        if self.save_budgets() and self.save_history():
+        if self.save_budgets() and history_log.rewrite(history):
             print(f"Đã xóa tất cả ngân sách của người dùng: {user_id}")
             return True, "Đã xóa tất cả ngân sách thành công"
         return False, "Lỗi khi lưu file"
\ No newline at end of file
@@ -0,0 +1,113 @@
+# budget_spend.py
+
+from bisect import bisect_left, bisect_right
+
+
+class BudgetSpendIndex:
+    """Số tiền đã chi của từng budget, tính từ giao dịch thay vì lưu trong budget.
+
+    Là cấu trúc dẫn xuất của collection giao dịch nên được data store cập nhật tăng dần:
+    mỗi giao dịch thêm/sửa/xóa mềm chỉ cộng/trừ vào các budget cùng (người dùng, danh mục)
+    có khoảng ngày chứa nó. Danh sách budget được đồng bộ qua `sync()`; chỉ budget mới
+    hoặc bị đổi danh mục/khoảng ngày mới phải tính lại từ chỉ mục (người dùng, danh mục, ngày).
+    """
+
+    def __init__(self, transactions):
+        self._by_user_category = {}  # (user_id, category_id) -> (danh sách ngày, danh sách [transaction_id, số tiền])
+        self._contributions = {}     # transaction_id -> (user_id, category_id, ngày, số tiền) đang được tính
+        self._budgets = {}           # budget_id -> (user_id, category_id, ngày bắt đầu, ngày kết thúc)
+        self._budgets_by_key = {}    # (user_id, category_id) -> {budget_id}
+        self._spent = {}             # budget_id -> số tiền đã chi
+        for txn in transactions:
+            if txn.get('transaction_id') not in self._contributions:
+                self._add(txn)
+
+    def _add(self, txn):
+        if not txn.get('is_active', True):
+            return
+        txn_id, amount = txn.get('transaction_id'), txn.get('amount', 0)
+        key, date = (txn.get('user_id'), txn.get('category_id')), str(txn.get('date') or '')
+        dates, entries = self._by_user_category.setdefault(key, ([], []))
+        pos = bisect_right(dates, date)
+        dates.insert(pos, date)
+        entries.insert(pos, (txn_id, amount))
+        self._contributions[txn_id] = (key[0], key[1], date, amount)
+        self._credit(key, date, amount)
+
+    def _remove(self, txn_id):
+        # Giá trị cũ được lưu riêng vì bản ghi thường đã bị sửa tại chỗ trước khi ghi
+        contribution = self._contributions.pop(txn_id, None)
+        if contribution is None:
+            return
+        user_id, category_id, date, amount = contribution
+        key = (user_id, category_id)
+        dates, entries = self._by_user_category[key]
+        for pos in range(bisect_left(dates, date), bisect_right(dates, date)):
+            if entries[pos][0] == txn_id:
+                del dates[pos]
+                del entries[pos]
+                break
+        self._credit(key, date, -amount)
+
+    def _credit(self, key, date, amount):
+        for budget_id in self._budgets_by_key.get(key, ()):
+            _, _, start_date, end_date = self._budgets[budget_id]
+            if _in_range(date, start_date, end_date):
+                self._spent[budget_id] += amount
+
+    def apply_upsert(self, transactions):
+        for txn in transactions:
+            self._remove(txn.get('transaction_id'))
+            self._add(txn)
+
+    def apply_delete(self, txn_id):
+        self._remove(txn_id)
+
+    def sync(self, budgets):
+        """Đồng bộ danh sách budget đang theo dõi với các budget còn hoạt động, O(số budget)
+
+        Chỉ budget mới hoặc đã đổi người dùng/danh mục/khoảng ngày mới phải cộng lại
+        các giao dịch trong khoảng ngày của nó.
+        """
+        active = set()
+        for budget in budgets:
+            if not budget.get('is_active', True):
+                continue
+            budget_id = budget.get('budget_id')
+            signature = (budget.get('user_id'), budget.get('category_id'),
+                         budget.get('start_date') or '', budget.get('end_date') or '')
+            active.add(budget_id)
+            if self._budgets.get(budget_id) != signature:
+                self._untrack(budget_id)
+                self._track(budget_id, signature)
+        for budget_id in [b for b in self._budgets if b not in active]:
+            self._untrack(budget_id)
+
+    def _track(self, budget_id, signature):
+        user_id, category_id, start_date, end_date = signature
+        key = (user_id, category_id)
+        self._budgets[budget_id] = signature
+        self._budgets_by_key.setdefault(key, set()).add(budget_id)
+        spent = 0
+        indexed = self._by_user_category.get(key)
+        if indexed:
+            dates, entries = indexed
+            low = bisect_left(dates, start_date) if start_date else 0
+            high = bisect_right(dates, end_date) if end_date else len(dates)
+            spent = sum(amount for _, amount in entries[low:high])
+        self._spent[budget_id] = spent
+
+    def _untrack(self, budget_id):
+        signature = self._budgets.pop(budget_id, None)
+        if signature is None:
+            return
+        self._budgets_by_key[(signature[0], signature[1])].discard(budget_id)
+        self._spent.pop(budget_id, None)
+
+    def spent(self, budget_id):
+        """Số tiền đã chi của budget (0 nếu budget không còn hoạt động)"""
+        return self._spent.get(budget_id, 0)
+
+
+def _in_range(date, start_date, end_date):
+    return (not start_date or date >= start_date) and (not end_date or date <= end_date)
@@ -4,13 +4,22 @@ import os
 import json
 import logging
 from datetime import datetime
-from finance_app.utils.file_helper import load_json, save_json, generate_id, get_current_datetime
+from finance_app.utils.file_helper import get_current_datetime
 from finance_app.data_manager.user_manager import UserManager
+from finance_app.data_manager.storage import collection_name
+from finance_app.data_manager.data_store import get_data_store
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+def _build_category_map(categories):
+    """Tạo map category_id -> category"""
+    category_map = {}
+    for category in categories:
+        category_map.setdefault(category.get('category_id'), category)
+    return category_map
+
 class CategoryManager:
     def __init__(self, file_path='categories.json'):
         # Get the directory where the package is installed
@@ -19,19 +28,15 @@ class CategoryManager:
         # Create data directory if it doesn't exist
         os.makedirs(data_dir, exist_ok=True)
         self.file_path = os.path.join(data_dir, file_path)
+        self.store = get_data_store(data_dir)
+        self.collection = collection_name(file_path)
         
-        # Initialize categories file if it doesn't exist
-        if not os.path.exists(self.file_path):
-            logger.info(f"Creating new categories file at {self.file_path}")
-            self.save_categories([])
-            
-        self.categories = self.load_categories()
+        # Không đọc file khi khởi tạo; categories mặc định được kiểm tra ở lần nạp đầu tiên
+        self.categories = None # Defer loading
+        self._defaults_checked = False
         self.user_manager = UserManager()
         self.current_user_id = None
 
-        # Ensure default categories exist
-        self.ensure_default_categories()
-
     def ensure_default_categories(self):
         """Kiểm tra và tạo lại categories mặc định nếu cần"""
         try:
@@ -74,10 +79,11 @@ class CategoryManager:
         ]
         
         created_categories = []
-        for cat in default_categories:
+        category_ids = self.store.allocate_ids(self.collection, 'cat', len(default_categories))
+        for category_id, cat in zip(category_ids, default_categories):
             try:
                 category = {
-                    'category_id': generate_id('cat', self.categories),
+                    'category_id': category_id,
                     'name': cat["name"],
                     'type': cat["type"],
                     'icon': cat["icon"],
@@ -114,25 +120,38 @@ class CategoryManager:
     def load_categories(self):
         """Tải danh sách categories từ file"""
         try:
-            categories = load_json(self.file_path)
-            logger.debug(f"Loaded {len(categories)} categories from {self.file_path}")
-            return categories
+            # List dùng chung trong data store, không đọc lại file ở mỗi lần gọi
+            categories = self.store.acquire(self.collection, self)
+            logger.debug(f"Loaded {len(categories)} categories from {self.collection}")
         except Exception as e:
             logger.error(f"Error loading categories: {str(e)}")
             return []
+        if not self._defaults_checked:
+            self._defaults_checked = True
+            self.ensure_default_categories()
+        return categories
 
     def save_categories(self, categories=None):
         """Lưu danh sách categories vào file"""
         try:
             if categories is None:
                 categories = self.categories
-            save_json(self.file_path, categories)
-            logger.debug(f"Saved {len(categories)} categories to {self.file_path}")
+            if not self.store.save_all(self.collection, categories):
+                return False
+            logger.debug(f"Saved {len(categories)} categories to {self.collection}")
             return True
         except Exception as e:
             logger.error(f"Error saving categories: {str(e)}")
             return False
 
+    def _save_category(self, category):
+        """Lưu một category (backend SQLite chỉ ghi đúng một dòng)"""
+        try:
+            return self.store.upsert(self.collection, category)
+        except Exception as e:
+            logger.error(f"Error saving category {category.get('category_id')}: {str(e)}")
+            return False
+
     def get_all_categories(self, user_id=None, category_type=None, active_only=True):
         """Lấy tất cả categories"""
         try:
@@ -172,30 +191,55 @@ class CategoryManager:
             logger.error(f"Error getting categories: {str(e)}")
             return []
 
-    def get_category_by_id(self, category_id):
-        """Lấy category theo ID"""
+    def _category_map(self):
+        """Map category_id -> category dùng chung, tự tính lại khi dữ liệu categories thay đổi"""
+        self.categories = self.load_categories()
+        return self.store.derived(self.collection, 'category_map', _build_category_map)
+
+    def get_category_by_id(self, user_id=None, category_id=None):
+        """Lấy category theo ID
+
+        Gọi được theo hai cách: get_category_by_id(category_id) hoặc
+        get_category_by_id(user_id, category_id). Với cách thứ hai, chỉ trả về category
+        hệ thống hoặc của chính người dùng (admin xem được tất cả).
+        """
+        if category_id is None:
+            user_id, category_id = None, user_id
         try:
             if not category_id:
                 return None
                 
-            # Tải lại categories từ file để đảm bảo dữ liệu mới nhất
-            self.categories = self.load_categories()
-            
-            for category in self.categories:
-                if category['category_id'] == category_id:
-                    return category
-            return None
+            category = self._category_map().get(category_id)
+            if category and user_id and category.get('user_id') not in ("system", user_id, None) \
+                    and not self.user_manager.is_admin(user_id):
+                return None
+            return category
             
         except Exception as e:
             logger.error(f"Error getting category {category_id}: {str(e)}")
             return None
 
+    def resolve_categories(self, category_ids):
+        """Tra cứu nhiều category cùng lúc (dùng khi ghép dữ liệu giao dịch với danh mục)
+
+        Returns:
+            dict: {category_id: category} cho các ID tìm thấy
+        """
+        category_map = self._category_map()
+        resolved = {}
+        for category_id in category_ids:
+            category = category_map.get(category_id)
+            if category is not None:
+                resolved[category_id] = category
+        return resolved
+
     def get_category_by_name(self, name):
         """Lấy category theo tên"""
         try:
             if not name:
                 return None
                 
+            self.categories = self.load_categories()
             for category in self.categories:
                 if category['name'].lower() == name.lower():
                     return category
@@ -208,6 +252,7 @@ class CategoryManager:
     def get_category_stats(self):
         """Lấy thống kê về categories"""
         try:
+            self.categories = self.load_categories()
             stats = {
                 'total': len(self.categories),
                 'active': len([c for c in self.categories if c.get('is_active', True)]),
@@ -245,7 +290,7 @@ class CategoryManager:
             raise ValueError(f"Tên danh mục '{name}' đã tồn tại cho người dùng này hoặc là danh mục hệ thống.")
 
         new_category = {
-            'category_id': generate_id('cat', self.categories),
+            'category_id': self.store.next_id(self.collection, 'cat'),
             'name': name,
             'type': category_type,
             'icon': icon,
@@ -258,7 +303,7 @@ class CategoryManager:
         }
 
         self.categories.append(new_category)
-        if self.save_categories():
+        if self._save_category(new_category):
             logger.info(f"Created new category: {name} with ID {new_category['category_id']}")
             return new_category # Return the created category dict on success
         else:
@@ -316,7 +361,7 @@ class CategoryManager:
         if updated:
             category_to_update['updated_at'] = get_current_datetime()
             self.categories[category_index] = category_to_update
-            if self.save_categories():
+            if self._save_category(category_to_update):
                 logger.info(f"Updated category: {category_id} by user {current_user_id}")
                 return category_to_update
             else:
@@ -355,7 +400,7 @@ class CategoryManager:
             raise PermissionError("Bạn không có quyền xóa danh mục này.")
             
         del self.categories[category_index]
-        if self.save_categories():
+        if self.store.delete(self.collection, category_id):
             logger.info(f"Deleted category: {category_id} by user {current_user_id}")
             return True
         else:
@@ -392,7 +437,7 @@ class CategoryManager:
 
         category['is_active'] = True
 
-        if self.save_categories():
+        if self._save_category(category):
             return True, "Đã khôi phục category thành công"
         return False, "Lỗi khi lưu file"
 
@@ -419,13 +464,12 @@ class CategoryManager:
         if category_id is None:
             return "Unknown"
             
-        for category in self.categories:
-            if category.get('category_id') == category_id:
-                return category.get('name', 'Unknown')
-        return "Unknown"
+        category = self._category_map().get(category_id)
+        return category.get('name', 'Unknown') if category else "Unknown"
 
     def get_user_categories(self, user_id, is_admin=False):
         """Get all categories for a user or all if admin"""
+        self.categories = self.load_categories()
         if is_admin:
             return self.categories
         return [c for c in self.categories if c['user_id'] == user_id or c['user_id'] is None]
\ No newline at end of file
@@ -0,0 +1,373 @@
+# data_store.py
+
+import threading
+import weakref
+import logging
+from contextlib import contextmanager
+from finance_app.data_manager.storage import get_storage, get_id_key
+
+logger = logging.getLogger(__name__)
+
+# Collection lưu giá trị cuối cùng của các bộ cấp ID
+SEQUENCES = 'sequences'
+
+
+class _Entry:
+    """Một collection đã nạp vào bộ nhớ cùng các thông tin đi kèm"""
+
+    def __init__(self, records, stamp):
+        self.records = records
+        self.stamp = stamp
+        self.version = 0
+        self.owners = set()
+        self.derived = {}
+        self.sequences = {}  # prefix -> số lớn nhất đã cấp/đã thấy
+
+
+class _SequenceMap(dict):
+    """Map sequence_id -> bản ghi bộ đếm, được cập nhật tăng dần sau mỗi lần ghi sequences"""
+
+    def __init__(self, records):
+        super().__init__((record.get('sequence_id'), record) for record in records)
+
+    def apply_upsert(self, records):
+        for record in records:
+            self[record.get('sequence_id')] = record
+
+    def apply_delete(self, sequence_id):
+        self.pop(sequence_id, None)
+
+
+class _PendingWrites:
+    """Các thay đổi của một collection đang chờ ghi xuống backend trong batch()"""
+
+    def __init__(self, collection, entry):
+        self.collection = collection
+        self.entry = entry
+        self.replace = False  # save_all trong batch: ghi lại toàn bộ collection
+        self.ops = {}         # record_id -> bản ghi (upsert) hoặc None (xóa); thao tác sau cùng được giữ
+
+    def upsert(self, records):
+        id_key = get_id_key(self.collection)
+        for record in records:
+            self.ops[record.get(id_key or get_id_key(self.collection, record))] = record
+
+    def delete(self, record_id):
+        self.ops[record_id] = None
+
+    def as_change(self):
+        return {
+            'records': self.entry.records,
+            'replace': self.replace,
+            'upserts': [record for record in self.ops.values() if record is not None],
+            'deletes': [record_id for record_id, record in self.ops.items() if record is None],
+        }
+
+
+class DataStore:
+    """Kho dữ liệu dùng chung trong tiến trình.
+
+    Mỗi collection chỉ được đọc từ backend một lần; mọi manager nhận về cùng một list
+    (phải sửa tại chỗ, không gán list mới). Collection được giữ trong bộ nhớ chừng nào
+    còn manager đang dùng (đếm tham chiếu theo owner) và được đọc lại khi tiến trình
+    khác ghi vào dữ liệu trên đĩa. Mọi thao tác ghi đi qua store để tăng `version`,
+    nhờ đó các cấu trúc dẫn xuất (chỉ mục, tổng hợp) biết khi nào cần tính lại.
+    Cấu trúc dẫn xuất có phương thức `apply_upsert(records)` / `apply_delete(record_id)`
+    được cập nhật tăng dần thay vì bị xóa sau mỗi lần ghi.
+    Nhiều lần ghi liên quan (nhiều collection) có thể gom lại bằng `with store.batch():`.
+    """
+
+    def __init__(self, storage):
+        self.storage = storage
+        self._entries = {}
+        self._lock = threading.RLock()
+        self._batch = None  # collection -> _PendingWrites khi đang trong batch()
+
+    @property
+    def lock(self):
+        """Khóa của store; giữ khóa này khi đọc nhiều bước từ luồng nền để không
+        đọc xen giữa một lần ghi trên luồng GUI"""
+        return self._lock
+
+    def acquire(self, collection, owner=None):
+        """Trả về list bản ghi dùng chung của collection.
+
+        Args:
+            owner: Đối tượng giữ collection; khi owner bị thu hồi bộ nhớ, tham chiếu được trả lại
+        """
+        with self._lock:
+            entry = self._entries.get(collection)
+            if entry is None:
+                stamp = self.storage.stamp(collection)
+                entry = _Entry(self.storage.load(collection), stamp)
+                self._entries[collection] = entry
+                logger.debug(f"Đã nạp {len(entry.records)} bản ghi {collection} vào data store")
+            else:
+                self._refresh_if_stale(collection, entry)
+            if owner is not None and id(owner) not in entry.owners:
+                entry.owners.add(id(owner))
+                weakref.finalize(owner, self.release, collection, id(owner))
+            return entry.records
+
+    def release(self, collection, owner_id):
+        """Trả lại tham chiếu của owner; collection được giải phóng khi không còn ai dùng"""
+        with self._lock:
+            entry = self._entries.get(collection)
+            if entry is None or owner_id not in entry.owners:
+                return
+            entry.owners.discard(owner_id)
+            # Collection còn thay đổi chờ ghi trong batch thì chưa được giải phóng
+            if not entry.owners and not (self._batch and collection in self._batch):
+                del self._entries[collection]
+                logger.debug(f"Đã giải phóng {collection} khỏi data store")
+
+    def refcount(self, collection):
+        with self._lock:
+            entry = self._entries.get(collection)
+            return len(entry.owners) if entry else 0
+
+    def version(self, collection):
+        """Phiên bản của collection trong bộ nhớ (tăng sau mỗi lần ghi hoặc đọc lại)"""
+        with self._lock:
+            entry = self._entries.get(collection)
+            if entry is None:
+                return None
+            self._refresh_if_stale(collection, entry)
+            return entry.version
+
+    def _refresh_if_stale(self, collection, entry):
+        if self._batch and collection in self._batch:
+            # Bộ nhớ đang mới hơn backend (thay đổi chưa ghi), không đọc lại
+            return
+        stamp = self.storage.stamp(collection)
+        if stamp != entry.stamp:
+            # Dữ liệu bị tiến trình khác thay đổi: đọc lại nhưng giữ nguyên đối tượng list
+            entry.records[:] = self.storage.load(collection)
+            entry.stamp = self.storage.stamp(collection)
+            entry.sequences.clear()
+            self._touch(entry)
+            logger.debug(f"Đã đọc lại {collection} do dữ liệu trên đĩa thay đổi")
+
+    def _touch(self, entry, changed=None, deleted_id=None):
+        entry.version += 1
+        if changed is None and deleted_id is None:
+            entry.derived.clear()
+            return
+        for key, value in list(entry.derived.items()):
+            if changed is not None and hasattr(value, 'apply_upsert'):
+                value.apply_upsert(changed)
+            elif deleted_id is not None and hasattr(value, 'apply_delete'):
+                value.apply_delete(deleted_id)
+            else:
+                del entry.derived[key]
+
+    def _entry(self, collection):
+        entry = self._entries.get(collection)
+        if entry is None:
+            self.acquire(collection)
+            entry = self._entries[collection]
+        return entry
+
+    def derived(self, collection, key, builder):
+        """Lấy cấu trúc dẫn xuất (chỉ mục...) của collection, tính lại khi dữ liệu thay đổi
+
+        Args:
+            key (str): Tên cấu trúc dẫn xuất
+            builder (callable): Hàm nhận list bản ghi và trả về cấu trúc dẫn xuất
+        """
+        with self._lock:
+            entry = self._entry(collection)
+            self._refresh_if_stale(collection, entry)
+            if key not in entry.derived:
+                entry.derived[key] = builder(entry.records)
+            return entry.derived[key]
+
+    def query(self, collection, **filters):
+        """Lọc bản ghi qua chỉ mục của backend mà không nạp cả collection vào bộ nhớ
+
+        Chỉ dùng khi backend có chỉ mục (SQLite) và collection chưa được nạp; ngược lại trả
+        về None để caller dùng chỉ mục trong bộ nhớ (luôn mới nhất, kể cả thay đổi trong batch).
+
+        Args:
+            **filters: user_id, category_id, start_date, end_date, active_only như StorageBackend.query
+        """
+        with self._lock:
+            if collection in self._entries or not self.storage.indexed_queries:
+                return None
+            return self.storage.query(collection, **filters)
+
+    def _after_write(self, collection, entry, ok, changed=None, deleted_id=None):
+        if ok:
+            entry.stamp = self.storage.stamp(collection)
+        # Dữ liệu trong bộ nhớ đã thay đổi kể cả khi ghi xuống backend thất bại
+        self._touch(entry, changed, deleted_id)
+        return ok
+
+    def upsert(self, collection, record):
+        """Ghi xuống backend bản ghi đã được thêm/sửa trong list dùng chung"""
+        return self.upsert_many(collection, [record])
+
+    def upsert_many(self, collection, changed):
+        with self._lock:
+            entry = self._entry(collection)
+            if self._batch is not None:
+                self._pending(collection, entry).upsert(changed)
+                self._touch(entry, changed=changed)
+                return True
+            ok = self.storage.upsert_many(collection, changed, entry.records)
+            return self._after_write(collection, entry, ok, changed=changed)
+
+    def delete(self, collection, record_id):
+        """Xóa bản ghi khỏi list dùng chung và khỏi backend"""
+        with self._lock:
+            entry = self._entry(collection)
+            records = entry.records
+            id_key = get_id_key(collection)
+            records[:] = [r for r in records if r.get(id_key or get_id_key(collection, r)) != record_id]
+            if self._batch is not None:
+                self._pending(collection, entry).delete(record_id)
+                self._touch(entry, deleted_id=record_id)
+                return True
+            ok = self.storage.delete(collection, record_id, records)
+            return self._after_write(collection, entry, ok, deleted_id=record_id)
+
+    def save_all(self, collection, records=None):
+        """Ghi lại toàn bộ collection; `records` (nếu có) thay thế nội dung list dùng chung"""
+        with self._lock:
+            entry = self._entry(collection)
+            if records is not None and records is not entry.records:
+                entry.records[:] = records
+            if self._batch is not None:
+                self._pending(collection, entry).replace = True
+                self._touch(entry)
+                return True
+            ok = self.storage.save_all(collection, entry.records)
+            return self._after_write(collection, entry, ok)
+
+    @contextmanager
+    def batch(self):
+        """Unit of work: gom mọi lần ghi trong khối `with` và ghi mỗi collection một lần khi kết thúc
+
+        Trong khối, list dùng chung và các cấu trúc dẫn xuất vẫn được cập nhật ngay nên các lần
+        đọc sau đó thấy thay đổi; chỉ việc ghi xuống backend bị hoãn tới cuối khối, khi toàn bộ
+        thay đổi được ghi cùng lúc (nguyên tử với các backend hỗ trợ). Nếu khối phát sinh
+        exception, không gì được ghi và các collection đã sửa được đọc lại từ backend.
+        Khóa store được giữ suốt khối; khối lồng nhau được gộp vào khối ngoài cùng.
+
+        Raises:
+            OSError: Không ghi được các thay đổi (bộ nhớ được đưa về trạng thái trên backend)
+        """
+        with self._lock:
+            if self._batch is not None:
+                yield self
+                return
+            self._batch = {}
+            try:
+                yield self
+            except BaseException:
+                pending, self._batch = self._batch, None
+                self._rollback(pending)
+                raise
+            pending, self._batch = self._batch, None
+            self._commit(pending)
+
+    def _pending(self, collection, entry):
+        writes = self._batch.get(collection)
+        if writes is None:
+            writes = self._batch[collection] = _PendingWrites(collection, entry)
+        return writes
+
+    def _commit(self, pending):
+        if not pending:
+            return
+        changes = {collection: writes.as_change() for collection, writes in pending.items()}
+        if not self.storage.apply_batch(changes):
+            self._rollback(pending)
+            raise OSError(f"Không thể ghi batch ({', '.join(changes)}) xuống backend")
+        for collection, writes in pending.items():
+            writes.entry.stamp = self.storage.stamp(collection)
+        logger.debug(f"Đã ghi batch: {', '.join(f'{c} ({len(w.ops)})' for c, w in pending.items())}")
+
+    def _rollback(self, pending):
+        for collection, writes in pending.items():
+            entry = writes.entry
+            entry.records[:] = self.storage.load(collection)
+            entry.stamp = self.storage.stamp(collection)
+            entry.sequences.clear()
+            self._touch(entry)
+        if pending:
+            logger.warning(f"Đã hủy batch, đọc lại {', '.join(pending)} từ backend")
+
+    def next_id(self, collection, prefix):
+        """Cấp ID mới dạng `<prefix>_001` cho collection trong O(1)"""
+        return self.allocate_ids(collection, prefix)[0]
+
+    def allocate_ids(self, collection, prefix, count=1):
+        """Cấp liền một khối `count` ID tăng dần (chỉ ghi bộ đếm xuống backend một lần)
+
+        Bộ đếm được khởi tạo một lần từ số lớn nhất đang có trong collection và được lưu
+        trong collection `sequences`, nên ID không bị cấp lại kể cả khi bản ghi đã bị xóa.
+        """
+        with self._lock:
+            entry = self._entry(collection)
+            self._refresh_if_stale(collection, entry)
+            if prefix not in entry.sequences:
+                entry.sequences[prefix] = _max_sequence(collection, prefix, entry.records)
+            sequence_id = f"{collection}:{prefix}"
+            sequence = self.derived(SEQUENCES, 'by_id', _SequenceMap).get(sequence_id)
+            # Giá trị đã lưu có thể lớn hơn nếu tiến trình khác vừa cấp ID
+            last = max(entry.sequences[prefix], sequence.get('value', 0) if sequence else 0)
+            entry.sequences[prefix] = last + count
+            if sequence is not None and sequence.get('value') == last + count:
+                # count=0 và bộ đếm đã lưu đúng: không cần ghi
+                return []
+            if sequence is None:
+                sequence = {'sequence_id': sequence_id, 'collection': collection, 'prefix': prefix}
+                self._entries[SEQUENCES].records.append(sequence)
+            sequence['value'] = last + count
+            # Trong batch, bộ đếm được ghi cùng lần với bản ghi nó đánh số; ngoài batch là một
+            # dòng journal (sequences luôn chạy ở chế độ journal với backend JSON)
+            if not self.upsert(SEQUENCES, sequence):
+                logger.warning(f"Không thể lưu bộ đếm ID {sequence_id}")
+            return [f"{prefix}_{number:03d}" for number in range(last + 1, last + count + 1)]
+
+    def compact(self, collection):
+        with self._lock:
+            if self._batch and collection in self._batch:
+                # Thay đổi chưa commit không được ghi vào snapshot; batch sẽ tự ghi khi commit
+                return True
+            entry = self._entries.get(collection)
+            ok = self.storage.compact(collection, entry.records if entry else None)
+            if entry is not None and ok:
+                entry.stamp = self.storage.stamp(collection)
+            return ok
+
+
+def _max_sequence(collection, prefix, records):
+    """Số thứ tự lớn nhất của các ID dạng `<prefix>_<số>` trong collection"""
+    id_key = get_id_key(collection)
+    head = f"{prefix}_"
+    max_number = 0
+    for record in records:
+        record_id = record.get(id_key or get_id_key(collection, record))
+        if isinstance(record_id, str) and record_id.startswith(head):
+            try:
+                max_number = max(max_number, int(record_id[len(head):]))
+            except ValueError:
+                continue
+    return max_number
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_data_store(data_dir=None):
+    """Trả về data store dùng chung cho thư mục data (một store cho mỗi backend)"""
+    storage = get_storage(data_dir)
+    with _stores_lock:
+        store = _stores.get(id(storage))
+        if store is None:
+            store = DataStore(storage)
+            _stores[id(storage)] = store
+        return store
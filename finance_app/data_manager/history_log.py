@@ -0,0 +1,149 @@
+# history_log.py
+
+import os
+import json
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class AppendOnlyLog:
+    """Log chỉ ghi thêm (JSON Lines) với chỉ mục vị trí theo một trường khóa.
+
+    Ghi thêm một bản ghi là O(1): chỉ nối một dòng vào cuối file, không đọc hay ghi lại
+    phần đã có. Chỉ mục khóa -> danh sách vị trí byte chỉ được dựng khi cần đọc lần đầu
+    (và đọc nối phần đuôi khi tiến trình khác ghi thêm), sau đó đọc các bản ghi của một
+    khóa chỉ cần seek tới đúng k dòng: O(k).
+    """
+
+    def __init__(self, path, key):
+        self.path = path
+        self.key = key
+        self._lock = threading.Lock()
+        self._offsets = None    # giá trị khóa -> [vị trí byte của dòng]; None khi chưa dựng
+        self._indexed_size = 0  # số byte đầu file đã được đánh chỉ mục
+        self._inode = None      # file bị thay thế (ghi lại toàn bộ) thì dựng lại chỉ mục
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def append(self, record):
+        return self.append_many([record])
+
+    def append_many(self, records):
+        """Ghi thêm các bản ghi vào cuối log (một lần ghi, một lần fsync)"""
+        if not records:
+            return True
+        lines = [json.dumps(record, ensure_ascii=False).encode('utf-8') + b'\n' for record in records]
+        with self._lock:
+            try:
+                with open(self.path, 'ab') as f:
+                    start = f.tell()
+                    prefix = b''
+                    if start and not self._ends_with_newline(start):
+                        # Dòng cuối bị cắt dở (tiến trình trước dừng giữa chừng): bắt đầu dòng mới
+                        prefix = b'\n'
+                    f.write(prefix + b''.join(lines))
+                    f.flush()
+                    os.fsync(f.fileno())
+            except OSError as e:
+                logger.error(f"Không thể ghi vào {self.path}: {str(e)}")
+                return False
+            if self._offsets is not None and self._indexed_size == start:
+                # Chỉ mục đang khớp tới cuối file: thêm vị trí mới, không phải đọc lại
+                offset = start + len(prefix)
+                for record, line in zip(records, lines):
+                    self._offsets.setdefault(record.get(self.key), []).append(offset)
+                    offset += len(line)
+                self._indexed_size = offset
+            return True
+
+    def _ends_with_newline(self, size):
+        with open(self.path, 'rb') as f:
+            f.seek(size - 1)
+            return f.read(1) == b'\n'
+
+    def read(self, key_value):
+        """Các bản ghi có khóa bằng key_value, theo thứ tự ghi"""
+        with self._lock:
+            self._refresh_index()
+            offsets = list(self._offsets.get(key_value, ()))
+            if not offsets:
+                return []
+            records = []
+            with open(self.path, 'rb') as f:
+                for offset in offsets:
+                    f.seek(offset)
+                    records.append(json.loads(f.readline()))
+            return records
+
+    def read_all(self):
+        if not self.exists():
+            return []
+        with self._lock, open(self.path, 'rb') as f:
+            return [record for _, record in self._parse_lines(f)]
+
+    def rewrite(self, records):
+        """Ghi lại toàn bộ log (nguyên tử: file tạm rồi os.replace); dùng cho thao tác hiếm như xóa dữ liệu"""
+        temp_path = self.path + '.tmp'
+        with self._lock:
+            try:
+                with open(temp_path, 'wb') as f:
+                    for record in records:
+                        f.write(json.dumps(record, ensure_ascii=False).encode('utf-8') + b'\n')
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(temp_path, self.path)
+            except OSError as e:
+                logger.error(f"Không thể ghi lại {self.path}: {str(e)}")
+                return False
+            self._offsets = None
+            return True
+
+    def _refresh_index(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            self._offsets, self._indexed_size, self._inode = {}, 0, None
+            return
+        if self._offsets is None or stat.st_ino != self._inode or stat.st_size < self._indexed_size:
+            self._offsets, self._indexed_size, self._inode = {}, 0, stat.st_ino
+        if stat.st_size == self._indexed_size:
+            return
+        # Dựng chỉ mục lần đầu, hoặc chỉ đọc phần đuôi do tiến trình khác vừa ghi thêm
+        with open(self.path, 'rb') as f:
+            f.seek(self._indexed_size)
+            for offset, record in self._parse_lines(f):
+                self._offsets.setdefault(record.get(self.key), []).append(offset)
+            self._indexed_size = f.tell()
+
+    def _parse_lines(self, f):
+        """Duyệt (vị trí, bản ghi) từ vị trí hiện tại; dừng trước dòng cuối chưa ghi xong"""
+        while True:
+            offset = f.tell()
+            line = f.readline()
+            if not line.endswith(b'\n'):
+                f.seek(offset)
+                return
+            try:
+                record = json.loads(line)
+            except ValueError:
+                logger.warning(f"Bỏ qua dòng hỏng trong {self.path} (byte {offset})")
+                continue
+            if isinstance(record, dict):
+                yield offset, record
+
+
+_logs = {}
+_logs_lock = threading.Lock()
+
+
+def get_append_log(path, key):
+    """Trả về log dùng chung trong tiến trình cho file path"""
+    path = os.path.abspath(path)
+    with _logs_lock:
+        log = _logs.get(path)
+        if log is None:
+            log = _logs[path] = AppendOnlyLog(path, key)
+        return log
@@ -1,8 +1,10 @@
 # notification_manager.py
 
-from finance_app.utils.file_helper import load_json, save_json, generate_id, get_current_datetime
+from finance_app.utils.file_helper import get_current_datetime
 from datetime import datetime
 from finance_app.data_manager.user_manager import UserManager
+from finance_app.data_manager.storage import collection_name
+from finance_app.data_manager.data_store import get_data_store
 
 class NotificationManager:
     def __init__(self, file_path='notifications.json'):
@@ -13,16 +15,22 @@ class NotificationManager:
         # Create data directory if it doesn't exist
         os.makedirs(data_dir, exist_ok=True)
         self.file_path = os.path.join(data_dir, file_path)
+        self.store = get_data_store(data_dir)
+        self.collection = collection_name(file_path)
         self.notifications = None # Defer loading
         self.user_manager = UserManager() 
         self.current_user_id = None
 
     def _load_data_if_needed(self):
-        if self.notifications is None:
-            self.notifications = load_json(self.file_path)
+        # List dùng chung trong data store; đọc lại nếu dữ liệu trên đĩa bị thay đổi
+        self.notifications = self.store.acquire(self.collection, self)
 
     def _save_data(self):
-        return save_json(self.file_path, self.notifications)
+        return self.store.save_all(self.collection, self.notifications)
+
+    def _save_notification(self, notification):
+        """Lưu một notification (backend SQLite chỉ ghi đúng một dòng)"""
+        return self.store.upsert(self.collection, notification)
 
     def set_current_user(self, user_id):
         """Thiết lập người dùng hiện tại
@@ -131,7 +139,7 @@ class NotificationManager:
             return False, "Độ ưu tiên không hợp lệ"
         
         new_notification = {
-            'notification_id': generate_id('notif', self.notifications),
+            'notification_id': self.store.next_id(self.collection, 'notif'),
             'user_id': user_id,
             'type': notification_type,
             'title': title,
@@ -145,7 +153,7 @@ class NotificationManager:
         
         self.notifications.append(new_notification)
         
-        if self._save_data():
+        if self._save_notification(new_notification):
             return True, new_notification
         return False, "Lỗi khi lưu file"
     
@@ -165,7 +173,7 @@ class NotificationManager:
         notification['is_read'] = True
         notification['read_at'] = get_current_datetime()
         
-        if self._save_data():
+        if self._save_notification(notification):
             return True, "Đã đánh dấu thông báo đã đọc"
         return False, "Lỗi khi lưu file"
     
@@ -185,7 +193,7 @@ class NotificationManager:
         notification['is_read'] = False
         notification['read_at'] = None
         
-        if self._save_data():
+        if self._save_notification(notification):
             return True, "Đã đánh dấu thông báo chưa đọc"
         return False, "Lỗi khi lưu file"
     
@@ -207,15 +215,16 @@ class NotificationManager:
             return False, "Không có quyền đánh dấu thông báo của người dùng khác"
 
         current_time = get_current_datetime()
-        marked_count = 0
+        marked = []
         for notification in self.notifications:
             if notification['user_id'] == user_to_update_id and not notification.get('is_read', False):
                 notification['is_read'] = True
                 notification['read_at'] = current_time
-                marked_count +=1
+                marked.append(notification)
+        marked_count = len(marked)
         
         if marked_count > 0:
-            if self._save_data():
+            if self.store.upsert_many(self.collection, marked):
                 return True, f"Đã đánh dấu {marked_count} thông báo đã đọc cho người dùng {user_to_update_id}"
             return False, "Lỗi khi lưu file"
         return True, f"Không có thông báo chưa đọc nào cho người dùng {user_to_update_id}"
@@ -237,7 +246,7 @@ class NotificationManager:
             if notif['notification_id'] == notification_id:
                 # Permission check already done by get_notification_by_id implicitly
                 del self.notifications[i]
-                if self._save_data():
+                if self.store.delete(self.collection, notification_id):
                     return True, "Đã xóa thông báo"
                 return False, "Lỗi khi lưu file"
             
@@ -254,7 +263,7 @@ class NotificationManager:
             return False, "User ID is required"
         
         initial_count = len(self.notifications)
-        self.notifications = [n for n in self.notifications if n['user_id'] != user_id]
+        self.notifications[:] = [n for n in self.notifications if n['user_id'] != user_id]
         
         if len(self.notifications) < initial_count:
             if self._save_data():
@@ -0,0 +1,82 @@
+# recurring_scheduler.py
+
+import heapq
+
+
+class RecurringDueQueue:
+    """Hàng đợi ưu tiên (min-heap) giao dịch định kỳ của mọi người dùng theo ngày đến hạn.
+
+    Là cấu trúc dẫn xuất của collection recurring_transactions: mỗi lần một mục được
+    thêm/sửa, một phần tử (ngày đến hạn, recurring_id) mới được đẩy vào heap. Phần tử cũ
+    không bị tìm để xóa mà bị bỏ qua khi lấy ra vì không còn khớp next_date hiện tại của
+    mục, nên mọi thao tác là O(log n) và lấy các mục đến hạn chỉ chạm tới đúng các mục đó.
+    """
+
+    def __init__(self, items):
+        self._items = {}  # recurring_id -> mục định kỳ
+        self._heap = []   # (ngày đến hạn YYYY-MM-DD, recurring_id), có thể chứa phần tử cũ
+        for item in items:
+            self._items[item.get('recurring_id')] = item
+            entry = _due_entry(item)
+            if entry:
+                self._heap.append(entry)
+        heapq.heapify(self._heap)
+
+    def apply_upsert(self, items):
+        for item in items:
+            self._items[item.get('recurring_id')] = item
+            self.push(item)
+
+    def apply_delete(self, recurring_id):
+        self._items.pop(recurring_id, None)
+
+    def push(self, item):
+        """Đưa (lại) một mục vào hàng đợi theo next_date hiện tại của nó"""
+        entry = _due_entry(item)
+        if entry:
+            heapq.heappush(self._heap, entry)
+            if len(self._heap) > 2 * len(self._items) + 16:
+                self._compact()
+
+    def _compact(self):
+        # Bỏ các phần tử cũ khi chúng chiếm quá nửa heap
+        self._heap = list({entry for entry in self._heap if self._is_current(entry)})
+        heapq.heapify(self._heap)
+
+    def _is_current(self, entry):
+        item = self._items.get(entry[1])
+        return item is not None and _due_entry(item) == entry
+
+    def next_due_date(self):
+        """Ngày đến hạn sớm nhất (YYYY-MM-DD) trong các mục đang chờ, None nếu không có"""
+        while self._heap and not self._is_current(self._heap[0]):
+            heapq.heappop(self._heap)
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, today):
+        """Lấy ra mọi mục có ngày đến hạn <= today (YYYY-MM-DD), theo thứ tự ngày đến hạn
+
+        Mục được xử lý xong sẽ tự vào lại hàng đợi khi next_date mới được ghi; mục bị bỏ qua
+        cần được push() lại.
+        """
+        due = []
+        seen = set()
+        while self._heap and self._heap[0][0] <= today:
+            entry = heapq.heappop(self._heap)
+            if entry[1] not in seen and self._is_current(entry):
+                seen.add(entry[1])
+                due.append(self._items[entry[1]])
+        return due
+
+
+def _due_entry(item):
+    """(ngày đến hạn, recurring_id) nếu mục còn cần tạo giao dịch tự động, ngược lại None"""
+    if not item.get('is_active', True) or not item.get('auto_create', True):
+        return None
+    next_date = str(item.get('next_date') or '')[:10]
+    if not next_date:
+        return None
+    end_date = item.get('end_date')
+    if end_date and next_date > str(end_date)[:10]:
+        return None
+    return (next_date, item.get('recurring_id'))
@@ -1,23 +1,33 @@
 from pathlib import Path
 import datetime
-from finance_app.utils.file_helper import load_json, save_json, generate_id, validate_date_format
+import logging
+from finance_app.utils.file_helper import validate_date_format
 from finance_app.data_manager.user_manager import UserManager
 from finance_app.data_manager.category_manager import CategoryManager
+from finance_app.data_manager.storage import collection_name
+from finance_app.data_manager.data_store import get_data_store
+from finance_app.data_manager.recurring_scheduler import RecurringDueQueue
+
+logger = logging.getLogger(__name__)
 
 class RecurringTransactionManager:
     VALID_FREQUENCIES = ["daily", "weekly", "monthly", "quarterly", "yearly"]
+    # Số kỳ bù tối đa cho một mục trong một lượt (phần còn lại được bù ở lượt sau)
+    MAX_CATCH_UP_PER_RUN = 1000
 
     def __init__(self, data_dir=None):
         self.data_dir = Path(data_dir) if data_dir else Path(__file__).parent.parent / "data"
         self.recurring_file = self.data_dir / "recurring_transactions.json"
+        self.store = get_data_store(self.data_dir)
+        self.collection = collection_name(self.recurring_file)
         self.user_manager = UserManager()
         self.category_manager = CategoryManager()
         self.current_user_id = None
         self.recurring_transactions = None # Defer loading
 
     def _load_data_if_needed(self):
-        if self.recurring_transactions is None:
-            self.recurring_transactions = load_json(self.recurring_file)
+        # List dùng chung trong data store; đọc lại nếu dữ liệu trên đĩa bị thay đổi
+        self.recurring_transactions = self.store.acquire(self.collection, self)
 
     def set_current_user(self, user_id):
         """Thiết lập người dùng hiện tại
@@ -28,7 +38,16 @@ class RecurringTransactionManager:
         self.category_manager.set_current_user(user_id)
 
     def _save_data(self):
-        return save_json(self.recurring_file, self.recurring_transactions)
+        return self.store.save_all(self.collection, self.recurring_transactions)
+
+    def _save_item(self, item):
+        """Lưu một giao dịch định kỳ (backend SQLite chỉ ghi đúng một dòng)"""
+        return self.store.upsert(self.collection, item)
+
+    def _due_queue(self):
+        """Min-heap các mục đến hạn của mọi người dùng, được cập nhật sau mỗi lần ghi"""
+        self._load_data_if_needed()
+        return self.store.derived(self.collection, 'due_queue', RecurringDueQueue)
 
     def get_all(self, user_id=None, target_user_id=None, active_only=True):
         self._load_data_if_needed()
@@ -92,7 +111,7 @@ class RecurringTransactionManager:
         if end_date and not validate_date_format(end_date):
             return None, "Ngày kết thúc không đúng định dạng YYYY-MM-DD"
         
-        new_id = generate_id("rec", self.recurring_transactions)
+        new_id = self.store.next_id(self.collection, "rec")
         now = datetime.datetime.now().isoformat()
         start_date = start_date or now[:10]
         
@@ -115,7 +134,7 @@ class RecurringTransactionManager:
         }
         
         self.recurring_transactions.append(new_item)
-        if self._save_data():
+        if self._save_item(new_item):
             return new_id, new_item
         return None, "Lỗi khi lưu file"
 
@@ -131,7 +150,7 @@ class RecurringTransactionManager:
         if not recurring:
             return False, "Không tìm thấy giao dịch định kỳ hoặc không có quyền"
         
-        item_updated = False
+        item_updated = None
         for i, r_txn in enumerate(self.recurring_transactions):
             if r_txn.get("recurring_id") == recurring_id:
                 # Double check permission here, though get_by_id should have handled it
@@ -167,11 +186,11 @@ class RecurringTransactionManager:
                         # Recalculate next_date if relevant fields change, or if explicitly provided
                         r_txn["next_date"] = kwargs.get("next_date", self._next_date(r_txn.get("start_date"), r_txn.get("frequency")))
                     self.recurring_transactions[i] = r_txn
-                    item_updated = True # Mark that an update occurred in the broader list
+                    item_updated = r_txn # Mark that an update occurred in the broader list
                     break # Found and updated the item
         
         if item_updated:
-            if self._save_data():
+            if self._save_item(item_updated):
                 return True, "Cập nhật thành công"
             else:
                 # Potentially rollback or log error more thoroughly if save fails
@@ -192,8 +211,7 @@ class RecurringTransactionManager:
         if not item_to_delete:
             return False, "Không tìm thấy giao dịch định kỳ hoặc không có quyền"
         
-        self.recurring_transactions = [r for r in self.recurring_transactions if r.get("recurring_id") != recurring_id]
-        if self._save_data():
+        if self.store.delete(self.collection, recurring_id):
             return True, "Xóa thành công"
         return False, "Lỗi khi lưu file sau khi xóa"
 
@@ -225,15 +243,21 @@ class RecurringTransactionManager:
         if user_id is None:
             return []
             
-        today = datetime.datetime.now().isoformat()
+        # So sánh theo ngày: next_date lưu dạng YYYY-MM-DDTHH:MM:SS, end_date dạng YYYY-MM-DD
+        today = datetime.date.today().isoformat()
         data = self.get_all(user_id, user_id, active_only=True)
         return [
             r for r in data
-            if r.get("next_date") and r["next_date"] <= today
-            and (not r.get("end_date") or r["end_date"] > today)
+            if r.get("next_date") and r["next_date"][:10] <= today
+            and (not r.get("end_date") or r["next_date"][:10] <= r["end_date"][:10])
             and r.get("auto_create", True)
         ]
 
+    def next_due_date(self):
+        """Ngày đến hạn sớm nhất (YYYY-MM-DD) của mọi người dùng, None nếu không có"""
+        with self.store.lock:
+            return self._due_queue().next_due_date()
+
     def get_upcoming(self, user_id=None, days=7):
         self._load_data_if_needed()
         if user_id is None:
@@ -251,55 +275,78 @@ class RecurringTransactionManager:
         ]
         return sorted(upcoming, key=lambda r: r.get("next_date"))
 
-    def process_due(self):
-        # Ensure this method doesn't load data for all users if not intended.
-        # It should operate on a specific user context or be run by an admin for all.
-        # For now, assuming it uses current_user_id if set, or needs explicit user_id if run globally.
-        # The original get_due() call inside here implies it might be for the current_user_id context.
-        # If this is a system-wide process, it needs to iterate through users.
-        
-        # Clarification: get_due() internally uses self.current_user_id.
-        # If process_due is called without a user context, get_due() will return empty.
-        # This method should ideally be called within a user session or pass a user_id.
-        
-        self._load_data_if_needed() # Load data for the current context
+    def process_due(self, today=None):
+        """Tạo giao dịch cho mọi giao dịch định kỳ đến hạn của mọi người dùng trong một lượt
+
+        Các mục đến hạn được lấy từ min-heap theo next_date nên lượt chạy không phải duyệt
+        mọi mục. Mục bị lỡ nhiều kỳ (ứng dụng không chạy) được bù đủ các kỳ tới hôm nay.
+        Giao dịch, mục định kỳ và thông báo của cả lượt được ghi trong một batch.
+        Dùng từ process_recurring.py (chạy định kỳ/dịch vụ) hoặc timer của ứng dụng.
+
+        Args:
+            today (date, optional): Ngày xử lý (mặc định hôm nay)
 
+        Returns:
+            int: Số giao dịch đã tạo
+        """
         from finance_app.data_manager.transaction_manager import TransactionManager
         from finance_app.data_manager.notification_manager import NotificationManager
         
-        transaction_mgr = TransactionManager()
+        today = (today or datetime.date.today()).isoformat()
+        # Các manager dùng chung dữ liệu qua data store, chỉ cần chia sẻ category manager
+        transaction_mgr = TransactionManager(category_manager=self.category_manager)
         notification_mgr = NotificationManager()
-        due_items = self.get_due()
         count = 0
         
-        for item in due_items:
-            trans_id = transaction_mgr.add_transaction(
-                user_id=item["user_id"],
-                category_id=item["category_id"],
-                amount=item["amount"],
-                transaction_type=item["type"],
-                description=item.get("description", "") + " (Tự động)",
-                date=item["next_date"][:10],
-                tags=["recurring"]
-            )
-            
-            if trans_id:
-                self.update(
-                    item["user_id"],
-                    item["recurring_id"],
-                    next_date=self._next_date(item["next_date"], item["frequency"]),
-                    last_processed=datetime.datetime.now().isoformat()
-                )
-                success, message = notification_mgr.create_notification(
-                    user_id=item["user_id"],
-                    notification_type="recurring_reminder",
-                    title="Đã thực hiện giao dịch định kỳ",
-                    message=f"Giao dịch '{item['description']}' đã được xử lý.",
-                    priority="medium",
-                    data={"transaction_id": trans_id}
-                )
-                if success:
-                    count += 1
+        try:
+            with self.store.batch():
+                queue = self._due_queue()
+                for item in queue.pop_due(today):
+                    end_date = (item.get("end_date") or "")[:10]
+                    next_date = item["next_date"]
+                    created = []
+                    try:
+                        while (next_date and next_date[:10] <= today
+                               and (not end_date or next_date[:10] <= end_date)
+                               and len(created) < self.MAX_CATCH_UP_PER_RUN):
+                            created.append(transaction_mgr.add_transaction(
+                                user_id=item["user_id"],
+                                category_id=item["category_id"],
+                                amount=item["amount"],
+                                transaction_type=item["type"],
+                                description=item.get("description", "") + " (Tự động)",
+                                date=next_date[:10],
+                                tags=["recurring"]
+                            ))
+                            next_date = self._next_date(next_date, item["frequency"])
+                    except ValueError as e:
+                        # Dữ liệu không còn hợp lệ (vd: danh mục đã bị xóa): bỏ qua mục này
+                        logger.warning(f"Bỏ qua giao dịch định kỳ {item['recurring_id']}: {e}")
+                        if not created:
+                            queue.push(item)  # vẫn đến hạn, thử lại ở lượt sau
+                            continue
+                    
+                    now = datetime.datetime.now().isoformat()
+                    item["next_date"] = next_date
+                    item["last_processed"] = now
+                    item["updated_at"] = now
+                    self._save_item(item)
+                    
+                    message = f"Giao dịch '{item['description']}' đã được xử lý."
+                    if len(created) > 1:
+                        message += f" Đã bù {len(created)} kỳ bị lỡ."
+                    notification_mgr.create_notification(
+                        user_id=item["user_id"],
+                        notification_type="recurring_reminder",
+                        title="Đã thực hiện giao dịch định kỳ",
+                        message=message,
+                        priority="medium",
+                        data={"transaction_id": created[-1], "transaction_ids": created}
+                    )
+                    count += len(created)
+        except OSError:
+            logger.exception("Lỗi khi lưu giao dịch định kỳ")
+            return 0
         
         return count
 
@@ -313,7 +360,7 @@ class RecurringTransactionManager:
         if not user_id:
             return
         
-        self.recurring_transactions = [r for r in self.recurring_transactions if r.get("user_id") != user_id]
+        self.recurring_transactions[:] = [r for r in self.recurring_transactions if r.get("user_id") != user_id]
         if self._save_data():
             print(f"Đã xóa tất cả giao dịch định kỳ của người dùng: {user_id}")
             return True
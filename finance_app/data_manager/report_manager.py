@@ -10,9 +10,9 @@ from finance_app.data_manager.user_manager import UserManager
 
 class ReportManager:
     def __init__(self):
-        self.transaction_manager = TransactionManager()
-        self.budget_manager = BudgetManager()
         self.category_manager = CategoryManager()
+        self.transaction_manager = TransactionManager(category_manager=self.category_manager)
+        self.budget_manager = BudgetManager()
         self.user_manager = UserManager()
         self.current_user_id = None
         self.reports = []
@@ -44,10 +44,11 @@ class ReportManager:
                 'end_date': end_date
             }
             
-        transactions = self.transaction_manager.get_transactions_by_date_range(user_id, start_date, end_date)
+        # Lấy từ bảng tổng hợp giao dịch thay vì duyệt từng giao dịch
+        summary = self.transaction_manager.get_transaction_summary(user_id, start_date, end_date)
         
-        total_income = sum(txn['amount'] for txn in transactions if txn['type'] == 'income')
-        total_expense = sum(txn['amount'] for txn in transactions if txn['type'] == 'expense')
+        total_income = summary['total_income']
+        total_expense = summary['total_expense']
         balance = total_income - total_expense
 
         return {
@@ -78,12 +79,17 @@ class ReportManager:
             raise ValueError("report_type phải là 'income' hoặc 'expense'.")
 
         transactions = self.transaction_manager.get_transactions_by_date_range(user_id, start_date, end_date)
-        category_breakdown = defaultdict(float)
-        
+        amounts_by_category = defaultdict(float)
         for txn in transactions:
             if txn['type'] == report_type:
-                category_name = self.category_manager.get_category_name(txn['category_id'])
-                category_breakdown[category_name] += txn['amount']
+                amounts_by_category[txn['category_id']] += txn['amount']
+
+        # Ghép với danh mục một lần cho mỗi category thay vì mỗi giao dịch
+        categories = self.category_manager.resolve_categories(amounts_by_category)
+        category_breakdown = defaultdict(float)
+        for category_id, amount in amounts_by_category.items():
+            category = categories.get(category_id)
+            category_breakdown[category.get('name', 'Unknown') if category else 'Unknown'] += amount
         
         sorted_breakdown = sorted(category_breakdown.items(), key=lambda item: item[1], reverse=True)
         return {
@@ -225,7 +231,7 @@ class ReportManager:
 
         if file_format == 'json':
             file_name = f"reports/{report_type}_report_{user_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-            if save_json(file_name, report_data):
+            if save_json(file_name, report_data, compact=False):
                 return True, f"Báo cáo đã được xuất thành công tới {file_name}"
             return False, "Lỗi khi lưu báo cáo."
         else:
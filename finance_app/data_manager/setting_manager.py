@@ -1,7 +1,9 @@
 # setting_manager.py
 
-from finance_app.utils.file_helper import load_json, save_json, generate_id, get_current_datetime
+from finance_app.utils.file_helper import get_current_datetime
 from finance_app.data_manager.user_manager import UserManager
+from finance_app.data_manager.storage import collection_name
+from finance_app.data_manager.data_store import get_data_store
 
 class SettingManager:
     def __init__(self, file_path='settings.json'):
@@ -12,14 +14,19 @@ class SettingManager:
         # Create data directory if it doesn't exist
         os.makedirs(data_dir, exist_ok=True)
         self.file_path = os.path.join(data_dir, file_path)
+        self.store = get_data_store(data_dir)
+        self.collection = collection_name(file_path)
         self.settings = None # Defer loading
         self.user_manager = UserManager()
         self.current_user_id = None
         # self.load_settings() # Removed eager loading
 
     def _load_data_if_needed(self):
+        # List dùng chung trong data store; chỉ kiểm tra settings mặc định ở lần đầu
         if self.settings is None:
             self.settings = self.load_settings_internal()
+        else:
+            self.settings = self.store.acquire(self.collection, self)
 
     def set_current_user(self, user_id):
         """Thiết lập người dùng hiện tại
@@ -30,39 +37,40 @@ class SettingManager:
 
     def load_settings_internal(self):
         """Tải danh sách settings từ file, đảm bảo mỗi user có settings mặc định."""
-        try:
-            settings_data = load_json(self.file_path)
-        except FileNotFoundError:
-            settings_data = []
-            save_json(self.file_path, settings_data) # Save empty list if file not found
+        settings_data = self.store.acquire(self.collection, self)
             
         # Ensure all active users have a settings entry
         active_users = self.user_manager.get_all_users(active_only=True)
         # Create a dictionary for faster lookup of existing settings
         user_settings_map = {s['user_id']: s for s in settings_data}
         
-        updated = False
+        created = []
         for user in active_users:
             user_id = user['user_id']
             if user_id not in user_settings_map:
                 default_setting = self._get_default_settings(user_id)
                 settings_data.append(default_setting)
                 user_settings_map[user_id] = default_setting # Add to map as well
-                updated = True
+                created.append(default_setting)
         
-        if updated:
-            save_json(self.file_path, settings_data)
+        if created:
+            self.store.upsert_many(self.collection, created)
         return settings_data
 
     def save_settings(self):
         """Lưu danh sách settings vào file."""
         self._load_data_if_needed() # Ensure settings are loaded
-        return save_json(self.file_path, self.settings)
+        return self.store.save_all(self.collection, self.settings)
 
-    def _get_default_settings(self, user_id):
+    def _save_setting(self, setting):
+        """Lưu cài đặt của một người dùng (backend SQLite chỉ ghi đúng một dòng)"""
+        self._load_data_if_needed()
+        return self.store.upsert(self.collection, setting)
+
+    def _get_default_settings(self, user_id, setting_id=None):
         """Trả về cài đặt mặc định cho người dùng mới."""
         return {
-            'setting_id': generate_id('setting', self.settings),
+            'setting_id': setting_id or self.store.next_id(self.collection, 'setting'),
             'user_id': user_id,
             'currency': 'VND',
             'notification_enabled': True,
@@ -99,7 +107,7 @@ class SettingManager:
         # If settings not found for a specific user_id, create, save, and return default
         default_settings = self._get_default_settings(user_id)
         self.settings.append(default_settings)
-        self.save_settings() # Save if new default is added
+        self._save_setting(default_settings) # Save if new default is added
         return default_settings
 
     def get_setting(self, key, user_id=None, default=None):
@@ -123,7 +131,7 @@ class SettingManager:
                 setting[key] = value
                 setting['updated_at'] = get_current_datetime()
                 self.settings[i] = setting
-                self.save_settings()
+                self._save_setting(setting)
                 return True
         return False
 
@@ -136,11 +144,12 @@ class SettingManager:
         if user_id is None:
             return False
             
-        default_settings = self._get_default_settings(user_id)
         for i, setting in enumerate(self.settings):
             if setting['user_id'] == user_id:
+                # Keep the row identity
+                default_settings = self._get_default_settings(user_id, setting['setting_id'])
                 self.settings[i] = default_settings
-                self.save_settings()
+                self._save_setting(default_settings)
                 return True
         return False
 
@@ -0,0 +1,655 @@
+# storage.py
+
+import os
+import re
+import json
+import sqlite3
+import logging
+import threading
+from finance_app.utils.file_helper import load_json, save_json, get_data_dir, load_config
+
+logger = logging.getLogger(__name__)
+
+# Mô tả các collection: khóa chính và trường ngày dùng để đánh chỉ mục
+COLLECTIONS = {
+    'users': {'id_key': 'user_id', 'date_key': None},
+    'transactions': {'id_key': 'transaction_id', 'date_key': 'date'},
+    'budgets': {'id_key': 'budget_id', 'date_key': 'start_date'},
+    'budget_change_history': {'id_key': 'history_id', 'date_key': 'changed_at'},
+    'categories': {'id_key': 'category_id', 'date_key': None},
+    'notifications': {'id_key': 'notification_id', 'date_key': 'created_at'},
+    'recurring_transactions': {'id_key': 'recurring_id', 'date_key': 'next_date'},
+    'settings': {'id_key': 'setting_id', 'date_key': None},
+    'sequences': {'id_key': 'sequence_id', 'date_key': None},
+}
+
+# Collection luôn chạy ở chế độ journal với backend JSON: bộ đếm ID được ghi sau mỗi lần
+# thêm bản ghi, ghi lại cả file mỗi lần sẽ mất lợi ích của journal
+ALWAYS_JOURNALED = ('sequences',)
+
+_COLLECTION_NAME_RE = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+
+def collection_name(file_name):
+    """Chuyển tên file dữ liệu (vd: 'transactions.json') thành tên collection"""
+    return os.path.splitext(os.path.basename(file_name))[0]
+
+
+def get_id_key(collection, record=None):
+    """Lấy tên khóa chính của collection (fallback: key đầu tiên kết thúc bằng _id)"""
+    spec = COLLECTIONS.get(collection)
+    if spec:
+        return spec['id_key']
+    if record:
+        return next((key for key in record.keys() if key.endswith('_id')), None)
+    return None
+
+
+def get_date_key(collection):
+    spec = COLLECTIONS.get(collection)
+    return spec['date_key'] if spec else None
+
+
+class StorageBackend:
+    """Giao diện chung cho các backend lưu trữ.
+
+    Các manager vẫn giữ danh sách bản ghi trong bộ nhớ; backend chỉ chịu trách nhiệm
+    lưu bền vững. Tham số `records` của các hàm ghi là danh sách hiện tại trong bộ nhớ,
+    dùng cho backend chỉ có thể ghi lại toàn bộ file (JSON).
+    """
+
+    def load(self, collection):
+        """Tải toàn bộ bản ghi của collection"""
+        raise NotImplementedError
+
+    def save_all(self, collection, records):
+        """Ghi đè toàn bộ collection"""
+        raise NotImplementedError
+
+    def upsert(self, collection, record, records=None):
+        """Thêm mới hoặc cập nhật một bản ghi"""
+        raise NotImplementedError
+
+    def upsert_many(self, collection, changed, records=None):
+        """Thêm mới hoặc cập nhật nhiều bản ghi trong một lần ghi"""
+        raise NotImplementedError
+
+    def delete(self, collection, record_id, records=None):
+        """Xóa một bản ghi theo ID"""
+        raise NotImplementedError
+
+    # True nếu query() dùng chỉ mục của backend thay vì đọc cả collection
+    indexed_queries = False
+
+    def query(self, collection, user_id=None, category_id=None, start_date=None, end_date=None,
+              active_only=False):
+        """Lọc bản ghi theo user_id, category_id và khoảng ngày (YYYY-MM-DD), sắp xếp theo ngày
+
+        Args:
+            active_only (bool): Bỏ bản ghi đã xóa mềm (is_active = False)
+        """
+        raise NotImplementedError
+
+    def compact(self, collection, records=None):
+        """Gộp các thay đổi đang chờ vào dữ liệu chính (no-op nếu backend không có journal)"""
+        return True
+
+    def apply_batch(self, changes):
+        """Ghi thay đổi của một batch, mỗi collection một lần
+
+        Args:
+            changes (dict): collection -> {'records': list hiện tại trong bộ nhớ,
+                'replace': True nếu cần ghi lại toàn bộ, 'upserts': [bản ghi], 'deletes': [record_id]}
+
+        Mặc định ghi lần lượt từng collection; backend ghi được nguyên tử nhiều collection
+        (SQLite, JSON có redo log) ghi đè hàm này.
+        """
+        ok = True
+        for collection, change in changes.items():
+            if change['replace']:
+                ok = self.save_all(collection, change['records']) and ok
+                continue
+            for record_id in change['deletes']:
+                ok = self.delete(collection, record_id, change['records']) and ok
+            if change['upserts']:
+                ok = self.upsert_many(collection, change['upserts'], change['records']) and ok
+        return ok
+
+    def stamp(self, collection):
+        """Dấu hiệu phiên bản dữ liệu trên đĩa; thay đổi khi tiến trình khác ghi vào collection"""
+        return None
+
+    def close(self):
+        pass
+
+
+def _apply_changes(collection, records, changed):
+    """Áp dụng danh sách bản ghi thay đổi vào records theo khóa chính"""
+    id_key = get_id_key(collection, changed[0] if changed else None)
+    positions = {r.get(id_key): i for i, r in enumerate(records)}
+    for record in changed:
+        pos = positions.get(record.get(id_key))
+        if pos is None:
+            positions[record.get(id_key)] = len(records)
+            records.append(record)
+        else:
+            records[pos] = record
+    return records
+
+
+class JsonStorage(StorageBackend):
+    """Backend mặc định: mỗi collection là một file JSON trong thư mục data.
+
+    Các collection được khai báo trong `journaled` chạy ở chế độ journal: mỗi thay đổi được
+    ghi nối vào `<collection>.journal` (một dòng JSON gọn), file snapshot `<collection>.json`
+    chỉ được ghi lại khi compact. Khi tải, snapshot được đọc rồi phát lại phần đuôi journal.
+
+    Một batch nhiều collection được ghi trước vào redo log `_batch.journal` (kết thúc bằng dòng
+    commit) rồi mới ghi vào từng file; nếu ứng dụng dừng hoặc ghi lỗi giữa chừng, batch đã
+    commit được ghi nốt trước lần đọc/ghi kế tiếp, batch chưa commit bị bỏ.
+    """
+
+    BATCH_LOG = '_batch.journal'
+
+    def __init__(self, data_dir, journaled=(), compact_threshold=1000):
+        self.data_dir = data_dir
+        self.journaled = set(journaled)
+        self.compact_threshold = compact_threshold
+        self._journal_counts = {}
+        self._lock = threading.RLock()
+        self._writing_batch = False
+        self._finish_pending_batch()
+
+    def _path(self, collection):
+        return os.path.join(self.data_dir, f"{collection}.json")
+
+    def _journal_path(self, collection):
+        return os.path.join(self.data_dir, f"{collection}.journal")
+
+    def load(self, collection):
+        with self._lock:
+            self._finish_pending_batch()
+            data = load_json(self._path(collection))
+            records = data if isinstance(data, list) else []
+            if collection in self.journaled:
+                records = self._replay_journal(collection, records)
+                if self._journal_counts.get(collection, 0) >= self.compact_threshold:
+                    self.compact(collection, records)
+            return records
+
+    def _replay_journal(self, collection, records):
+        """Phát lại journal lên snapshot; bỏ qua dòng cuối bị ghi dở khi crash"""
+        journal_path = self._journal_path(collection)
+        count = 0
+        if os.path.exists(journal_path):
+            id_key = get_id_key(collection)
+            # Dict giữ thứ tự chèn nên thứ tự bản ghi giống như khi ghi thẳng vào snapshot
+            by_id = {r.get(id_key or get_id_key(collection, r)): r for r in records}
+            with open(journal_path, 'r', encoding='utf-8') as journal:
+                for line in journal:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        logger.warning(f"Bỏ qua dòng journal hỏng trong {journal_path}")
+                        continue
+                    if entry.get('op') == 'delete':
+                        by_id.pop(entry.get('id'), None)
+                    elif entry.get('op') == 'upsert':
+                        record = entry['record']
+                        by_id[record.get(id_key or get_id_key(collection, record))] = record
+                    count += 1
+            records = list(by_id.values())
+        self._journal_counts[collection] = count
+        return records
+
+    def _append_journal(self, collection, entries, records=None):
+        try:
+            with self._lock:
+                if records is not None and \
+                        self._journal_counts.get(collection, 0) + len(entries) >= self.compact_threshold:
+                    # Lô ghi lớn sẽ kích hoạt compact ngay: ghi thẳng snapshot, không ghi journal trước
+                    return self.compact(collection, records)
+                journal_path = self._journal_path(collection)
+                # Dòng cuối bị ghi dở (crash giữa chừng) phải được kết thúc trước khi ghi tiếp
+                prefix = ''
+                if os.path.exists(journal_path) and os.path.getsize(journal_path) > 0:
+                    with open(journal_path, 'rb') as tail:
+                        tail.seek(-1, os.SEEK_END)
+                        if tail.read(1) != b'\n':
+                            prefix = '\n'
+                with open(journal_path, 'a', encoding='utf-8') as journal:
+                    journal.write(prefix + ''.join(
+                        json.dumps(entry, ensure_ascii=False, separators=(',', ':')) + '\n'
+                        for entry in entries
+                    ))
+                    journal.flush()
+                    os.fsync(journal.fileno())
+                count = self._journal_counts.get(collection, 0) + len(entries)
+                self._journal_counts[collection] = count
+                if count >= self.compact_threshold:
+                    self.compact(collection, records)
+            return True
+        except OSError as e:
+            logger.error(f"Lỗi khi ghi journal {collection}: {e}")
+            return False
+
+    def compact(self, collection, records=None):
+        """Gộp journal vào file snapshot rồi xóa journal"""
+        if collection not in self.journaled:
+            return True
+        with self._lock:
+            if records is None:
+                records = self.load(collection)
+            if not save_json(self._path(collection), records):
+                return False
+            journal_path = self._journal_path(collection)
+            if os.path.exists(journal_path):
+                os.remove(journal_path)
+            self._journal_counts[collection] = 0
+            logger.debug(f"Đã compact journal của {collection} ({len(records)} bản ghi)")
+            return True
+
+    def _batch_log_path(self):
+        return os.path.join(self.data_dir, self.BATCH_LOG)
+
+    def apply_batch(self, changes):
+        with self._lock:
+            log_path = self._batch_log_path()
+            if not self._finish_pending_batch():
+                return False
+            try:
+                lines = []
+                for collection, change in changes.items():
+                    if change['replace']:
+                        lines.append({'collection': collection, 'op': 'replace', 'records': change['records']})
+                        continue
+                    lines.extend({'collection': collection, 'op': 'delete', 'id': record_id}
+                                 for record_id in change['deletes'])
+                    lines.extend({'collection': collection, 'op': 'upsert', 'record': record}
+                                 for record in change['upserts'])
+                lines.append({'op': 'commit'})
+                with open(log_path, 'w', encoding='utf-8') as log:
+                    log.write(''.join(
+                        json.dumps(line, ensure_ascii=False, separators=(',', ':')) + '\n' for line in lines
+                    ))
+                    log.flush()
+                    os.fsync(log.fileno())
+            except OSError as e:
+                logger.error(f"Lỗi khi ghi redo log của batch: {e}")
+                if os.path.exists(log_path):
+                    os.remove(log_path)
+                return False
+
+            # Batch đã bền vững; lỗi từ đây được redo log sửa ở lần đọc/ghi batch kế tiếp
+            ok = True
+            self._writing_batch = True
+            try:
+                for collection, change in changes.items():
+                    if change['replace'] or collection not in self.journaled:
+                        ok = self.save_all(collection, change['records']) and ok
+                    else:
+                        entries = [{'op': 'delete', 'id': record_id} for record_id in change['deletes']]
+                        entries += [{'op': 'upsert', 'record': record} for record in change['upserts']]
+                        ok = self._append_journal(collection, entries, change['records']) and ok
+            finally:
+                self._writing_batch = False
+            if ok:
+                os.remove(log_path)
+            else:
+                logger.error("Batch chưa ghi hết vào các file, sẽ được ghi nốt từ redo log")
+            return True
+
+    def _finish_pending_batch(self):
+        """Ghi nốt batch đã commit còn trong redo log trước mọi lần đọc/ghi khác
+
+        Ghi tiếp khi redo log còn đó sẽ bị batch cũ ghi đè lúc phát lại (hoặc ghi đè chính
+        redo log), nên khi chưa ghi nốt được thì các lần ghi trả về False.
+        """
+        if self._writing_batch or not os.path.exists(self._batch_log_path()):
+            return True
+        self._writing_batch = True
+        try:
+            if self._recover_batch():
+                return True
+            logger.error("Batch trước vẫn chưa ghi xong vào các file, từ chối ghi mới")
+            return False
+        finally:
+            self._writing_batch = False
+
+    def _recover_batch(self):
+        """Ghi nốt batch đã commit còn trong redo log (ứng dụng dừng hoặc lỗi khi đang ghi các file)
+
+        Returns:
+            bool: True nếu không còn redo log nào chờ ghi
+        """
+        log_path = self._batch_log_path()
+        if not os.path.exists(log_path):
+            return True
+        operations = []
+        committed = False
+        with open(log_path, 'r', encoding='utf-8') as log:
+            for line in log:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    break
+                if entry.get('op') == 'commit':
+                    committed = True
+                    break
+                operations.append(entry)
+        if committed:
+            grouped = {}
+            for entry in operations:
+                grouped.setdefault(entry['collection'], []).append(entry)
+            for collection, entries in grouped.items():
+                id_key = get_id_key(collection)
+                by_id = {r.get(id_key or get_id_key(collection, r)): r for r in self.load(collection)}
+                for entry in entries:
+                    if entry['op'] == 'replace':
+                        by_id = {r.get(id_key or get_id_key(collection, r)): r for r in entry['records']}
+                    elif entry['op'] == 'delete':
+                        by_id.pop(entry['id'], None)
+                    elif entry['op'] == 'upsert':
+                        record = entry['record']
+                        by_id[record.get(id_key or get_id_key(collection, record))] = record
+                if not self.save_all(collection, list(by_id.values())):
+                    # Giữ redo log để thử lại ở lần đọc/ghi sau
+                    logger.error(f"Không thể ghi nốt batch vào {collection}")
+                    return False
+            logger.info(f"Đã ghi nốt batch còn dở cho {', '.join(grouped)}")
+        else:
+            logger.warning("Bỏ batch chưa commit trong redo log")
+        os.remove(log_path)
+        return True
+
+    def stamp(self, collection):
+        result = []
+        for path in (self._path(collection), self._journal_path(collection)):
+            try:
+                st = os.stat(path)
+                result.append((st.st_mtime_ns, st.st_size))
+            except OSError:
+                result.append(None)
+        return tuple(result)
+
+    def close(self):
+        for collection in self.journaled:
+            if os.path.exists(self._journal_path(collection)):
+                self.compact(collection)
+
+    def save_all(self, collection, records):
+        if not self._finish_pending_batch():
+            return False
+        if collection in self.journaled:
+            return self.compact(collection, records)
+        return save_json(self._path(collection), records)
+
+    def upsert(self, collection, record, records=None):
+        return self.upsert_many(collection, [record], records)
+
+    def upsert_many(self, collection, changed, records=None):
+        if not self._finish_pending_batch():
+            return False
+        if collection in self.journaled:
+            return self._append_journal(
+                collection, [{'op': 'upsert', 'record': record} for record in changed], records
+            )
+        if records is None:
+            records = _apply_changes(collection, self.load(collection), changed)
+        # File JSON không hỗ trợ ghi từng dòng: ghi lại toàn bộ danh sách
+        return self.save_all(collection, records)
+
+    def delete(self, collection, record_id, records=None):
+        if not self._finish_pending_batch():
+            return False
+        if collection in self.journaled:
+            return self._append_journal(collection, [{'op': 'delete', 'id': record_id}], records)
+        if records is None:
+            id_key = get_id_key(collection)
+            records = [r for r in self.load(collection)
+                       if r.get(id_key or get_id_key(collection, r)) != record_id]
+        return self.save_all(collection, records)
+
+    def query(self, collection, user_id=None, category_id=None, start_date=None, end_date=None,
+              active_only=False):
+        date_key = get_date_key(collection)
+        result = []
+        for record in self.load(collection):
+            if active_only and not record.get('is_active', True):
+                continue
+            if user_id is not None and record.get('user_id') != user_id:
+                continue
+            if category_id is not None and record.get('category_id') != category_id:
+                continue
+            if date_key and (start_date or end_date):
+                date_value = (record.get(date_key) or '')[:10]
+                if start_date and date_value < start_date:
+                    continue
+                if end_date and date_value > end_date:
+                    continue
+            result.append(record)
+        if date_key:
+            result.sort(key=lambda record: (record.get(date_key) or '')[:10])
+        return result
+
+
+class SqliteStorage(StorageBackend):
+    """Backend SQLite nhúng.
+
+    Mỗi collection là một bảng (id, user_id, date, category_id, data) với chỉ mục trên
+    user_id, date và category_id; bản ghi gốc được lưu dạng JSON ở cột data.
+    Ghi một bản ghi chỉ chạm tới một dòng, không phụ thuộc kích thước dữ liệu; đọc lọc theo
+    người dùng/ngày/danh mục qua query() chỉ đọc các dòng khớp.
+    """
+
+    indexed_queries = True
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._tables = set()
+
+    def _table(self, collection):
+        if not _COLLECTION_NAME_RE.match(collection):
+            raise ValueError(f"Tên collection không hợp lệ: {collection}")
+        if collection not in self._tables:
+            with self._lock, self._conn:
+                self._conn.execute(
+                    f'CREATE TABLE IF NOT EXISTS "{collection}" ('
+                    'id TEXT PRIMARY KEY, user_id TEXT, date TEXT, category_id TEXT, data TEXT NOT NULL)'
+                )
+                self._conn.execute(
+                    f'CREATE INDEX IF NOT EXISTS "idx_{collection}_user_date" ON "{collection}" (user_id, date)'
+                )
+                self._conn.execute(
+                    f'CREATE INDEX IF NOT EXISTS "idx_{collection}_date" ON "{collection}" (date)'
+                )
+                self._conn.execute(
+                    f'CREATE INDEX IF NOT EXISTS "idx_{collection}_category" ON "{collection}" (category_id, date)'
+                )
+            self._tables.add(collection)
+        return collection
+
+    def _row(self, collection, record):
+        id_key = get_id_key(collection, record)
+        date_key = get_date_key(collection)
+        date_value = record.get(date_key) if date_key else None
+        return (
+            str(record.get(id_key)),
+            record.get('user_id'),
+            date_value[:10] if isinstance(date_value, str) else None,
+            record.get('category_id'),
+            json.dumps(record, ensure_ascii=False),
+        )
+
+    def _upsert_sql(self, table):
+        return (
+            f'INSERT INTO "{table}" (id, user_id, date, category_id, data) VALUES (?, ?, ?, ?, ?) '
+            'ON CONFLICT(id) DO UPDATE SET user_id=excluded.user_id, date=excluded.date, '
+            'category_id=excluded.category_id, data=excluded.data'
+        )
+
+    def load(self, collection):
+        table = self._table(collection)
+        with self._lock:
+            rows = self._conn.execute(f'SELECT data FROM "{table}" ORDER BY rowid').fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def save_all(self, collection, records):
+        table = self._table(collection)
+        try:
+            with self._lock, self._conn:
+                self._conn.execute(f'DELETE FROM "{table}"')
+                self._conn.executemany(self._upsert_sql(table),
+                                       [self._row(collection, r) for r in records])
+            return True
+        except sqlite3.Error as e:
+            logger.error(f"Lỗi khi lưu collection {collection} vào SQLite: {e}")
+            return False
+
+    def upsert(self, collection, record, records=None):
+        return self.upsert_many(collection, [record])
+
+    def upsert_many(self, collection, changed, records=None):
+        table = self._table(collection)
+        try:
+            with self._lock, self._conn:
+                self._conn.executemany(self._upsert_sql(table),
+                                       [self._row(collection, r) for r in changed])
+            return True
+        except sqlite3.Error as e:
+            logger.error(f"Lỗi khi ghi bản ghi vào {collection}: {e}")
+            return False
+
+    def apply_batch(self, changes):
+        # Tạo bảng trước: _table() tự commit nên không được gọi bên trong transaction
+        tables = {collection: self._table(collection) for collection in changes}
+        try:
+            # Một transaction cho cả batch: hoặc ghi tất cả, hoặc không ghi gì
+            with self._lock, self._conn:
+                for collection, change in changes.items():
+                    table = tables[collection]
+                    if change['replace']:
+                        self._conn.execute(f'DELETE FROM "{table}"')
+                        rows = change['records']
+                    else:
+                        self._conn.executemany(f'DELETE FROM "{table}" WHERE id = ?',
+                                               [(str(record_id),) for record_id in change['deletes']])
+                        rows = change['upserts']
+                    self._conn.executemany(self._upsert_sql(table), [self._row(collection, r) for r in rows])
+            return True
+        except sqlite3.Error as e:
+            logger.error(f"Lỗi khi ghi batch vào SQLite: {e}")
+            return False
+
+    def delete(self, collection, record_id, records=None):
+        table = self._table(collection)
+        try:
+            with self._lock, self._conn:
+                self._conn.execute(f'DELETE FROM "{table}" WHERE id = ?', (str(record_id),))
+            return True
+        except sqlite3.Error as e:
+            logger.error(f"Lỗi khi xóa bản ghi {record_id} khỏi {collection}: {e}")
+            return False
+
+    def query(self, collection, user_id=None, category_id=None, start_date=None, end_date=None,
+              active_only=False):
+        table = self._table(collection)
+        conditions, params = [], []
+        if user_id is not None:
+            conditions.append('user_id = ?')
+            params.append(user_id)
+        if category_id is not None:
+            conditions.append('category_id = ?')
+            params.append(category_id)
+        if start_date:
+            conditions.append('date >= ?')
+            params.append(start_date)
+        if end_date:
+            conditions.append('date <= ?')
+            params.append(end_date)
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ''
+        with self._lock:
+            rows = self._conn.execute(
+                f'SELECT data FROM "{table}"{where} ORDER BY date, rowid', params
+            ).fetchall()
+        records = [json.loads(row[0]) for row in rows]
+        if active_only:
+            # Trạng thái xóa mềm chỉ nằm trong JSON; các cột chỉ mục đã thu hẹp về đúng người dùng/ngày
+            records = [record for record in records if record.get('is_active', True)]
+        return records
+
+    def stamp(self, collection):
+        # data_version chỉ thay đổi khi kết nối khác commit vào database
+        with self._lock:
+            return self._conn.execute('PRAGMA data_version').fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_storages = {}
+_storages_lock = threading.Lock()
+
+
+def get_storage(data_dir=None):
+    """Trả về backend lưu trữ (dùng chung trong tiến trình) cho thư mục data.
+
+    Loại backend được chọn bằng mục "database" trong config.json:
+    {"type": "json"} (mặc định) hoặc {"type": "sqlite", "sqlite_file": "finance.db"}.
+    Với backend JSON, "journal" liệt kê các collection chạy ở chế độ journal và
+    "journal_compact_threshold" là số dòng journal tối đa trước khi tự động compact.
+    """
+    data_dir = os.path.abspath(str(data_dir or get_data_dir()))
+    with _storages_lock:
+        storage = _storages.get(data_dir)
+        if storage is None:
+            db_config = load_config('database', data_dir)
+            if db_config.get('type') == 'sqlite':
+                db_file = db_config.get('sqlite_file', 'finance.db')
+                storage = SqliteStorage(os.path.join(data_dir, db_file))
+            else:
+                storage = JsonStorage(
+                    data_dir,
+                    journaled=set(db_config.get('journal', [])) | set(ALWAYS_JOURNALED),
+                    compact_threshold=db_config.get('journal_compact_threshold', 1000)
+                )
+            _storages[data_dir] = storage
+        return storage
+
+
+def migrate_json_to_sqlite(data_dir=None, db_path=None):
+    """Chuyển toàn bộ dữ liệu từ các file data/*.json sang SQLite (chạy một lần).
+
+    Returns:
+        dict: {tên collection: số bản ghi đã chuyển}
+    """
+    data_dir = str(data_dir or get_data_dir())
+    db_file = load_config('database', data_dir).get('sqlite_file', 'finance.db')
+    target = SqliteStorage(db_path or os.path.join(data_dir, db_file))
+    source = get_storage(data_dir)
+    migrated = {}
+    try:
+        for file_name in sorted(os.listdir(data_dir)):
+            if not file_name.endswith('.json') or file_name == 'config.json':
+                continue
+            collection = collection_name(file_name)
+            if not _COLLECTION_NAME_RE.match(collection):
+                continue
+            if not isinstance(load_json(os.path.join(data_dir, file_name)), list):
+                logger.warning(f"Bỏ qua {file_name}: không phải danh sách bản ghi")
+                continue
+            records = source.load(collection) if isinstance(source, JsonStorage) \
+                else JsonStorage(data_dir).load(collection)
+            if not target.save_all(collection, records):
+                raise RuntimeError(f"Không thể chuyển {file_name} sang SQLite")
+            migrated[collection] = len(records)
+            logger.info(f"Đã chuyển {len(records)} bản ghi từ {file_name}")
+    finally:
+        target.close()
+    return migrated
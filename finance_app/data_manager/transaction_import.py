@@ -0,0 +1,103 @@
+# transaction_import.py
+
+import csv
+import json
+import math
+import os
+import re
+from datetime import date, datetime
+
+# Tên cột chấp nhận khi nhập (không phân biệt hoa thường), gồm cả tiêu đề của file xuất CSV
+COLUMN_ALIASES = {
+    'date': 'date', 'ngày': 'date',
+    'type': 'type', 'loại': 'type',
+    'amount': 'amount', 'số tiền': 'amount',
+    'category_id': 'category_id',
+    'category': 'category', 'category_name': 'category', 'danh mục': 'category',
+    'description': 'description', 'note': 'description', 'ghi chú': 'description', 'mô tả': 'description',
+    'tags': 'tags',
+    'location': 'location',
+}
+
+TYPE_ALIASES = {
+    'income': 'income', 'thu nhập': 'income', 'thu': 'income',
+    'expense': 'expense', 'chi tiêu': 'expense', 'chi': 'expense',
+}
+
+DATE_FORMATS = ('%d/%m/%Y', '%d-%m-%Y')
+
+# Số có dấu phân cách hàng nghìn: 150.000 hoặc 1,250,000
+THOUSANDS_PATTERN = re.compile(r'^\d{1,3}([.,])\d{3}(\1\d{3})*$')
+
+
+def read_import_rows(file_path):
+    """Đọc các dòng giao dịch từ file CSV hoặc JSON thành list dict với tên cột chuẩn
+
+    JSON có thể là một list giao dịch hoặc {"transactions": [...]}.
+    """
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension == '.json':
+        with open(file_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            data = data.get('transactions', [])
+        if not isinstance(data, list):
+            raise ValueError("File JSON phải chứa danh sách giao dịch")
+        return [_normalize_row(row) if isinstance(row, dict) else {} for row in data]
+    # utf-8-sig: bỏ BOM nếu file được lưu từ Excel
+    with open(file_path, 'r', encoding='utf-8-sig', newline='') as f:
+        return [_normalize_row(row) for row in csv.DictReader(f)]
+
+
+def _normalize_row(row):
+    normalized = {}
+    for key, value in row.items():
+        column = COLUMN_ALIASES.get(str(key or '').strip().lower())
+        if column and column not in normalized:
+            normalized[column] = value.strip() if isinstance(value, str) else value
+    return normalized
+
+
+def parse_amount(value):
+    """Số tiền từ số hoặc chuỗi như "150000", "150000.5", "150.000đ", "1,250,000"; None nếu không hợp lệ"""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        amount = value
+    else:
+        text = str(value or '').replace('đ', '').replace(' ', '').strip()
+        if THOUSANDS_PATTERN.match(text):
+            text = re.sub(r'[.,]', '', text)
+        try:
+            amount = float(text)
+        except ValueError:
+            return None
+    if not math.isfinite(amount):
+        return None
+    return int(amount) if float(amount).is_integer() else amount
+
+
+def parse_type(value):
+    return TYPE_ALIASES.get(str(value or '').strip().lower())
+
+
+def parse_date(value):
+    """Ngày dạng YYYY-MM-DD từ các định dạng thường gặp; None nếu không hợp lệ"""
+    text = str(value or '').strip()[:10]
+    try:
+        # Định dạng chuẩn (file xuất của ứng dụng): kiểm tra nhanh hơn nhiều so với strptime
+        return date.fromisoformat(text).isoformat()
+    except ValueError:
+        pass
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, date_format).strftime('%Y-%m-%d')
+        except ValueError:
+            continue
+    return None
+
+
+def parse_tags(value):
+    if isinstance(value, list):
+        return value
+    return [tag.strip() for tag in str(value or '').split(',') if tag.strip()]
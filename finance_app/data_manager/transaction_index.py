@@ -0,0 +1,194 @@
+# transaction_index.py
+
+from bisect import bisect_left, bisect_right, insort
+
+
+class TransactionIndex:
+    """Chỉ mục giao dịch trong bộ nhớ, được data store cập nhật tăng dần sau mỗi lần ghi.
+
+    - by_id: transaction_id -> giao dịch (kể cả giao dịch đã xóa mềm)
+    - theo người dùng: danh sách giao dịch còn hiệu lực, sắp xếp theo ngày
+    - theo (người dùng, danh mục): nhóm giao dịch còn hiệu lực
+    """
+
+    def __init__(self, transactions):
+        self.by_id = {}
+        self._by_user = {}           # user_id -> (danh sách ngày, danh sách giao dịch) cùng thứ tự
+        self._by_user_category = {}  # (user_id, category_id) -> {transaction_id: giao dịch}
+        self._positions = {}         # transaction_id -> (user_id, ngày, category_id) đang được đánh chỉ mục
+
+        grouped = {}
+        for txn in transactions:
+            txn_id = txn.get('transaction_id')
+            if txn_id in self.by_id:
+                continue
+            self.by_id[txn_id] = txn
+            if txn.get('is_active', True):
+                grouped.setdefault(txn.get('user_id'), []).append(txn)
+        for user_id, user_transactions in grouped.items():
+            user_transactions.sort(key=_date_of)  # sort ổn định: giữ thứ tự thêm khi trùng ngày
+            self._by_user[user_id] = ([_date_of(t) for t in user_transactions], user_transactions)
+            for txn in user_transactions:
+                self._add_position(txn)
+
+    def _add_position(self, txn):
+        key = (txn.get('user_id'), _date_of(txn), txn.get('category_id'))
+        self._positions[txn.get('transaction_id')] = key
+        self._by_user_category.setdefault((key[0], key[2]), {})[txn.get('transaction_id')] = txn
+
+    def _insert(self, txn):
+        dates, records = self._by_user.setdefault(txn.get('user_id'), ([], []))
+        date = _date_of(txn)
+        pos = bisect_right(dates, date)
+        dates.insert(pos, date)
+        records.insert(pos, txn)
+        self._add_position(txn)
+
+    def _remove(self, txn_id):
+        # Vị trí cũ được lưu riêng vì bản ghi thường đã bị sửa tại chỗ trước khi ghi
+        key = self._positions.pop(txn_id, None)
+        if key is None:
+            return
+        user_id, date, category_id = key
+        dates, records = self._by_user[user_id]
+        for pos in range(bisect_left(dates, date), bisect_right(dates, date)):
+            if records[pos].get('transaction_id') == txn_id:
+                del dates[pos]
+                del records[pos]
+                break
+        bucket = self._by_user_category.get((user_id, category_id))
+        if bucket is not None:
+            bucket.pop(txn_id, None)
+
+    def apply_upsert(self, transactions):
+        for txn in transactions:
+            txn_id = txn.get('transaction_id')
+            self._remove(txn_id)
+            self.by_id[txn_id] = txn
+            if txn.get('is_active', True):
+                self._insert(txn)
+
+    def apply_delete(self, txn_id):
+        self._remove(txn_id)
+        self.by_id.pop(txn_id, None)
+
+    def get(self, txn_id):
+        """Giao dịch theo ID (kể cả đã xóa mềm), None nếu không có"""
+        return self.by_id.get(txn_id)
+
+    def user_transactions(self, user_id):
+        """Các giao dịch còn hiệu lực của người dùng, sắp xếp theo ngày"""
+        entry = self._by_user.get(user_id)
+        return list(entry[1]) if entry else []
+
+    def user_range(self, user_id, start_date, end_date):
+        """Các giao dịch còn hiệu lực của người dùng có start_date <= ngày <= end_date.
+
+        Ngày dạng YYYY-MM-DD sắp xếp đúng theo thứ tự chuỗi nên chỉ cần bisect,
+        không phải parse từng dòng: O(log n + k).
+        """
+        entry = self._by_user.get(user_id)
+        if not entry:
+            return []
+        dates, records = entry
+        return records[bisect_left(dates, start_date):bisect_right(dates, end_date)]
+
+    def _user_bounds(self, user_id, start_date=None, end_date=None):
+        entry = self._by_user.get(user_id)
+        if not entry:
+            return None, 0, 0
+        dates = entry[0]
+        low = bisect_left(dates, start_date) if start_date else 0
+        high = bisect_right(dates, end_date) if end_date else len(dates)
+        return entry, low, high
+
+    def user_range_count(self, user_id, start_date=None, end_date=None):
+        """Số giao dịch còn hiệu lực của người dùng trong khoảng ngày (None = không giới hạn), O(log n)"""
+        _, low, high = self._user_bounds(user_id, start_date, end_date)
+        return max(high - low, 0)
+
+    def user_range_chunk(self, user_id, start_date=None, end_date=None, after_date=None, skip=0, limit=1000):
+        """Một khối giao dịch trong khoảng ngày, tiếp nối sau con trỏ (after_date, skip)
+
+        Con trỏ là ngày của bản ghi cuối khối trước và số bản ghi của ngày đó đã lấy. Giao dịch
+        cùng ngày được chèn vào cuối nhóm ngày, nên đọc tiếp theo con trỏ không bị lặp/sót
+        kể cả khi có ghi xen giữa hai khối.
+        """
+        entry, low, high = self._user_bounds(user_id, start_date, end_date)
+        if entry is None:
+            return []
+        if after_date is not None:
+            low = max(low, bisect_left(entry[0], after_date) + skip)
+        return entry[1][low:min(high, low + limit)]
+
+    def user_category_transactions(self, user_id, category_id):
+        """Các giao dịch còn hiệu lực của người dùng trong một danh mục"""
+        bucket = self._by_user_category.get((user_id, category_id))
+        return list(bucket.values()) if bucket else []
+
+
+class TransactionRollups:
+    """Tổng hợp giao dịch còn hiệu lực theo (người dùng, tháng YYYY-MM, loại, danh mục).
+
+    Mỗi ô lưu [tổng tiền, số giao dịch] và được cập nhật O(1) khi thêm/sửa/xóa, nên các
+    báo cáo tổng hợp không phụ thuộc số lượng giao dịch của người dùng.
+    """
+
+    def __init__(self, transactions):
+        self._totals = {}        # user_id -> {tháng: {(loại, category_id): [tổng tiền, số giao dịch]}}
+        self._months = {}        # user_id -> danh sách tháng đã sắp xếp
+        self._contributions = {} # transaction_id -> (user_id, tháng, (loại, category_id), số tiền)
+        for txn in transactions:
+            if txn.get('transaction_id') not in self._contributions:
+                self._add(txn)
+
+    def _add(self, txn):
+        if not txn.get('is_active', True):
+            return
+        user_id, month = txn.get('user_id'), _date_of(txn)[:7]
+        key = (txn.get('type'), txn.get('category_id'))
+        amount = txn.get('amount', 0)
+        user_totals = self._totals.setdefault(user_id, {})
+        if month not in user_totals:
+            user_totals[month] = {}
+            insort(self._months.setdefault(user_id, []), month)
+        cell = user_totals[month].setdefault(key, [0, 0])
+        cell[0] += amount
+        cell[1] += 1
+        self._contributions[txn.get('transaction_id')] = (user_id, month, key, amount)
+
+    def _remove(self, txn_id):
+        # Giá trị cũ được lưu riêng vì bản ghi thường đã bị sửa tại chỗ trước khi ghi
+        contribution = self._contributions.pop(txn_id, None)
+        if contribution is None:
+            return
+        user_id, month, key, amount = contribution
+        month_totals = self._totals[user_id][month]
+        cell = month_totals[key]
+        cell[0] -= amount
+        cell[1] -= 1
+        if cell[1] == 0:
+            del month_totals[key]
+
+    def apply_upsert(self, transactions):
+        for txn in transactions:
+            self._remove(txn.get('transaction_id'))
+            self._add(txn)
+
+    def apply_delete(self, txn_id):
+        self._remove(txn_id)
+
+    def months(self, user_id, first_month=None, last_month=None):
+        """Các tháng có dữ liệu của người dùng trong khoảng [first_month, last_month]"""
+        months = self._months.get(user_id, [])
+        lo = bisect_left(months, first_month) if first_month else 0
+        hi = bisect_right(months, last_month) if last_month else len(months)
+        return months[lo:hi]
+
+    def month_totals(self, user_id, month):
+        """{(loại, category_id): [tổng tiền, số giao dịch]} của người dùng trong một tháng"""
+        return self._totals.get(user_id, {}).get(month, {})
+
+
+def _date_of(txn):
+    return str(txn.get('date') or '')
@@ -1,9 +1,22 @@
 # transaction_manager.py
 
+import calendar
 from datetime import datetime, timedelta
-from finance_app.utils.file_helper import load_json, save_json, generate_id, get_current_datetime, validate_date_format
+from finance_app.utils.file_helper import get_current_datetime, validate_date_format
 from finance_app.data_manager.category_manager import CategoryManager
 from finance_app.data_manager.user_manager import UserManager
+from finance_app.data_manager.storage import collection_name
+from finance_app.data_manager.data_store import get_data_store
+from finance_app.data_manager.transaction_index import TransactionIndex, TransactionRollups
+from finance_app.data_manager.transaction_import import (
+    read_import_rows, parse_amount, parse_type, parse_date, parse_tags
+)
+
+# Số giao dịch đọc và ghi mỗi lần khi xuất file
+EXPORT_CHUNK_SIZE = 1000
+EXPORT_HEADER = ["Ngày", "Loại", "Số tiền", "Danh mục", "Ghi chú"]
+# Báo tiến độ sau mỗi chừng này dòng khi nhập file
+IMPORT_PROGRESS_STEP = 1000
 
 class TransactionManager:
     def __init__(self, transaction_file='transactions.json', category_manager=None):
@@ -14,6 +27,8 @@ class TransactionManager:
         # Create data directory if it doesn't exist
         os.makedirs(data_dir, exist_ok=True)
         self.transaction_file = os.path.join(data_dir, transaction_file)
+        self.store = get_data_store(data_dir)
+        self.collection = collection_name(transaction_file)
         
         if category_manager: # Use provided category_manager if available
             self.category_manager = category_manager
@@ -25,8 +40,8 @@ class TransactionManager:
         self.transactions = None # Defer loading
 
     def _load_data_if_needed(self):
-        if self.transactions is None:
-            self.transactions = self.load_transactions_internal()
+        # List dùng chung trong data store; đọc lại nếu dữ liệu trên đĩa bị thay đổi
+        self.transactions = self.load_transactions_internal()
 
     def set_current_user(self, user_id):
         """Thiết lập người dùng hiện tại
@@ -38,19 +53,90 @@ class TransactionManager:
         # No need to reload transactions here, will be loaded on demand
 
     def load_transactions_internal(self):
-        """Tải danh sách giao dịch từ file"""
-        return load_json(self.transaction_file)
+        """Lấy danh sách giao dịch dùng chung từ data store"""
+        return self.store.acquire(self.collection, self)
 
     def save_transactions(self, transactions=None):
         """Lưu danh sách transactions vào file"""
         self._load_data_if_needed() # Ensure data is loaded before saving
         if transactions is None:
             transactions = self.transactions
-        return save_json(self.transaction_file, transactions)
+        return self.store.save_all(self.collection, transactions)
+
+    def compact_journal(self):
+        """Gộp journal giao dịch vào file transactions.json (gọi khi đóng ứng dụng)"""
+        return self.store.compact(self.collection)
+
+    def _index(self):
+        """Chỉ mục giao dịch (theo id, người dùng, danh mục) được data store cập nhật sau mỗi lần ghi"""
+        self._load_data_if_needed()
+        return self.store.derived(self.collection, 'transaction_index', TransactionIndex)
+
+    def _query(self, **filters):
+        """Đọc qua chỉ mục SQLite khi giao dịch chưa được nạp vào bộ nhớ (None: dùng _index())
+
+        Giống _index(), giao dịch đã xóa mềm bị bỏ qua.
+        """
+        return self.store.query(self.collection, active_only=True, **filters)
+
+    def _rollups(self):
+        """Tổng hợp theo (người dùng, tháng, loại, danh mục) được cập nhật sau mỗi lần ghi"""
+        self._load_data_if_needed()
+        return self.store.derived(self.collection, 'transaction_rollups', TransactionRollups)
+
+    def _aggregate(self, user_id, start_date=None, end_date=None):
+        """Tổng hợp giao dịch của người dùng trong khoảng ngày (None = không giới hạn)
+
+        Tháng nằm trọn trong khoảng được lấy từ bảng tổng hợp; chỉ hai tháng ở biên
+        (nếu bị cắt) mới phải cộng từng giao dịch qua chỉ mục ngày.
+
+        Returns:
+            dict: {(loại, category_id): [tổng tiền, số giao dịch]}
+        """
+        with self.store.lock:
+            # Bảng tổng hợp và chỉ mục phải được đọc cùng một trạng thái
+            return self._aggregate_locked(user_id, start_date, end_date)
+
+    def _aggregate_locked(self, user_id, start_date, end_date):
+        rollups = self._rollups()
+        totals = {}
+
+        def add(key, amount, count):
+            cell = totals.setdefault(key, [0, 0])
+            cell[0] += amount
+            cell[1] += count
+
+        months = rollups.months(user_id, start_date[:7] if start_date else None,
+                                end_date[:7] if end_date else None)
+        for month in months:
+            if start_date or end_date:
+                try:
+                    year, month_num = int(month[:4]), int(month[5:7])
+                except ValueError:
+                    continue
+                month_start = f"{month}-01"
+                month_end = f"{month}-{calendar.monthrange(year, month_num)[1]:02d}"
+                if (start_date and start_date > month_start) or (end_date and end_date < month_end):
+                    # Tháng bị cắt ở biên khoảng ngày
+                    partial = self._index().user_range(
+                        user_id, max(start_date or month_start, month_start), min(end_date or month_end, month_end)
+                    )
+                    for txn in partial:
+                        add((txn.get('type'), txn.get('category_id')), txn.get('amount', 0), 1)
+                    continue
+            for key, (amount, count) in rollups.month_totals(user_id, month).items():
+                add(key, amount, count)
+        return totals
+
+    def _save_transaction(self, transaction):
+        """Lưu một giao dịch (backend SQLite chỉ ghi đúng một dòng)"""
+        return self.store.upsert(self.collection, transaction)
 
     def get_all_transactions(self, user_id=None, target_user_id=None, transaction_type=None):
         """Lấy tất cả giao dịch, có thể lọc theo user_id và loại giao dịch
         
+        Giao dịch đã xóa mềm (is_active = False) không được trả về.
+        
         Args:
             user_id (str): ID của người dùng thực hiện yêu cầu
             target_user_id (str): ID của người dùng cần lấy giao dịch (dùng cho admin)
@@ -67,25 +153,18 @@ class TransactionManager:
         if target_user_id and target_user_id != user_id and not self.user_manager.is_admin(user_id):
             raise ValueError("Không có quyền truy cập dữ liệu của người dùng khác")
         
-        filtered_transactions = []
+        # Giao dịch của người dùng (đã sắp xếp theo ngày, bỏ giao dịch đã xóa mềm)
+        with self.store.lock:
+            filtered_transactions = self._index().user_transactions(target_user_id or user_id)
         
-        for txn in self.transactions:
-            # Filter by user
-            if target_user_id and txn['user_id'] != target_user_id:
-                continue
-            if not target_user_id and txn['user_id'] != user_id:
-                continue
-                
-            # Filter by type if specified
-            if transaction_type and txn.get('type') != transaction_type:
-                continue
-                
-            filtered_transactions.append(txn)
+        # Filter by type if specified
+        if transaction_type:
+            filtered_transactions = [txn for txn in filtered_transactions if txn.get('type') == transaction_type]
             
         return filtered_transactions
 
     def get_transaction_by_id(self, user_id=None, transaction_id=None, is_admin=False):
-        """Tìm giao dịch theo ID"""
+        """Tìm giao dịch theo ID (None nếu giao dịch đã bị xóa mềm)"""
         self._load_data_if_needed() # Load data
         if user_id is None:
             user_id = self.current_user_id
@@ -93,23 +172,18 @@ class TransactionManager:
         if user_id is None or transaction_id is None:
             return None
             
-        transactions = self.get_all_transactions(user_id, user_id)
-        for transaction in transactions:
-            if transaction['transaction_id'] == transaction_id:
-                if is_admin or transaction['user_id'] == user_id:
-                    return transaction
+        transaction = self._index().get(transaction_id)
+        if transaction and transaction.get('is_active', True) and transaction['user_id'] == user_id:
+            return transaction
         return None
 
     def get_transaction_by_id_no_auth(self, transaction_id):
-        """Tìm giao dịch theo ID mà không kiểm tra quyền"""
+        """Tìm giao dịch theo ID mà không kiểm tra quyền (kể cả giao dịch đã xóa mềm)"""
         self._load_data_if_needed() # Load data
         if transaction_id is None:
             return None
             
-        for transaction in self.transactions:
-            if transaction['transaction_id'] == transaction_id:
-                return transaction
-        return None
+        return self._index().get(transaction_id)
 
     def add_transaction(self, user_id=None, category_id=None, amount=None, transaction_type=None, 
                        description="", date=None, tags=None, location=""):
@@ -154,7 +228,7 @@ class TransactionManager:
         
         # self.transactions is already loaded by _load_data_if_needed
         new_transaction = {
-            "transaction_id": generate_id("txn", self.transactions),
+            "transaction_id": self.store.next_id(self.collection, "txn"),
             "user_id": user_id,
             "category_id": category_id,
             "amount": amount,
@@ -168,10 +242,111 @@ class TransactionManager:
         }
         
         self.transactions.append(new_transaction)
-        self.save_transactions() # save_transactions will use self.transactions
+        self._save_transaction(new_transaction)
         print(f"Đã thêm giao dịch mới: {new_transaction['transaction_id']}")
         return new_transaction['transaction_id']
 
+    def import_transactions(self, user_id=None, rows=None, file_path=None, progress=None):
+        """Nhập nhiều giao dịch một lần (sao kê ngân hàng, file xuất CSV/JSON...)
+
+        Người dùng được kiểm tra một lần, danh mục được tra qua bảng dựng sẵn (theo ID và
+        theo tên), ID được cấp theo khối và toàn bộ giao dịch hợp lệ được ghi trong một lần;
+        chỉ mục và bảng tổng hợp được data store cập nhật tăng dần cho các giao dịch mới.
+
+        Args:
+            rows (list, optional): Các dict với cột date, type, amount, category_id/category, description...
+            file_path (str, optional): Đọc rows từ file .csv/.json nếu không truyền rows
+            progress (callable, optional): progress(đã_kiểm_tra, tổng) khi kiểm tra dữ liệu;
+                trả về False để hủy (chưa có gì được ghi)
+
+        Returns:
+            dict: {"status", "imported": số giao dịch đã nhập, "errors": [(số_dòng, thông_báo)...]}
+        """
+        if user_id is None:
+            user_id = self.current_user_id
+        if user_id is None:
+            raise ValueError("Thiếu thông tin bắt buộc")
+        if not self.user_manager.get_user_by_id(user_id):
+            raise ValueError(f"Không tìm thấy người dùng với ID: {user_id}")
+        if rows is None:
+            rows = read_import_rows(file_path)
+
+        # Danh mục người dùng được phép dùng, giống quy tắc của get_category_by_id
+        is_admin = self.user_manager.is_admin(user_id)
+        categories_by_id = {}
+        categories_by_name = {}
+        for category in self.category_manager.load_categories():
+            if not is_admin and category.get('user_id') not in ("system", user_id, None):
+                continue
+            category_id = category.get('category_id')
+            categories_by_id[category_id] = category
+            categories_by_name.setdefault(str(category.get('name', '')).strip().lower(), []).append(category)
+
+        total = len(rows)
+        errors = []
+        valid = []
+        for position, row in enumerate(rows, start=1):
+            amount = parse_amount(row.get('amount'))
+            transaction_type = parse_type(row.get('type')) if row.get('type') else None
+            date = parse_date(row.get('date')) if row.get('date') else datetime.now().strftime('%Y-%m-%d')
+
+            category = categories_by_id.get(row.get('category_id'))
+            if category is None and row.get('category'):
+                candidates = categories_by_name.get(str(row['category']).strip().lower(), [])
+                # Cùng tên ở cả hai loại: chọn danh mục khớp loại giao dịch
+                category = next((c for c in candidates if c.get('type') == transaction_type),
+                                candidates[0] if candidates else None)
+
+            if row.get('type') and transaction_type is None:
+                errors.append((position, "Loại giao dịch phải là 'income' hoặc 'expense'"))
+            elif category is None:
+                errors.append((position, f"Không tìm thấy danh mục: {row.get('category_id') or row.get('category') or ''}"))
+            elif transaction_type and category['type'] != transaction_type:
+                errors.append((position, "Loại giao dịch không phù hợp với danh mục"))
+            elif amount is None or amount <= 0:
+                errors.append((position, "Số tiền phải lớn hơn 0"))
+            elif date is None:
+                errors.append((position, "Ngày giao dịch không đúng định dạng"))
+            else:
+                valid.append((row, category, amount, date))
+
+            if progress and (position % IMPORT_PROGRESS_STEP == 0 or position == total):
+                if progress(position, total) is False:
+                    return {"status": "cancelled", "imported": 0, "errors": errors}
+
+        if not valid:
+            return {"status": "error" if errors else "success", "imported": 0, "errors": errors}
+
+        now = get_current_datetime()
+        # Một batch: ghi lỗi thì danh sách dùng chung, chỉ mục và bộ đếm ID được đưa về như cũ
+        try:
+            with self.store.batch():
+                self._load_data_if_needed()
+                transaction_ids = self.store.allocate_ids(self.collection, "txn", len(valid))
+                new_transactions = [
+                    {
+                        "transaction_id": transaction_id,
+                        "user_id": user_id,
+                        "category_id": category['category_id'],
+                        "amount": amount,
+                        "type": category['type'],
+                        "description": row.get('description') or "",
+                        "date": date,
+                        "created_at": now,
+                        "updated_at": now,
+                        "tags": parse_tags(row.get('tags')),
+                        "location": row.get('location') or ""
+                    }
+                    for transaction_id, (row, category, amount, date) in zip(transaction_ids, valid)
+                ]
+                self.transactions.extend(new_transactions)
+                self.store.upsert_many(self.collection, new_transactions)
+        except OSError:
+            return {"status": "error", "imported": 0,
+                    "errors": errors + [(None, "Lỗi khi lưu file")]}
+        print(f"Đã nhập {len(new_transactions)} giao dịch ({len(errors)} dòng lỗi)")
+        return {"status": "success", "imported": len(new_transactions), "errors": errors}
+
     def update_transaction(self, user_id=None, transaction_id=None, **kwargs):
         """Cập nhật giao dịch"""
         self._load_data_if_needed() # Load data
@@ -186,37 +361,29 @@ class TransactionManager:
         if not transaction:
             raise ValueError(f"Không tìm thấy giao dịch với ID: {transaction_id} hoặc không có quyền truy cập")
         
-        # self.transactions is already loaded
-        for idx, txn in enumerate(self.transactions):
-            if txn['transaction_id'] == transaction_id:
-                # Ensure user has permission before updating
-                if not self.user_manager.is_admin(user_id) and txn['user_id'] != user_id:
-                    raise ValueError("Không có quyền cập nhật giao dịch này")
-
-                for key, value in kwargs.items():
-                    if key in txn and value is not None:
-                        if key == 'category_id':
-                            category = self.category_manager.get_category_by_id(user_id, value)
-                            if not category:
-                                raise ValueError(f"Không tìm thấy danh mục với ID: {value} hoặc không có quyền")
-                            if category['type'] != txn['type']:
-                                raise ValueError(f"Loại giao dịch không phù hợp với danh mục")
-                        elif key == 'amount' and value <= 0:
-                            raise ValueError("Số tiền phải lớn hơn 0")
-                        elif key == 'type' and value not in ['income', 'expense']:
-                            raise ValueError("Loại giao dịch phải là 'income' hoặc 'expense'")
-                        elif key == 'date' and not validate_date_format(value):
-                            raise ValueError("Ngày giao dịch không đúng định dạng YYYY-MM-DD")
-                        
-                        txn[key] = value
+        # get_transaction_by_id already checked that the transaction belongs to user_id
+        txn = transaction
+        for key, value in kwargs.items():
+            if key in txn and value is not None:
+                if key == 'category_id':
+                    category = self.category_manager.get_category_by_id(user_id, value)
+                    if not category:
+                        raise ValueError(f"Không tìm thấy danh mục với ID: {value} hoặc không có quyền")
+                    if category['type'] != txn['type']:
+                        raise ValueError(f"Loại giao dịch không phù hợp với danh mục")
+                elif key == 'amount' and value <= 0:
+                    raise ValueError("Số tiền phải lớn hơn 0")
+                elif key == 'type' and value not in ['income', 'expense']:
+                    raise ValueError("Loại giao dịch phải là 'income' hoặc 'expense'")
+                elif key == 'date' and not validate_date_format(value):
+                    raise ValueError("Ngày giao dịch không đúng định dạng YYYY-MM-DD")
                 
-                txn['updated_at'] = get_current_datetime()
-                self.transactions[idx] = txn
-                self.save_transactions() # save_transactions will use self.transactions
-                print(f"Đã cập nhật giao dịch: {transaction_id}")
-                return txn
+                txn[key] = value
         
-        raise ValueError(f"Không tìm thấy giao dịch với ID: {transaction_id}")
+        txn['updated_at'] = get_current_datetime()
+        self._save_transaction(txn)
+        print(f"Đã cập nhật giao dịch: {transaction_id}")
+        return txn
 
     def delete_transaction(self, user_id=None, transaction_id=None):
         """Xóa giao dịch (soft delete by marking inactive)"""
@@ -227,15 +394,11 @@ class TransactionManager:
         if user_id is None or transaction_id is None:
             return False, "Thiếu thông tin bắt buộc"
 
-        # Find the transaction in self.transactions
-        transaction_to_delete = None
-        for txn in self.transactions:
-            if txn['transaction_id'] == transaction_id:
-                # Check permission
-                if not self.user_manager.is_admin(user_id) and txn['user_id'] != user_id:
-                    return False, "Không có quyền xóa giao dịch này"
-                transaction_to_delete = txn
-                break
+        transaction_to_delete = self._index().get(transaction_id)
+        # Check permission
+        if transaction_to_delete and not self.user_manager.is_admin(user_id) \
+                and transaction_to_delete['user_id'] != user_id:
+            return False, "Không có quyền xóa giao dịch này"
         
         if not transaction_to_delete:
             return False, "Không tìm thấy giao dịch"
@@ -243,38 +406,30 @@ class TransactionManager:
         transaction_to_delete['is_active'] = False # Soft delete
         transaction_to_delete['updated_at'] = get_current_datetime()
         
-        if self.save_transactions(): # save_transactions will use self.transactions
+        if self._save_transaction(transaction_to_delete):
             return True, "Đã xóa giao dịch thành công"
         return False, "Lỗi khi lưu file"
 
     def get_transactions_by_date_range(self, user_id=None, start_date=None, end_date=None):
-        """Lấy giao dịch trong khoảng thời gian"""
-        self._load_data_if_needed() # Load data
+        """Lấy giao dịch trong khoảng thời gian (bỏ giao dịch đã xóa mềm)"""
         if user_id is None:
             user_id = self.current_user_id
             
         if user_id is None or start_date is None or end_date is None:
             return []
             
-        transactions = self.get_all_transactions(user_id, user_id)
-        
         if not validate_date_format(start_date) or not validate_date_format(end_date):
             raise ValueError("Ngày không đúng định dạng YYYY-MM-DD")
         
-        start_date = datetime.strptime(start_date, '%Y-%m-%d')
-        end_date = datetime.strptime(end_date, '%Y-%m-%d')
-        
-        filtered_transactions = []
-        for txn in transactions:
-            txn_date = datetime.strptime(txn['date'], '%Y-%m-%d')
-            if start_date <= txn_date <= end_date:
-                filtered_transactions.append(txn)
-        
-        return filtered_transactions
+        rows = self._query(user_id=user_id, start_date=start_date, end_date=end_date)
+        if rows is not None:
+            return rows
+        # Ngày ISO so sánh được dạng chuỗi: tìm khoảng bằng bisect trên danh sách đã sắp xếp
+        with self.store.lock:
+            return self._index().user_range(user_id, start_date, end_date)
 
     def get_transactions_by_category(self, user_id=None, category_id=None, start_date=None, end_date=None):
-        """Lấy giao dịch theo danh mục"""
-        self._load_data_if_needed() # Load data
+        """Lấy giao dịch theo danh mục (bỏ giao dịch đã xóa mềm)"""
         if user_id is None:
             user_id = self.current_user_id
             
@@ -285,14 +440,20 @@ class TransactionManager:
         if not category:
             raise ValueError(f"Không tìm thấy danh mục với ID: {category_id} hoặc không có quyền")
         
-        transactions = self.get_all_transactions(user_id, user_id)
-        filtered = [txn for txn in transactions if txn['category_id'] == category_id]
+        has_range = bool(start_date and end_date)
+        if has_range and (not validate_date_format(start_date) or not validate_date_format(end_date)):
+            raise ValueError("Ngày không đúng định dạng YYYY-MM-DD")
         
-        if start_date and end_date:
-            if not validate_date_format(start_date) or not validate_date_format(end_date):
-                raise ValueError("Ngày không đúng định dạng YYYY-MM-DD")
-            filtered = [txn for txn in filtered 
-                       if datetime.strptime(start_date, '%Y-%m-%d') <= datetime.strptime(txn['date'], '%Y-%m-%d') <= datetime.strptime(end_date, '%Y-%m-%d')]
+        rows = self._query(user_id=user_id, category_id=category_id,
+                           start_date=start_date if has_range else None,
+                           end_date=end_date if has_range else None)
+        if rows is not None:
+            return rows
+        
+        with self.store.lock:
+            filtered = self._index().user_category_transactions(user_id, category_id)
+        if has_range:
+            filtered = [txn for txn in filtered if start_date <= txn['date'] <= end_date]
         
         return filtered
 
@@ -338,16 +499,21 @@ class TransactionManager:
                 'transaction_count': 0
             }
             
-        transactions = self.get_transactions_by_date_range(user_id, start_date, end_date)
+        # Giống get_transactions_by_date_range: thiếu ngày thì không có giao dịch nào
+        totals = {}
+        if start_date is not None and end_date is not None:
+            if not validate_date_format(start_date) or not validate_date_format(end_date):
+                raise ValueError("Ngày không đúng định dạng YYYY-MM-DD")
+            totals = self._aggregate(user_id, start_date, end_date)
         
-        total_income = sum(txn['amount'] for txn in transactions if txn['type'] == 'income')
-        total_expense = sum(txn['amount'] for txn in transactions if txn['type'] == 'expense')
+        total_income = sum(amount for (txn_type, _), (amount, _) in totals.items() if txn_type == 'income')
+        total_expense = sum(amount for (txn_type, _), (amount, _) in totals.items() if txn_type == 'expense')
         
         return {
             'total_income': total_income,
             'total_expense': total_expense,
             'net_amount': total_income - total_expense,
-            'transaction_count': len(transactions)
+            'transaction_count': sum(count for _, count in totals.values())
         }
 
     def get_category_breakdown(self, user_id=None, transaction_type=None, start_date=None, end_date=None):
@@ -359,17 +525,20 @@ class TransactionManager:
         if user_id is None:
             return {}
             
-        transactions = self.get_all_transactions(user_id, user_id)
-        
         if start_date and end_date:
-            transactions = self.get_transactions_by_date_range(user_id, start_date, end_date)
-            
-        if transaction_type:
-            transactions = [txn for txn in transactions if txn['type'] == transaction_type]
+            if not validate_date_format(start_date) or not validate_date_format(end_date):
+                raise ValueError("Ngày không đúng định dạng YYYY-MM-DD")
+            totals = self._aggregate(user_id, start_date, end_date)
+        else:
+            totals = self._aggregate(user_id)
             
+        # Tra cứu danh mục một lần cho cả báo cáo
+        categories = self.category_manager.resolve_categories({category_id for _, category_id in totals})
         breakdown = {}
-        for txn in transactions:
-            category = self.category_manager.get_category_by_id(user_id, txn['category_id'])
+        for (txn_type, category_id), (amount, count) in totals.items():
+            if transaction_type and txn_type != transaction_type:
+                continue
+            category = categories.get(category_id)
             if category:
                 category_name = category['name']
                 if category_name not in breakdown:
@@ -378,8 +547,8 @@ class TransactionManager:
                         'count': 0,
                         'category_id': category['category_id']
                     }
-                breakdown[category_name]['amount'] += txn['amount']
-                breakdown[category_name]['count'] += 1
+                breakdown[category_name]['amount'] += amount
+                breakdown[category_name]['count'] += count
                 
         return breakdown
 
@@ -398,19 +567,18 @@ class TransactionManager:
                 'net_amount': 0
             }
             
+        # Ngày cuối tháng (trước đây lấy nhầm ngày 1 của tháng sau)
         start_date = f"{year}-{month:02d}-01"
-        if month == 12:
-            end_date = f"{year + 1}-01-01"
-        else:
-            end_date = f"{year}-{month + 1:02d}-01"
+        end_date = f"{year}-{month:02d}-{calendar.monthrange(year, month)[1]:02d}"
             
         transactions = self.get_transactions_by_date_range(user_id, start_date, end_date)
         
         income_transactions = [t for t in transactions if t['type'] == 'income']
         expense_transactions = [t for t in transactions if t['type'] == 'expense']
         
-        total_income = sum(t['amount'] for t in income_transactions)
-        total_expense = sum(t['amount'] for t in expense_transactions)
+        month_totals = self._rollups().month_totals(user_id, f"{year}-{month:02d}")
+        total_income = sum(amount for (txn_type, _), (amount, _) in month_totals.items() if txn_type == 'income')
+        total_expense = sum(amount for (txn_type, _), (amount, _) in month_totals.items() if txn_type == 'expense')
         
         return {
             'income': income_transactions,
@@ -420,41 +588,116 @@ class TransactionManager:
             'net_amount': total_income - total_expense
         }
 
-    def export_transactions(self, user_id=None, file_path=None, start_date=None, end_date=None):
-        """Xuất giao dịch ra file CSV"""
+    def count_transactions(self, user_id=None, start_date=None, end_date=None):
+        """Đếm giao dịch của người dùng trong khoảng ngày mà không tạo danh sách"""
+        if user_id is None:
+            user_id = self.current_user_id
+        with self.store.lock:
+            return self._index().user_range_count(user_id, start_date, end_date)
+
+    def iter_transactions(self, user_id=None, start_date=None, end_date=None, chunk_size=EXPORT_CHUNK_SIZE):
+        """Duyệt giao dịch của người dùng theo thứ tự ngày, mỗi lần một khối
+
+        Mỗi khối được cắt từ chỉ mục ngày trong lúc giữ khóa store, giữa các khối khóa
+        được nhả ra nên có thể chạy ở luồng nền trong khi giao diện vẫn ghi dữ liệu.
+
+        Yields:
+            list: Khối tối đa chunk_size giao dịch
+        """
+        if user_id is None:
+            user_id = self.current_user_id
+        if user_id is None:
+            return
+        after_date, skip = None, 0
+        while True:
+            with self.store.lock:
+                chunk = self._index().user_range_chunk(
+                    user_id, start_date, end_date, after_date, skip, chunk_size
+                )
+            if not chunk:
+                return
+            last_date = str(chunk[-1].get('date') or '')
+            same_date = 0
+            for txn in reversed(chunk):
+                if str(txn.get('date') or '') != last_date:
+                    break
+                same_date += 1
+            # Cả khối cùng ngày với con trỏ cũ thì cộng dồn số bản ghi đã lấy của ngày đó
+            skip = skip + same_date if last_date == after_date and same_date == len(chunk) else same_date
+            after_date = last_date
+            yield chunk
+
+    def export_transactions(self, user_id=None, file_path=None, start_date=None, end_date=None,
+                            progress=None, chunk_size=EXPORT_CHUNK_SIZE):
+        """Xuất giao dịch ra file CSV
+
+        Giao dịch được đọc và ghi theo từng khối nên bộ nhớ dùng không phụ thuộc số giao dịch;
+        tên danh mục được tra qua một bảng tra cứu dựng dần một lần cho cả file.
+
+        Args:
+            progress (callable, optional): progress(đã_ghi, tổng) sau mỗi khối; trả về False để hủy
+                (file đang ghi dở sẽ bị xóa)
+
+        Returns:
+            bool: True khi xuất xong, False khi lỗi hoặc bị hủy.
+            Không có file_path thì trả về danh sách giao dịch như trước đây.
+        """
         import csv
-        self._load_data_if_needed() # Load data
+        import os
         if user_id is None:
             user_id = self.current_user_id
         if user_id is None:
             return False
-        transactions = self.get_all_transactions(user_id, user_id)
-        if start_date and end_date:
-            transactions = self.get_transactions_by_date_range(user_id, start_date, end_date)
-        if file_path:
-            try:
-                with open(file_path, mode='w', encoding='utf-8', newline='') as csvfile:
-                    writer = csv.writer(csvfile)
-                    writer.writerow(["Ngày", "Loại", "Số tiền", "Danh mục", "Ghi chú"])
-                    for txn in transactions:
-                        date_str = txn.get('date', '')
-                        txn_type = 'Thu nhập' if txn.get('type') == 'income' else 'Chi tiêu'
-                        amount = txn.get('amount', 0)
-                        category = txn.get('category_name', '') if txn.get('category_name') else txn.get('category_id', '')
-                        note = txn.get('note', '')
-                        writer.writerow([date_str, txn_type, amount, category, note])
-                return True
-            except Exception as e:
-                print(f"Lỗi khi xuất file CSV: {e}")
-                return False
-        return transactions
+        if not (start_date and end_date):
+            start_date = end_date = None
+        if not file_path:
+            return [txn for chunk in self.iter_transactions(user_id, start_date, end_date) for txn in chunk]
+
+        total = self.count_transactions(user_id, start_date, end_date)
+        category_names = {}
+        written = 0
+        try:
+            with open(file_path, mode='w', encoding='utf-8', newline='', buffering=1 << 16) as csvfile:
+                writer = csv.writer(csvfile)
+                writer.writerow(EXPORT_HEADER)
+                for chunk in self.iter_transactions(user_id, start_date, end_date, chunk_size):
+                    missing = {txn.get('category_id') for txn in chunk} - category_names.keys()
+                    if missing:
+                        resolved = self.category_manager.resolve_categories(missing)
+                        for category_id in missing:
+                            category = resolved.get(category_id)
+                            category_names[category_id] = category.get('name', '') if category else None
+                    writer.writerows(
+                        [
+                            txn.get('date', ''),
+                            'Thu nhập' if txn.get('type') == 'income' else 'Chi tiêu',
+                            txn.get('amount', 0),
+                            category_names.get(txn.get('category_id')) or txn.get('category_name') or txn.get('category_id', ''),
+                            txn.get('description') or txn.get('note', '')
+                        ]
+                        for txn in chunk
+                    )
+                    written += len(chunk)
+                    if progress and progress(written, max(total, written)) is False:
+                        break
+                else:
+                    return True
+        except Exception as e:
+            print(f"Lỗi khi xuất file CSV: {e}")
+            return False
+        # Bị hủy giữa chừng: không để lại file thiếu dữ liệu
+        try:
+            os.remove(file_path)
+        except OSError:
+            pass
+        return False
 
     def get_user_transactions(self, user_id, is_admin=False):
         """Lấy tất cả các giao dịch của một người dùng cụ thể.
            Nếu is_admin là True, sẽ trả về tất cả giao dịch của user_id đó.
            Nếu is_admin là False, sẽ kiểm tra self.current_user_id có khớp với user_id không.
+           Giao dịch đã xóa mềm không được trả về.
         """
-        self._load_data_if_needed() # Load data
         if not user_id:
             return []
         
@@ -464,7 +707,11 @@ class TransactionManager:
             # Consider raising a PermissionError for stricter control.
             return [] 
 
-        return [txn for txn in self.transactions if txn['user_id'] == user_id]
+        rows = self._query(user_id=user_id)
+        if rows is not None:
+            return rows
+        with self.store.lock:
+            return self._index().user_transactions(user_id)
 
     def get_monthly_summary(self, user_id=None, year=None, month=None):
         """Lấy tóm tắt thu chi theo tháng"""
@@ -477,17 +724,30 @@ class TransactionManager:
                 'total_income': 0,
                 'total_expense': 0,
                 'net_amount': 0,
-                'category_breakdown': {}
+                'category_breakdown': {},
+                'expense_breakdown': {}
             }
             
-        report = self.get_monthly_report(user_id, year, month)
+        # Tính trực tiếp từ bảng tổng hợp của tháng, không cần danh sách giao dịch
+        month_totals = self._rollups().month_totals(user_id, f"{year}-{month:02d}")
+        total_income = 0
+        total_expense = 0
+        expense_breakdown = {}
+        for (txn_type, category_id), (amount, _) in month_totals.items():
+            if txn_type == 'income':
+                total_income += amount
+            elif txn_type == 'expense':
+                total_expense += amount
+                category_name = self.category_manager.get_category_name(category_id)
+                expense_breakdown[category_name] = expense_breakdown.get(category_name, 0) + amount
         category_breakdown = self.get_category_breakdown(user_id)
         
         return {
-            'total_income': report['total_income'],
-            'total_expense': report['total_expense'],
-            'net_amount': report['net_amount'],
-            'category_breakdown': category_breakdown
+            'total_income': total_income,
+            'total_expense': total_expense,
+            'net_amount': total_income - total_expense,
+            'category_breakdown': category_breakdown,
+            'expense_breakdown': expense_breakdown
         }
 
     def delete_user_transactions(self, user_id):
@@ -503,7 +763,7 @@ class TransactionManager:
             return False, "User ID is required"
 
         initial_count = len(self.transactions)
-        self.transactions = [txn for txn in self.transactions if txn['user_id'] != user_id]
+        self.transactions[:] = [txn for txn in self.transactions if txn['user_id'] != user_id]
         
         if len(self.transactions) < initial_count:
             if self.save_transactions():
@@ -5,16 +5,96 @@ import bcrypt
 import os
 import json
 import logging
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime
 from finance_app.utils.file_helper import (
-    load_json, save_json, generate_id,
-    is_valid_email, is_valid_phone, is_strong_password # Import new validation functions
+    is_valid_email, is_valid_phone, is_strong_password, # Import new validation functions
+    load_config
 )
+from finance_app.data_manager.storage import collection_name
+from finance_app.data_manager.data_store import get_data_store
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+def _build_user_index(users):
+    """Tạo chỉ mục tra cứu người dùng theo id, username (chữ thường), email và số điện thoại"""
+    index = {'user_id': {}, 'username': {}, 'email': {}, 'phone': {}}
+    for user in users:
+        index['user_id'].setdefault(user.get('user_id'), user)
+        if user.get('username'):
+            index['username'].setdefault(user['username'].lower(), user)
+        # Email/số điện thoại có thể bị trùng trong dữ liệu cũ nên giữ danh sách
+        if user.get('email'):
+            index['email'].setdefault(user['email'], []).append(user)
+        if user.get('phone'):
+            index['phone'].setdefault(user['phone'], []).append(user)
+    return index
+
+DEFAULT_PASSWORD_ROUNDS = 12
+# Giới hạn hợp lệ của tham số cost trong bcrypt
+MIN_PASSWORD_ROUNDS = 4
+MAX_PASSWORD_ROUNDS = 31
+# Ít hơn số mật khẩu này thì băm tuần tự nhanh hơn khởi động process pool
+PARALLEL_HASH_THRESHOLD = 4
+
+def get_password_rounds(data_dir=None):
+    """Đọc cost bcrypt từ mục security.password_salt_rounds trong config.json"""
+    try:
+        rounds = int(load_config('security', data_dir).get('password_salt_rounds', DEFAULT_PASSWORD_ROUNDS))
+    except (TypeError, ValueError):
+        logger.warning("password_salt_rounds không hợp lệ, dùng giá trị mặc định")
+        rounds = DEFAULT_PASSWORD_ROUNDS
+    return min(max(rounds, MIN_PASSWORD_ROUNDS), MAX_PASSWORD_ROUNDS)
+
+def get_hash_rounds(hashed):
+    """Lấy cost của một chuỗi băm bcrypt dạng `$2b$12$...`; None nếu không đọc được"""
+    try:
+        return int(hashed.split('$')[2])
+    except (AttributeError, IndexError, ValueError):
+        return None
+
+def _hash_password(args):
+    # Hàm cấp module để process pool có thể pickle
+    password, rounds = args
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=rounds)).decode('utf-8')
+
+def hash_passwords(passwords, rounds=None, workers=None, progress=None):
+    """Băm nhiều mật khẩu, chia cho các tiến trình con để dùng hết các nhân CPU
+
+    Args:
+        passwords (list): Danh sách mật khẩu (mỗi mật khẩu có salt riêng kể cả khi trùng nhau)
+        rounds (int, optional): Cost bcrypt, mặc định lấy từ config
+        workers (int, optional): Số tiến trình, mặc định bằng số nhân CPU
+        progress (callable, optional): Gọi progress(đã_xong, tổng) sau mỗi mật khẩu
+
+    Returns:
+        list: Chuỗi băm theo đúng thứ tự của passwords
+    """
+    rounds = rounds or get_password_rounds()
+    total = len(passwords)
+    jobs = [(password, rounds) for password in passwords]
+    hashes = []
+    if total >= PARALLEL_HASH_THRESHOLD and (workers or os.cpu_count() or 1) > 1:
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                chunksize = max(1, total // ((workers or os.cpu_count()) * 4))
+                for hashed in pool.map(_hash_password, jobs, chunksize=chunksize):
+                    hashes.append(hashed)
+                    if progress:
+                        progress(len(hashes), total)
+            return hashes
+        except (OSError, BrokenProcessPool) as e:
+            # Môi trường không tạo được tiến trình con: băm tiếp phần còn lại ngay tại đây
+            logger.warning(f"Không dùng được process pool ({e}), băm tuần tự")
+    for job in jobs[len(hashes):]:
+        hashes.append(_hash_password(job))
+        if progress:
+            progress(len(hashes), total)
+    return hashes
+
 class UserManager:
     def __init__(self, user_file='users.json'):
         # Get the directory where the package is installed
@@ -23,22 +103,33 @@ class UserManager:
         # Create data directory if it doesn't exist
         os.makedirs(data_dir, exist_ok=True)
         self.user_file = os.path.join(data_dir, user_file)
-        
-        # Initialize users file if it doesn't exist
+        self.store = get_data_store(data_dir)
+        self.collection = collection_name(user_file)
+        # Không đọc file khi khởi tạo; admin mặc định được tạo ở lần nạp đầu tiên nếu cần
+        self._defaults_checked = False
+        self._password_rounds = None
+
+    @property
+    def password_rounds(self):
+        """Cost bcrypt cấu hình cho mật khẩu mới (đọc config ở lần dùng đầu tiên)"""
+        if self._password_rounds is None:
+            self._password_rounds = get_password_rounds(os.path.dirname(self.user_file))
+        return self._password_rounds
+
+    def _ensure_default_admin(self, users):
+        """Tạo admin mặc định nếu chưa có người dùng nào"""
+        if users:
+            return
         if not os.path.exists(self.user_file):
             logger.info(f"Creating new users file at {self.user_file}")
             self.save_users([])
-            
-        # Create default admin if no users exist
-        users = self.load_users()
-        if not users:
-            logger.info("Creating default admin user")
-            self.add_user(
-                username="admin",
-                password="Admin@123",
-                full_name="Administrator",
-                is_admin=True
-            )
+        logger.info("Creating default admin user")
+        self.add_user(
+            username="admin",
+            password="Admin@123",
+            full_name="Administrator",
+            is_admin=True
+        )
 
     def set_current_user(self, user_id):
         """Thiết lập người dùng hiện tại cho manager.
@@ -52,25 +143,44 @@ class UserManager:
 
     def load_users(self):
         try:
-            users = load_json(self.user_file)
-            logger.debug(f"Loaded {len(users)} users from {self.user_file}")
-            return users
+            # List dùng chung trong data store, không đọc lại file ở mỗi lần gọi
+            users = self.store.acquire(self.collection, self)
+            logger.debug(f"Loaded {len(users)} users from {self.collection}")
         except Exception as e:
             logger.error(f"Error loading users: {str(e)}")
             return []
+        if not self._defaults_checked:
+            self._defaults_checked = True
+            self._ensure_default_admin(users)
+        return users
+
+    def _index(self):
+        """Chỉ mục người dùng trong bộ nhớ; tự tính lại khi dữ liệu được ghi hoặc file thay đổi"""
+        if not self._defaults_checked:
+            self.load_users()
+        return self.store.derived(self.collection, 'user_index', _build_user_index)
 
     def save_users(self, users):
         try:
-            save_json(self.user_file, users)
-            logger.debug(f"Saved {len(users)} users to {self.user_file}")
+            if not self.store.save_all(self.collection, users):
+                return False
+            logger.debug(f"Saved {len(users)} users to {self.collection}")
             return True
         except Exception as e:
             logger.error(f"Error saving users: {str(e)}")
             return False
 
+    def save_user(self, user, users=None):
+        """Lưu một người dùng (backend SQLite chỉ ghi đúng một dòng)"""
+        try:
+            return self.store.upsert(self.collection, user)
+        except Exception as e:
+            logger.error(f"Error saving user {user.get('user_id')}: {str(e)}")
+            return False
+
     def hash_password(self, password):
         try:
-            return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+            return _hash_password((password, self.password_rounds))
         except Exception as e:
             logger.error(f"Error hashing password: {str(e)}")
             raise ValueError("Error processing password")
@@ -82,27 +192,21 @@ class UserManager:
             logger.error(f"Error checking password: {str(e)}")
             return False
 
+    def needs_rehash(self, hashed):
+        """Mật khẩu được băm với cost khác cấu hình hiện tại (tăng hoặc giảm) thì cần băm lại"""
+        return get_hash_rounds(hashed) != self.password_rounds
+
     def is_email_unique(self, email, user_id_to_exclude=None):
         if not email: # Empty email is considered unique in terms of not clashing
             return True
-        users = self.load_users()
-        for user in users:
-            if user.get('user_id') == user_id_to_exclude:
-                continue
-            if user.get('email') == email:
-                return False
-        return True
+        users = self._index()['email'].get(email, [])
+        return all(user.get('user_id') == user_id_to_exclude for user in users)
 
     def is_phone_unique(self, phone, user_id_to_exclude=None):
         if not phone: # Empty phone is considered unique
             return True
-        users = self.load_users()
-        for user in users:
-            if user.get('user_id') == user_id_to_exclude:
-                continue
-            if user.get('phone') == phone:
-                return False
-        return True
+        users = self._index()['phone'].get(phone, [])
+        return all(user.get('user_id') == user_id_to_exclude for user in users)
 
     def is_admin(self, user_id):
         """Kiểm tra xem user_id có phải là admin không"""
@@ -118,13 +222,10 @@ class UserManager:
             return None
             
         try:
-            users = self.load_users()
-            logger.debug(f"Searching for user '{username}' in {len(users)} users")
-            
-            for user in users:
-                if user['username'].lower() == username.lower():
-                    logger.debug(f"Found user: {user['username']}")
-                    return user
+            user = self._index()['username'].get(username.lower())
+            if user:
+                logger.debug(f"Found user: {user['username']}")
+                return user
                     
             logger.debug(f"User '{username}' not found")
             return None
@@ -134,6 +235,11 @@ class UserManager:
             return None
 
     def authenticate_user(self, username, password):
+        """Xác thực đăng nhập: một lần tra chỉ mục, kiểm tra bcrypt, ghi `last_login` bằng một upsert
+
+        Có thể gọi từ luồng nền (bcrypt chậm có chủ đích); bản ghi trả về là bản ghi dùng chung
+        trong data store nên người gọi dùng lại được, không cần đọc lại file.
+        """
         try:
             if not username or not password:
                 logger.warning("Empty username or password")
@@ -153,14 +259,15 @@ class UserManager:
                 logger.warning(f"Failed login attempt for user: {username}")
                 return {"status": "error", "message": "Sai tên đăng nhập hoặc mật khẩu."}
                 
-            # Update last login time
-            users = self.load_users()
-            for u in users:
-                if u['username'] == username:
-                    u['last_login'] = datetime.now().isoformat()
-                    break
-            self.save_users(users)
-            
+            # Đổi cost trong config thì băm lại mật khẩu ngay khi đăng nhập đúng (cùng một lần ghi)
+            if self.needs_rehash(user['password']):
+                user['password'] = self.hash_password(password)
+                logger.info(f"Rehashed password for user {username} with cost {self.password_rounds}")
+
+            # Update last login time (chỉ ghi bản ghi này; collection users dùng journal)
+            user['last_login'] = datetime.now().isoformat()
+            self.save_user(user)
+
             logger.info(f"Successful login for user: {username}")
             return {"status": "success", "user": user}
             
@@ -205,7 +312,7 @@ class UserManager:
             # If all validations pass, proceed to create user
             now = datetime.now().isoformat()
             user = {
-                "user_id": generate_id("user", users),
+                "user_id": self.store.next_id(self.collection, "user"),
                 "username": username,
                 "password": self.hash_password(password), # hash_password can raise ValueError if processing fails
                 "full_name": full_name,
@@ -222,7 +329,7 @@ class UserManager:
             }
             
             users.append(user)
-            if self.save_users(users):
+            if self.save_user(user, users):
                 logger.info(f"Added new user: {username}")
                 # Return success dictionary with user data
                 return {"status": "success", "user": user}
@@ -239,17 +346,95 @@ class UserManager:
             # Return a generic system error message
             return {"status": "error", "message": "Đã xảy ra lỗi hệ thống khi thêm người dùng."}
 
+    def add_users(self, rows, progress=None, workers=None):
+        """Thêm nhiều người dùng một lần (nhập hàng loạt)
+
+        Kiểm tra từng dòng như add_user, băm mật khẩu song song trên process pool,
+        cấp ID theo khối và ghi xuống backend một lần.
+
+        Args:
+            rows (list): Các dict có username, password và các trường tùy chọn như add_user
+            progress (callable, optional): progress(đã_xong, tổng) trong lúc băm mật khẩu
+            workers (int, optional): Số tiến trình băm song song
+
+        Returns:
+            dict: {"status", "added": [user...], "errors": [(vị_trí_dòng, thông_báo)...]}
+        """
+        index = self._index()
+        taken = {'username': set(), 'email': set(), 'phone': set()}
+        valid, errors = [], []
+        for position, row in enumerate(rows):
+            username = (row.get('username') or '').strip()
+            password = row.get('password') or ''
+            email = row.get('email', '')
+            phone = row.get('phone', '')
+            if not username or not password:
+                errors.append((position, "Tên đăng nhập và mật khẩu không được để trống."))
+            elif username.lower() in index['username'] or username.lower() in taken['username']:
+                errors.append((position, "Tên người dùng đã tồn tại."))
+            elif not is_strong_password(password):
+                errors.append((position, "Mật khẩu yếu. Phải gồm chữ hoa, thường, số và ký tự đặc biệt, ít nhất 8 ký tự."))
+            elif email and not is_valid_email(email):
+                errors.append((position, "Định dạng email không hợp lệ."))
+            elif email and (email in index['email'] or email in taken['email']):
+                errors.append((position, "Địa chỉ email đã được sử dụng."))
+            elif phone and not is_valid_phone(phone):
+                errors.append((position, "Định dạng số điện thoại không hợp lệ. (VD: 10-11 số)"))
+            elif phone and (phone in index['phone'] or phone in taken['phone']):
+                errors.append((position, "Số điện thoại đã được sử dụng."))
+            else:
+                taken['username'].add(username.lower())
+                if email:
+                    taken['email'].add(email)
+                if phone:
+                    taken['phone'].add(phone)
+                valid.append((username, password, row))
+
+        if not valid:
+            return {"status": "error" if errors else "success", "added": [], "errors": errors}
+
+        try:
+            hashes = hash_passwords([password for _, password, _ in valid], self.password_rounds, workers, progress)
+        except Exception as e:
+            logger.error(f"Error hashing passwords for bulk add: {str(e)}")
+            return {"status": "error", "added": [], "errors": errors + [(None, "Lỗi khi xử lý mật khẩu.")]}
+
+        now = datetime.now().isoformat()
+        user_ids = self.store.allocate_ids(self.collection, "user", len(valid))
+        added = []
+        for user_id, hashed, (username, _, row) in zip(user_ids, hashes, valid):
+            added.append({
+                "user_id": user_id,
+                "username": username,
+                "password": hashed,
+                "full_name": row.get('full_name', ''),
+                "email": row.get('email', ''),
+                "phone": row.get('phone', ''),
+                "is_admin": bool(row.get('is_admin', False)),
+                "is_active": True,
+                "created_at": now,
+                "updated_at": now,
+                "last_login": None,
+                "avatar": None,
+                "date_of_birth": row.get('date_of_birth', ''),
+                "address": row.get('address', '')
+            })
+
+        users = self.load_users()
+        users.extend(added)
+        if not self.store.upsert_many(self.collection, added):
+            logger.error(f"Failed to save {len(added)} imported users")
+            return {"status": "error", "added": [], "errors": errors + [(None, "Lỗi khi lưu dữ liệu người dùng.")]}
+        logger.info(f"Added {len(added)} users in bulk ({len(errors)} rows rejected)")
+        return {"status": "success", "added": added, "errors": errors}
+
     def update_user(self, user_id, **kwargs):
         try:
             if not user_id:
                 raise ValueError("User ID is required")
                 
             users = self.load_users()
-            user_to_update = None
-            for u in users:
-                if u['user_id'] == user_id:
-                    user_to_update = u
-                    break
+            user_to_update = self.get_user_by_id(user_id)
             
             if not user_to_update:
                 # This case should ideally not happen if user_id is always valid when called
@@ -290,7 +475,7 @@ class UserManager:
                             
             if user_data_changed:
                 user_to_update['updated_at'] = datetime.now().isoformat()
-                if self.save_users(users):
+                if self.save_user(user_to_update, users):
                     logger.info(f"Updated user: {user_id}")
                     return True # Successfully updated
                 else:
@@ -317,7 +502,7 @@ class UserManager:
             for i, user in enumerate(users):
                 if user['user_id'] == user_id:
                     del users[i]
-                    if self.save_users(users):
+                    if self.store.delete(self.collection, user_id):
                         logger.info(f"Deleted user: {user_id}")
                         return True
                         
@@ -331,14 +516,13 @@ class UserManager:
         try:
             users = self.load_users()
             user_updated = False
-            for user in users:
-                if user['user_id'] == user_id:
-                    user['is_active'] = not lock
-                    user['updated_at'] = datetime.now().isoformat()
-                    user_updated = True
-                    break
+            user = self.get_user_by_id(user_id)
+            if user:
+                user['is_active'] = not lock
+                user['updated_at'] = datetime.now().isoformat()
+                user_updated = self.save_user(user, users)
             
-            if user_updated and self.save_users(users):
+            if user_updated:
                 logger.info(f"User {user_id} lock status set to {lock}")
                 return True
             logger.warning(f"User {user_id} not found or failed to update lock status.")
@@ -358,18 +542,15 @@ class UserManager:
                 return {"status": "error", "message": "Mật khẩu yếu. Phải gồm chữ hoa, thường, số và ký tự đặc biệt, ít nhất 8 ký tự."}
 
             users = self.load_users()
-            user_found = False
-            for user in users:
-                if user['user_id'] == user_id:
-                    user['password'] = self.hash_password(new_password)
-                    user['updated_at'] = datetime.now().isoformat()
-                    user_found = True
-                    break
+            user_found = self.get_user_by_id(user_id)
+            if user_found:
+                user_found['password'] = self.hash_password(new_password)
+                user_found['updated_at'] = datetime.now().isoformat()
             
             if not user_found:
                 return {"status": "error", "message": "User not found."}
 
-            if self.save_users(users):
+            if self.save_user(user_found, users):
                 logger.info(f"Admin reset password for user: {user_id}")
                 return {"status": "success", "message": "Password reset successfully."}
             else:
@@ -386,7 +567,7 @@ class UserManager:
                     raise ValueError("Mật khẩu mới không đủ mạnh.")
                 user['password'] = self.hash_password(new_password)
                 user['updated_at'] = datetime.now().isoformat()
-                self.save_users(users)
+                self.save_user(user, users)
                 print("Đổi mật khẩu thành công.")
                 return True
         raise ValueError("Sai mật khẩu cũ hoặc người dùng không tồn tại.")
@@ -397,7 +578,7 @@ class UserManager:
             if user['username'] == username:
                 user['is_active'] = False
                 user['updated_at'] = datetime.now().isoformat()
-                self.save_users(users)
+                self.save_user(user, users)
                 print("Tài khoản đã được tắt.")
                 return True
         raise ValueError("Không tìm thấy người dùng để tắt.")
@@ -408,7 +589,7 @@ class UserManager:
             if user['username'] == username:
                 user['is_active'] = True
                 user['updated_at'] = datetime.now().isoformat()
-                self.save_users(users)
+                self.save_user(user, users)
                 print("Tài khoản đã được kích hoạt.")
                 return True
         raise ValueError("Không tìm thấy người dùng để kích hoạt.")
@@ -428,7 +609,7 @@ class UserManager:
                 if address is not None:
                     user['address'] = address
                 user['updated_at'] = datetime.now().isoformat()
-                self.save_users(users)
+                self.save_user(user, users)
                 print("Thông tin người dùng đã được cập nhật.")
                 return True
         raise ValueError("Không tìm thấy người dùng để cập nhật thông tin.")
@@ -438,11 +619,7 @@ class UserManager:
         return [user for user in users if user['is_active']] if active_only else users
 
     def get_user_by_id(self, user_id):
-        users = self.load_users()
-        for user in users:
-            if user['user_id'] == user_id:
-                return user
-        return None  # Thay đổi để trả về None thay vì raise ValueError
+        return self._index()['user_id'].get(user_id)  # Trả về None thay vì raise ValueError
 
     def get_user_avatar(self, username):
         user = self.find_user_by_username(username)
@@ -456,25 +633,30 @@ class UserManager:
             if user['username'] == username:
                 user['avatar'] = avatar_path
                 user['updated_at'] = datetime.now().isoformat()
-                self.save_users(users)
+                self.save_user(user, users)
                 print("Ảnh đại diện đã được cập nhật.")
                 return True
         raise ValueError("Không tìm thấy người dùng để cập nhật ảnh đại diện.")
 
-    def reset_all_passwords(self, new_password="123456aA@"):
-        """Reset mật khẩu của tất cả users thành mật khẩu mặc định"""
+    def reset_all_passwords(self, new_password="123456aA@", progress=None, workers=None):
+        """Reset mật khẩu của tất cả users thành mật khẩu mặc định
+
+        Args:
+            progress (callable, optional): progress(đã_xong, tổng) trong lúc băm
+            workers (int, optional): Số tiến trình băm song song
+        """
         if not is_strong_password(new_password): # Use imported function
             raise ValueError("Mật khẩu mới không đủ mạnh")
             
         users = self.load_users()
-        updated_count = 0
-        
-        for user in users:
-            user['password'] = self.hash_password(new_password)
-            user['updated_at'] = datetime.now().isoformat()
-            updated_count += 1
+        hashes = hash_passwords([new_password] * len(users), self.password_rounds, workers, progress)
+        now = datetime.now().isoformat()
+        for user, hashed in zip(users, hashes):
+            user['password'] = hashed
+            user['updated_at'] = now
             
         self.save_users(users)
+        updated_count = len(users)
         print(f"Đã reset mật khẩu cho {updated_count} tài khoản")
-        return updated_count        
+        return updated_count
 # Reset tất cả về 123456aA@  
\ No newline at end of file
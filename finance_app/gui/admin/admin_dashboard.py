@@ -52,30 +52,15 @@ class AdminDashboard(BaseDashboard):
             }
         ]
         
-    def create_pages(self):
-        """Create admin dashboard pages"""
-        # Statistics page
-        self.statistics_page = AdminStatisticsPage(self)
-        self.stack.addWidget(self.statistics_page)
-        
-        # Users page
-        self.users_page = AdminUsersPage(self)
-        self.stack.addWidget(self.users_page)
-        
-        # Categories page
-        self.categories_page = AdminCategoriesPage(self)
-        self.stack.addWidget(self.categories_page)
-        
-        # Settings page
-        self.settings_page = AdminSettingsPage(self)
-        self.stack.addWidget(self.settings_page)
-        
-        # Profile page
-        self.profile_page = AdminProfilePage(self)
-        self.stack.addWidget(self.profile_page)
-        
-        # Show default page
-        self.show_page('statistics')
+    def get_page_classes(self):
+        """Get admin dashboard pages (built on first navigation)"""
+        return {
+            'statistics': AdminStatisticsPage,
+            'users': AdminUsersPage,
+            'categories': AdminCategoriesPage,
+            'settings': AdminSettingsPage,
+            'profile': AdminProfilePage
+        }
         
     def get_dashboard_title(self):
         """Get dashboard title"""
@@ -87,36 +72,14 @@ class AdminDashboard(BaseDashboard):
         Args:
             user_data (dict): User data dictionary
         """
-        super().set_current_user(user_data)
-        
-        if self.current_user_id:
-            # Propagate current_user_id to all managers
-            self.user_manager.set_current_user(self.current_user_id)
-            self.category_manager.set_current_user(self.current_user_id)
-            self.budget_manager.set_current_user(self.current_user_id)
-            self.transaction_manager.set_current_user(self.current_user_id)
-            self.notification_manager.set_current_user(self.current_user_id)
+        user_id = user_data.get('user_id') if user_data else None
+        if user_id:
+            # Propagate current_user_id to all managers before any page loads its data
+            self.user_manager.set_current_user(user_id)
+            self.category_manager.set_current_user(user_id)
+            self.budget_manager.set_current_user(user_id)
+            self.transaction_manager.set_current_user(user_id)
+            self.notification_manager.set_current_user(user_id)
         
-        # Update pages with user data
-        self.profile_page.update_user_info(user_data)
-        self.statistics_page.refresh_data()
-        self.users_page.refresh_data()
-        self.categories_page.refresh_data()
-        
-    def refresh_data(self):
-        """Refresh all dashboard data"""
-        if not self.current_user_id:
-            return
-            
-        try:
-            # Refresh all pages
-            self.statistics_page.refresh_data()
-            self.users_page.refresh_data()
-            self.categories_page.refresh_data()
-            self.settings_page.refresh_data()
-            
-        except Exception as e:
-            self.show_error(
-                "Lỗi",
-                f"Không thể tải dữ liệu: {str(e)}"
-            )
\ No newline at end of file
+        # Only the visible page is refreshed; the others refresh when first shown
+        super().set_current_user(user_data)
@@ -202,7 +202,7 @@ class UserDetailsDialog(QDialog, BaseWidget):
             user_id = self.user_data.get('user_id')
             
             # Get transaction statistics
-            transactions = self.parent.parent.transaction_manager.get_user_transactions(user_id)
+            transactions = self.parent.parent.transaction_manager.get_user_transactions(user_id, is_admin=True)
             if self.total_transactions_value_label: self.total_transactions_value_label.setText(str(len(transactions)))
             
             # Get budget statistics
@@ -216,13 +216,15 @@ class UserDetailsDialog(QDialog, BaseWidget):
             if self.total_categories_value_label: self.total_categories_value_label.setText(str(len(categories)))
             
             # Update statistics panel
-            self.stats_panel.update_data(user_id)
+            self.stats_panel.update_data(
+                transactions, self.parent.parent.budget_manager.with_spending(budgets)
+            )
             
             # Update budget chart
             self.budget_chart.update_data(user_id)
             
             # Update transactions table
-            self.transactions_table.load_transactions(user_id)
+            self.transactions_table.update_transactions(transactions)
             
         except Exception as e:
             # Use a generic message box method if available, or print
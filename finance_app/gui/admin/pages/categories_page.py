@@ -9,6 +9,8 @@ from finance_app.gui.base.base_widget import BaseWidget
 import functools
 
 class AdminCategoriesPage(BaseWidget):
+    data_collections = ('categories',)
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.parent = parent
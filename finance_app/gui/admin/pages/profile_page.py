@@ -6,6 +6,8 @@ import os
 import shutil
 
 class AdminProfilePage(QWidget):
+    data_collections = ('users',)
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.parent = parent
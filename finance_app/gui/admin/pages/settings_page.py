@@ -5,6 +5,8 @@ from PyQt5.QtCore import Qt
 from finance_app.gui.base.base_widget import BaseWidget
 
 class AdminSettingsPage(BaseWidget):
+    data_collections = ('settings',)
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.parent = parent
@@ -30,6 +30,8 @@ class StatCard(QFrame):
         self.setLayout(layout)
         
 class AdminStatisticsPage(BaseWidget):
+    data_collections = ('users', 'transactions', 'budgets', 'categories', 'notifications')
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.parent = parent
@@ -85,32 +87,34 @@ class AdminStatisticsPage(BaseWidget):
         self.setLayout(layout)
         
     def refresh_data(self):
-        """Refresh statistics data"""
+        """Refresh statistics data (queried off the GUI thread)"""
         if not self.parent or not self.parent.current_user_id:
             return
             
-        try:
-            # Get user statistics
-            users = self.parent.user_manager.get_all_users()
-            active_users = [u for u in users if u.get('is_active', True)]
-            self.total_users_card.value_label.setText(str(len(users)))
-            self.active_users_card.value_label.setText(str(len(active_users)))
-            
-            # Get transaction statistics
-            transactions = self.parent.transaction_manager.get_all_transactions()
-            self.total_transactions_card.value_label.setText(str(len(transactions)))
-            
-            # Get budget statistics
-            budgets = self.parent.budget_manager.get_all_budgets()
-            self.total_budgets_card.value_label.setText(str(len(budgets)))
-            
-            # Get category statistics
-            categories = self.parent.category_manager.get_all_categories()
-            self.categories_label.setText(f"Tổng số danh mục: {len(categories)}")
-            
-            # Get notification statistics
-            notifications = self.parent.notification_manager.get_all_notifications()
-            self.notifications_label.setText(f"Tổng số thông báo: {len(notifications)}")
-            
-        except Exception as e:
-            print(f"Error refreshing statistics: {e}")
\ No newline at end of file
+        self.load_async(
+            self.fetch_statistics,
+            self.apply_statistics,
+            lambda message: print(f"Error refreshing statistics: {message}")
+        )
+        
+    def fetch_statistics(self):
+        """Count users, transactions, budgets, categories and notifications (runs on a worker thread)"""
+        # Get user statistics
+        users = self.parent.user_manager.get_all_users()
+        return {
+            'users': len(users),
+            'active_users': len([u for u in users if u.get('is_active', True)]),
+            'transactions': len(self.parent.transaction_manager.get_all_transactions()),
+            'budgets': len(self.parent.budget_manager.get_all_budgets()),
+            'categories': len(self.parent.category_manager.get_all_categories()),
+            'notifications': len(self.parent.notification_manager.get_all_notifications()),
+        }
+        
+    def apply_statistics(self, stats):
+        """Show fetched statistics (runs on the GUI thread)"""
+        self.total_users_card.value_label.setText(str(stats['users']))
+        self.active_users_card.value_label.setText(str(stats['active_users']))
+        self.total_transactions_card.value_label.setText(str(stats['transactions']))
+        self.total_budgets_card.value_label.setText(str(stats['budgets']))
+        self.categories_label.setText(f"Tổng số danh mục: {stats['categories']}")
+        self.notifications_label.setText(f"Tổng số thông báo: {stats['notifications']}")
@@ -11,6 +11,8 @@ from finance_app.gui.base.base_widget import BaseWidget
 import functools
 
 class AdminUsersPage(BaseWidget):
+    data_collections = ('users',)
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.parent = parent
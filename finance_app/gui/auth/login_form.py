@@ -5,13 +5,18 @@ from PyQt5.QtCore import Qt, pyqtSignal
 from PyQt5.QtGui import QIcon
 import os
 from finance_app.data_manager.user_manager import UserManager
+from finance_app.gui.base.data_loader import DataLoader
 
 class LoginForm(QDialog):
-    login_success = pyqtSignal(str)
+    # Emits the authenticated user record so the caller does not look it up again
+    login_success = pyqtSignal(object)
 
     def __init__(self, parent=None):
         super().__init__(parent)
         self.user_manager = UserManager()
+        # bcrypt is deliberately slow; run it off the GUI thread so the form stays responsive
+        self.loader = DataLoader(self)
+        self.loader.loading_changed.connect(self.set_busy)
         self.init_ui()
 
     def init_ui(self):
@@ -153,6 +158,8 @@ class LoginForm(QDialog):
             self.toggle_password_action.setIcon(QIcon(self.get_asset_path('eye_closed.png')))
 
     def handle_login(self):
+        if self.loader.is_loading():
+            return
         username = self.username_input.text().strip()
         password = self.password_input.text()
 
@@ -160,13 +167,37 @@ class LoginForm(QDialog):
             QMessageBox.warning(self, "Thiếu thông tin", "Vui lòng nhập đầy đủ tên đăng nhập và mật khẩu")
             return
 
-        result = self.user_manager.authenticate_user(username, password)
+        self.loader.load(
+            lambda: self.user_manager.authenticate_user(username, password),
+            self.on_authenticated,
+            self.on_authentication_error
+        )
+
+    def on_authenticated(self, result):
         if result.get("status") == "success":
-            self.login_success.emit(result["user"]["user_id"])
+            self.login_success.emit(result["user"])
             self.accept()
         else:
             QMessageBox.critical(self, "Đăng nhập thất bại", result.get("message", "Tên đăng nhập hoặc mật khẩu không đúng"))
 
+    def on_authentication_error(self, message):
+        QMessageBox.critical(self, "Đăng nhập thất bại", message)
+
+    def set_busy(self, busy):
+        """Lock the inputs while credentials are being checked"""
+        for widget in (self.username_input, self.password_input, self.login_button, self.register_button):
+            widget.setEnabled(not busy)
+        self.login_button.setText("Đang đăng nhập..." if busy else "Đăng nhập")
+        if busy:
+            self.setCursor(Qt.WaitCursor)
+        else:
+            self.unsetCursor()
+
+    def reject(self):
+        # Closing the form while a check is running drops its result
+        self.loader.cancel()
+        super().reject()
+
     def show_register_form(self):
         from finance_app.gui.auth.register_form import RegisterForm
         register_form = RegisterForm(self)
@@ -4,6 +4,7 @@ from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QIcon
 from finance_app.gui.base.base_form import BaseForm
 from finance_app.gui.base.base_widget import BaseWidget
+from finance_app.data_manager.data_store import get_data_store
 import os
 
 class BaseDashboard(BaseForm, BaseWidget):
@@ -11,6 +12,10 @@ class BaseDashboard(BaseForm, BaseWidget):
         super().__init__(parent)
         self.current_user = None
         self.current_user_id = None
+        self.current_page = None
+        self.pages = {}
+        # page name -> data store versions of the page's collections at its last refresh
+        self._page_versions = {}
         self.init_ui()
         
     def init_ui(self):
@@ -150,12 +155,9 @@ class BaseDashboard(BaseForm, BaseWidget):
         content_layout = QVBoxLayout()
         content_layout.setContentsMargins(30, 30, 30, 30)
         
-        # Create stacked widget for different pages
+        # Create stacked widget for different pages (pages are added on first navigation)
         self.stack = QStackedWidget()
         
-        # Create pages
-        self.create_pages()
-        
         content_layout.addWidget(self.stack)
         content_area.setLayout(content_layout)
         
@@ -203,6 +205,9 @@ class BaseDashboard(BaseForm, BaseWidget):
     def show_page(self, page_name):
         """Show the selected page and update navigation buttons
         
+        The page is built on first navigation and only refreshed when it has never
+        been loaded or the data it displays changed since its last refresh.
+        
         Args:
             page_name (str): Name of the page to show
         """
@@ -213,17 +218,70 @@ class BaseDashboard(BaseForm, BaseWidget):
         # Check the selected button and show page
         if page_name in self.nav_buttons:
             self.nav_buttons[page_name].setChecked(True)
-            # Assuming the order in nav_buttons keys matches stack widget indices
             try:
-                page_index = list(self.nav_buttons.keys()).index(page_name)
-                self.stack.setCurrentIndex(page_index)
-                current_widget = self.stack.widget(page_index) # Use widget(index) for safety
-                if hasattr(current_widget, 'refresh_data'):
-                    current_widget.refresh_data()
-            except ValueError:
-                print(f"Error: Page '{page_name}' not found in nav_buttons keys for indexing.")
+                page = self.get_page(page_name)
+                if page is None:
+                    print(f"Error: Page '{page_name}' is not registered in get_page_classes.")
+                    return
+                self.current_page = page_name
+                self.stack.setCurrentWidget(page)
+                if self.is_page_stale(page_name):
+                    self.refresh_page(page_name)
             except Exception as e:
                 print(f"Error showing page {page_name}: {e}")
+                
+    def get_page(self, page_name):
+        """Return the page widget, building it on first use
+        
+        Args:
+            page_name (str): Name of the page (a key of get_page_classes)
+        """
+        page = self.pages.get(page_name)
+        if page is None:
+            page_class = self.get_page_classes().get(page_name)
+            if page_class is None:
+                return None
+            page = page_class(self)
+            self.pages[page_name] = page
+            setattr(self, f"{page_name}_page", page)
+            self.stack.addWidget(page)
+        return page
+        
+    def _data_versions(self, page):
+        # Pages that do not declare their collections are refreshed every time they are shown
+        collections = getattr(page, 'data_collections', None)
+        if collections is None:
+            return None
+        store = get_data_store()
+        # A collection not loaded yet counts as version 0: the page's own fetch loads it
+        return tuple(store.version(collection) or 0 for collection in collections)
+        
+    def is_page_stale(self, page_name):
+        """Whether the page must be refreshed before it is shown"""
+        if page_name not in self._page_versions:
+            return True
+        versions = self._data_versions(self.pages[page_name])
+        return versions is None or versions != self._page_versions[page_name]
+        
+    def refresh_page(self, page_name):
+        """Refresh a built page and remember the data versions it was loaded from"""
+        page = self.pages.get(page_name)
+        if page is None:
+            return
+        self._page_versions[page_name] = self._data_versions(page)
+        if hasattr(page, 'schedule_refresh'):
+            # Coalesced with any other refresh requested in the same event loop pass
+            page.schedule_refresh()
+        elif hasattr(page, 'refresh_data'):
+            page.refresh_data()
+            
+    def mark_dirty(self, *page_names):
+        """Mark pages (all pages if none given) for refresh; the visible page refreshes now"""
+        names = page_names or list(self.pages)
+        for name in names:
+            self._page_versions.pop(name, None)
+        if self.current_page in names and self.current_page in self.pages:
+            self.refresh_page(self.current_page)
             
     def set_current_user(self, user_data):
         """Set the current user and load their data
@@ -246,8 +304,13 @@ class BaseDashboard(BaseForm, BaseWidget):
             self.parent.show_login_frame()
             
     def refresh_data(self):
-        """Refresh dashboard data"""
-        pass
+        """Refresh dashboard data
+        
+        Every page is marked dirty but only the visible (or default) page is loaded;
+        the others refresh when they are next shown.
+        """
+        self.mark_dirty()
+        self.show_page(self.current_page or self.get_default_page())
         
     def get_nav_items(self):
         """Get navigation items
@@ -257,9 +320,25 @@ class BaseDashboard(BaseForm, BaseWidget):
         """
         return []
         
-    def create_pages(self):
-        """Create dashboard pages"""
-        pass
+    def get_page_classes(self):
+        """Get dashboard page classes
+        
+        A page class may set `data_collections` to the data store collections it
+        displays; it is then only refreshed on show when one of them changed.
+        
+        Returns:
+            dict: Page name -> page class, instantiated with the dashboard as parent on first navigation
+        """
+        return {}
+        
+    def get_default_page(self):
+        """Get the page shown after login
+        
+        Returns:
+            str: Page name
+        """
+        items = self.get_nav_items()
+        return items[0]['page'] if items else None
         
     def get_dashboard_title(self):
         """Get dashboard title
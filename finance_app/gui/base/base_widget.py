@@ -1,8 +1,9 @@
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, 
                              QLineEdit, QPushButton, QFrame, QSpacerItem,
                              QSizePolicy)
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QTimer
 from PyQt5.QtGui import QIcon, QFont
+from finance_app.gui.base.data_loader import DataLoader
 import os
 
 class BaseWidget(QWidget):
@@ -197,6 +198,40 @@ class BaseWidget(QWidget):
         label.setStyleSheet(f"color: {color};")
         return label
 
+    def load_async(self, fetch, on_result, on_error=None):
+        """Run a data query off the GUI thread and apply its result when ready
+        
+        A newer call supersedes a pending one, so only the latest result is applied.
+        
+        Args:
+            fetch (callable): Data query run on a worker thread (must not touch widgets)
+            on_result (callable): Called on the GUI thread with fetch()'s result
+            on_error (callable, optional): Called on the GUI thread with the error message
+        """
+        if getattr(self, '_data_loader', None) is None:
+            self._data_loader = DataLoader(self)
+            self._data_loader.loading_changed.connect(self.set_loading)
+        return self._data_loader.load(fetch, on_result, on_error)
+        
+    def schedule_refresh(self):
+        """Request a refresh_data() on the next event loop pass
+        
+        Several invalidations in the same pass (filter change, edit, dashboard
+        refresh...) are coalesced into a single refresh.
+        """
+        if getattr(self, '_refresh_timer', None) is None:
+            self._refresh_timer = QTimer(self)
+            self._refresh_timer.setSingleShot(True)
+            self._refresh_timer.timeout.connect(self.refresh_data)
+        self._refresh_timer.start(0)
+        
+    def set_loading(self, loading):
+        """Show or clear the loading state while a background query runs"""
+        if loading:
+            self.setCursor(Qt.BusyCursor)
+        else:
+            self.unsetCursor()
+            
     def get_asset_path(self, asset_name):
         """
         Constructs an absolute path to an asset in the 'assets' directory.
@@ -0,0 +1,105 @@
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal, pyqtSlot
+from finance_app.data_manager.data_store import get_data_store
+
+
+class _LoadSignals(QObject):
+    # Created on the GUI thread, so emits from the worker are queued back to it
+    finished = pyqtSignal(int, object)
+    failed = pyqtSignal(int, str)
+
+
+class _LoadTask(QRunnable):
+    def __init__(self, generation, fetch, hold_lock=False):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.generation = generation
+        self.fetch = fetch
+        self.hold_lock = hold_lock
+        self.signals = _LoadSignals()
+
+    def run(self):
+        try:
+            if self.hold_lock:
+                # Only for fetches that cannot take the lock in short steps themselves
+                with get_data_store().lock:
+                    result = self.fetch()
+            else:
+                result = self.fetch()
+        except Exception as e:
+            self.signals.failed.emit(self.generation, str(e))
+        else:
+            self.signals.finished.emit(self.generation, result)
+
+
+class DataLoader(QObject):
+    """Run page data queries on a thread pool and deliver results on the GUI thread.
+
+    Every call to load() starts a new generation: a request that has not started yet
+    is taken off the pool, and results of superseded requests are dropped.
+    """
+
+    loading_changed = pyqtSignal(bool)
+
+    def __init__(self, parent=None, pool=None):
+        super().__init__(parent)
+        self.pool = pool or QThreadPool.globalInstance()
+        self.generation = 0
+        self._tasks = {}
+        self._callbacks = None
+
+    def is_loading(self):
+        return self._callbacks is not None
+
+    def load(self, fetch, on_result, on_error=None, hold_lock=False):
+        """Run fetch() in the background and pass its result to on_result(result)
+
+        Args:
+            fetch (callable): Pure data query; must not touch widgets
+            on_result (callable): Called on the GUI thread with the result
+            on_error (callable, optional): Called on the GUI thread with the error message
+            hold_lock (bool): Run the whole fetch under the data store lock. Off by default:
+                manager reads take the lock only around their own multi-step sections, so a
+                long fetch (bcrypt, recurring catch-up, export) never blocks GUI-thread writes
+        """
+        was_loading = self.is_loading()
+        self.cancel(emit=False)
+        self.generation += 1
+        task = _LoadTask(self.generation, fetch, hold_lock)
+        task.signals.finished.connect(self._on_finished)
+        task.signals.failed.connect(self._on_failed)
+        self._tasks[self.generation] = task
+        self._callbacks = (on_result, on_error)
+        if not was_loading:
+            self.loading_changed.emit(True)
+        self.pool.start(task)
+        return self.generation
+
+    def cancel(self, emit=True):
+        """Drop the current request (its result will be ignored)"""
+        for generation, task in list(self._tasks.items()):
+            if self.pool.tryTake(task):
+                del self._tasks[generation]
+        if self._callbacks is not None:
+            self._callbacks = None
+            if emit:
+                self.loading_changed.emit(False)
+
+    def _take(self, generation):
+        self._tasks.pop(generation, None)
+        if generation != self.generation or self._callbacks is None:
+            return None
+        callbacks, self._callbacks = self._callbacks, None
+        self.loading_changed.emit(False)
+        return callbacks
+
+    @pyqtSlot(int, object)
+    def _on_finished(self, generation, result):
+        callbacks = self._take(generation)
+        if callbacks:
+            callbacks[0](result)
+
+    @pyqtSlot(int, str)
+    def _on_failed(self, generation, message):
+        callbacks = self._take(generation)
+        if callbacks and callbacks[1]:
+            callbacks[1](message)
@@ -1,6 +1,6 @@
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel,
                              QComboBox, QDateEdit, QPushButton)
-from PyQt5.QtCore import Qt, QDate, pyqtSignal
+from PyQt5.QtCore import Qt, QDate, QTimer, pyqtSignal
 from datetime import datetime, timedelta
 import calendar
 import os
@@ -8,12 +8,20 @@ import os
 class PeriodFilter(QWidget):
     """Widget for filtering data by time period"""
     
-    # Signal emitted when filter changes
+    # Signal emitted when filter changes (debounced: once the user stops editing)
     filter_changed = pyqtSignal(QDate, QDate)
     
+    # Quiet period before a change is emitted, so scrubbing a date fires a single signal
+    DEBOUNCE_MS = 300
+    
     def __init__(self, parent=None):
         super().__init__(parent)
         self._block_recursion = False
+        self._last_emitted = None
+        self._emit_timer = QTimer(self)
+        self._emit_timer.setSingleShot(True)
+        self._emit_timer.setInterval(self.DEBOUNCE_MS)
+        self._emit_timer.timeout.connect(self._emit_filter_changed)
         # Attempt to get a base path for assets, assuming this file is in a subdirectory of 'gui'
         try:
             # finance_app/gui/components/period_filter.py -> finance_app/gui
@@ -116,6 +124,9 @@ class PeriodFilter(QWidget):
         
         # Set initial period
         self.period_combo.setCurrentIndex(2)  # "Tháng này"
+        # The initial range is not a change: owners read it with get_date_range()
+        self._emit_timer.stop()
+        self._last_emitted = self.get_date_range()
         
     def _handle_period_selection_change(self, index):
         """Handle period selection change from the QComboBox."""
@@ -146,7 +157,7 @@ class PeriodFilter(QWidget):
                 start_dt = today.replace(month=1, day=1)
                 end_dt = today.replace(month=12, day=31)
             elif index == 5:  # Tùy chọn
-                self.filter_changed.emit(self.start_date_edit.date(), self.end_date_edit.date())
+                self._schedule_emit()
                 return
             else: # Should not happen
                 return
@@ -161,7 +172,7 @@ class PeriodFilter(QWidget):
                 self.start_date_edit.blockSignals(False)
                 self.end_date_edit.blockSignals(False)
                 
-                self.filter_changed.emit(self.start_date_edit.date(), self.end_date_edit.date())
+                self._schedule_emit()
         finally:
             self._block_recursion = False
             
@@ -177,9 +188,21 @@ class PeriodFilter(QWidget):
                 self.period_combo.setCurrentIndex(5)
                 self.period_combo.blockSignals(False)
             
-            self.filter_changed.emit(self.start_date_edit.date(), self.end_date_edit.date())
+            self._schedule_emit()
         finally:
             self._block_recursion = False
+            
+    def _schedule_emit(self):
+        """Restart the debounce timer; only the last change in a burst is emitted"""
+        self._emit_timer.start()
+        
+    def _emit_filter_changed(self):
+        date_range = self.get_date_range()
+        # Coalesce: a burst that ends on the range already emitted triggers nothing
+        if date_range == self._last_emitted:
+            return
+        self._last_emitted = date_range
+        self.filter_changed.emit(*date_range)
         
     def get_date_range(self):
         """Get selected date range
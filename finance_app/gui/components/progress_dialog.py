@@ -0,0 +1,68 @@
+from PyQt5.QtWidgets import QProgressDialog
+from PyQt5.QtCore import Qt, QEventLoop, pyqtSignal
+from finance_app.gui.base.data_loader import DataLoader
+
+
+class TaskProgressDialog(QProgressDialog):
+    """Cancellable progress dialog for a long job (export, import...) run on the thread pool
+
+    The job receives a progress(done, total) callback; the callback returns False once
+    the user pressed Cancel so the job can stop after its current chunk.
+    """
+
+    # Emitted from the worker thread, delivered on the GUI thread
+    progress_changed = pyqtSignal(int, int)
+
+    def __init__(self, label, parent=None):
+        super().__init__(label, "Hủy", 0, 0, parent)
+        self.setWindowTitle("Đang xử lý")
+        self.setWindowModality(Qt.WindowModal)
+        self.setMinimumDuration(300)
+        self.setAutoClose(False)
+        self.setAutoReset(False)
+        self.loader = DataLoader(self)
+        self.progress_changed.connect(self.on_progress)
+        self.canceled.connect(self.on_canceled)
+        self._cancelled = False
+        self._outcome = None
+        self._loop = None
+
+    def run(self, job):
+        """Run job(progress) in the background and wait for it without blocking the UI
+
+        Returns:
+            tuple: (result, error message or None, cancelled)
+        """
+        self._cancelled = False
+        self._outcome = (None, None)
+        self._loop = QEventLoop(self)
+        # The job locks the data store in short steps itself
+        self.loader.load(lambda: job(self.report_progress), self.on_finished, self.on_failed)
+        self._loop.exec_()
+        self._loop = None
+        self.reset()
+        result, error = self._outcome
+        return result, error, self._cancelled
+
+    def report_progress(self, done, total):
+        """Progress callback handed to the job (called on the worker thread)"""
+        self.progress_changed.emit(done, total)
+        return not self._cancelled
+
+    def on_progress(self, done, total):
+        if self._cancelled:
+            return
+        self.setMaximum(total)
+        self.setValue(done)
+
+    def on_canceled(self):
+        # The job stops at its next progress report; wait for it to clean up
+        self._cancelled = True
+
+    def on_finished(self, result):
+        self._outcome = (result, None)
+        self._loop.quit()
+
+    def on_failed(self, message):
+        self._outcome = (None, message)
+        self._loop.quit()
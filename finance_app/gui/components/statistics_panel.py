@@ -85,6 +85,59 @@ class StatisticsPanel(QWidget):
         
         return box
         
+    @staticmethod
+    def compute_statistics(transactions, budgets=None):
+        """Compute panel statistics from an already fetched result set (no extra query)
+
+        Args:
+            transactions (list): Transactions shown alongside the panel
+            budgets (list, optional): Budgets of the same period, as returned by
+                BudgetManager.with_spending (each carries its own spent_amount)
+
+        Returns:
+            dict: Statistics in the format expected by update_statistics
+        """
+        total_income = 0
+        total_expenses = 0
+        for transaction in transactions or []:
+            amount = transaction.get('amount', 0)
+            if transaction.get('type') == 'income':
+                total_income += amount
+            else:
+                total_expenses += amount
+
+        total_budget = 0
+        budget_spent = 0
+        near_limit = False
+        for budget in budgets or []:
+            limit = budget.get('amount', 0)
+            # Spend within the budget's own date window, not the whole filter period
+            spent = budget.get('spent_amount', 0)
+            total_budget += limit
+            budget_spent += spent
+            if limit and spent * 100 >= limit * budget.get('alert_threshold', 80):
+                near_limit = True
+
+        remaining_budget = total_budget - budget_spent
+        if remaining_budget < 0:
+            budget_status = 'Vượt ngân sách'
+        elif near_limit:
+            budget_status = 'Gần hạn mức'
+        else:
+            budget_status = 'Tốt'
+
+        return {
+            'net_worth': total_income - total_expenses,
+            'total_income': total_income,
+            'total_expenses': total_expenses,
+            'budget_status': budget_status,
+            'remaining_budget': remaining_budget
+        }
+
+    def update_data(self, transactions, budgets=None):
+        """Update the panel from the transactions (and budgets) the caller already loaded"""
+        self.update_statistics(self.compute_statistics(transactions, budgets))
+
     def update_statistics(self, stats):
         """Update statistics display with new data"""
         try:
@@ -0,0 +1,214 @@
+from PyQt5.QtWidgets import QStyledItemDelegate, QStyle
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QRect, QEvent, pyqtSignal
+from PyQt5.QtGui import QColor, QPainter, QFont
+
+# Dữ liệu hiển thị cho từng cột: key -> tiêu đề mặc định
+COLUMN_TITLES = {
+    'date': 'Ngày',
+    'date_dmy': 'Ngày',
+    'type': 'Loại',
+    'category': 'Danh mục',
+    'description': 'Mô tả',
+    'amount': 'Số tiền',
+    'tags': 'Ghi chú',
+    'budget': 'Ngân sách',
+    'actions': 'Thao tác',
+}
+
+TYPE_STYLES = {
+    'income': ('Thu nhập', '#27ae60', '#ebfaf0'),
+    'expense': ('Chi tiêu', '#e74c3c', '#fdf3f2'),
+}
+
+
+class TransactionTableModel(QAbstractTableModel):
+    """Model giao dịch cho QTableView.
+
+    Chỉ giữ tham chiếu tới danh sách giao dịch; chuỗi hiển thị được tạo khi view cần vẽ ô.
+    Các dòng được nạp dần theo từng lô (fetchMore) khi người dùng cuộn xuống.
+    """
+
+    TransactionRole = Qt.UserRole + 1
+    BATCH_SIZE = 200
+
+    def __init__(self, columns, parent=None):
+        """
+        Args:
+            columns (list): Danh sách key cột (xem COLUMN_TITLES) hoặc cặp (key, tiêu đề)
+        """
+        super().__init__(parent)
+        self.columns = [c if isinstance(c, tuple) else (c, COLUMN_TITLES[c]) for c in columns]
+        self.transactions = []
+        self.categories = {}
+        self.budgets = {}
+        self._loaded = 0
+
+    def set_transactions(self, transactions, categories=None, budgets=None):
+        """Thay toàn bộ dữ liệu (một lần reset model thay vì tạo lại từng ô)
+
+        Args:
+            categories (dict): {category_id: category} để hiển thị tên danh mục
+            budgets (dict): {budget_id: budget} để hiển thị tên ngân sách
+        """
+        self.beginResetModel()
+        self.transactions = transactions or []
+        self.categories = categories or {}
+        self.budgets = budgets or {}
+        self._loaded = min(len(self.transactions), self.BATCH_SIZE)
+        self.endResetModel()
+
+    def transaction_at(self, row):
+        return self.transactions[row] if 0 <= row < self._loaded else None
+
+    def column_of(self, key):
+        return next((i for i, (column_key, _) in enumerate(self.columns) if column_key == key), -1)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._loaded
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.columns)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self._loaded < len(self.transactions)
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return
+        count = min(self.BATCH_SIZE, len(self.transactions) - self._loaded)
+        if count <= 0:
+            return
+        self.beginInsertRows(QModelIndex(), self._loaded, self._loaded + count - 1)
+        self._loaded += count
+        self.endInsertRows()
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.columns[section][1]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or index.row() >= self._loaded:
+            return None
+        transaction = self.transactions[index.row()]
+        key = self.columns[index.column()][0]
+
+        if role == self.TransactionRole:
+            return transaction
+        if role == Qt.DisplayRole:
+            return self._display(transaction, key)
+        if role == Qt.TextAlignmentRole:
+            if key == 'amount':
+                return int(Qt.AlignRight | Qt.AlignVCenter)
+            if key in ('date', 'date_dmy', 'type', 'category'):
+                return int(Qt.AlignCenter)
+            return int(Qt.AlignLeft | Qt.AlignVCenter)
+        if role == Qt.ForegroundRole and key == 'amount':
+            return QColor(Qt.darkGreen) if transaction.get('type') == 'income' else QColor(Qt.red)
+        return None
+
+    def _display(self, transaction, key):
+        if key == 'date':
+            return transaction.get('date', '')
+        if key == 'date_dmy':
+            date = transaction.get('date', '')
+            return f"{date[8:10]}/{date[5:7]}/{date[:4]}" if len(date) >= 10 else date
+        if key == 'type':
+            return TYPE_STYLES.get(transaction.get('type'), TYPE_STYLES['expense'])[0]
+        if key == 'category':
+            category = self.categories.get(transaction.get('category_id'))
+            if category:
+                return category.get('name', '')
+            return transaction.get('category_name', 'Không phân loại')
+        if key == 'description':
+            return transaction.get('description', '')
+        if key == 'amount':
+            return f"{transaction.get('amount', 0):,.0f} đ"
+        if key == 'tags':
+            return ", ".join(transaction.get('tags') or [])
+        if key == 'budget':
+            budget = self.budgets.get(transaction.get('budget_id'))
+            return budget.get('name', '') if budget else ''
+        return ''
+
+
+class TypeBadgeDelegate(QStyledItemDelegate):
+    """Vẽ nhãn loại giao dịch (Thu nhập/Chi tiêu) thay vì tạo QLabel cho mỗi dòng"""
+
+    def paint(self, painter, option, index):
+        transaction = index.data(TransactionTableModel.TransactionRole) or {}
+        text, color, background = TYPE_STYLES.get(transaction.get('type'), TYPE_STYLES['expense'])
+        painter.save()
+        if option.state & QStyle.State_Selected:
+            painter.fillRect(option.rect, option.palette.highlight())
+        painter.setRenderHint(QPainter.Antialiasing)
+        font = QFont(option.font)
+        font.setBold(True)
+        painter.setFont(font)
+        width = painter.fontMetrics().horizontalAdvance(text) + 16
+        height = painter.fontMetrics().height() + 4
+        badge = QRect(0, 0, min(width, option.rect.width() - 4), height)
+        badge.moveCenter(option.rect.center())
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(QColor(background))
+        painter.drawRoundedRect(badge, 3, 3)
+        painter.setPen(QColor(color))
+        painter.drawText(badge, Qt.AlignCenter, text)
+        painter.restore()
+
+
+class ActionButtonsDelegate(QStyledItemDelegate):
+    """Vẽ các nút thao tác (Sửa/Xóa) và phát tín hiệu khi được bấm; không tạo widget nào"""
+
+    action_triggered = pyqtSignal(str, dict)
+
+    DEFAULT_ACTIONS = [
+        ('edit', 'Sửa', '#3498db'),
+        ('delete', 'Xóa', '#e74c3c'),
+    ]
+
+    def __init__(self, parent=None, actions=None):
+        super().__init__(parent)
+        self.actions = actions or self.DEFAULT_ACTIONS
+
+    def _button_rects(self, option):
+        metrics = option.fontMetrics
+        height = min(option.rect.height() - 6, metrics.height() + 10)
+        x = option.rect.left() + 5
+        top = option.rect.top() + (option.rect.height() - height) // 2
+        rects = []
+        for _, text, _ in self.actions:
+            width = metrics.horizontalAdvance(text) + 20
+            rects.append(QRect(x, top, width, height))
+            x += width + 5
+        return rects
+
+    def paint(self, painter, option, index):
+        painter.save()
+        if option.state & QStyle.State_Selected:
+            painter.fillRect(option.rect, option.palette.highlight())
+        painter.setRenderHint(QPainter.Antialiasing)
+        for rect, (_, text, color) in zip(self._button_rects(option), self.actions):
+            painter.setPen(Qt.NoPen)
+            painter.setBrush(QColor(color))
+            painter.drawRoundedRect(rect, 3, 3)
+            painter.setPen(QColor('white'))
+            painter.drawText(rect, Qt.AlignCenter, text)
+        painter.restore()
+
+    def sizeHint(self, option, index):
+        size = super().sizeHint(option, index)
+        rects = self._button_rects(option)
+        if rects:
+            size.setWidth(rects[-1].right() - option.rect.left() + 5)
+        return size
+
+    def editorEvent(self, event, model, option, index):
+        if event.type() == QEvent.MouseButtonRelease and event.button() == Qt.LeftButton:
+            for rect, (name, _, _) in zip(self._button_rects(option), self.actions):
+                if rect.contains(event.pos()):
+                    transaction = index.data(TransactionTableModel.TransactionRole)
+                    if transaction is not None:
+                        self.action_triggered.emit(name, transaction)
+                    return True
+        return super().editorEvent(event, model, option, index)
@@ -1,10 +1,10 @@
-from PyQt5.QtWidgets import (QTableWidget, QTableWidgetItem, QPushButton, 
-                           QHeaderView, QHBoxLayout, QWidget, QMessageBox, QLabel)
-from PyQt5.QtCore import Qt, pyqtSignal
-from datetime import datetime
+from PyQt5.QtWidgets import QTableView, QHeaderView, QMessageBox, QAbstractItemView
+from PyQt5.QtCore import pyqtSignal
 from finance_app.data_manager.category_manager import CategoryManager
+from finance_app.gui.components.transaction_model import (TransactionTableModel, TypeBadgeDelegate,
+                                                         ActionButtonsDelegate)
 
-class TransactionTable(QTableWidget):
+class TransactionTable(QTableView):
     transaction_updated = pyqtSignal()
     transaction_deleted = pyqtSignal()
     edit_transaction = pyqtSignal(dict)
@@ -12,16 +12,23 @@ class TransactionTable(QTableWidget):
     
     def __init__(self):
         super().__init__()
-        self.init_ui()
         self.transactions = []
         self.category_manager = CategoryManager()
+        self.init_ui()
         
     def init_ui(self):
-        # Set up table columns
-        self.setColumnCount(7)
-        self.setHorizontalHeaderLabels([
-            'Ngày', 'Loại', 'Danh mục', 'Mô tả', 'Số tiền', 'Ghi chú', 'Hành động'
-        ])
+        # Set up table columns (model/view: chỉ các dòng đang hiển thị mới được vẽ)
+        self.transaction_model = TransactionTableModel(
+            ['date', 'type', 'category', 'description', 'amount', 'tags', 'actions'], self
+        )
+        self.setModel(self.transaction_model)
+        self.setItemDelegateForColumn(self.transaction_model.column_of('type'), TypeBadgeDelegate(self))
+        self.actions_delegate = ActionButtonsDelegate(self)
+        self.actions_delegate.action_triggered.connect(self.handle_action)
+        self.setItemDelegateForColumn(self.transaction_model.column_of('actions'), self.actions_delegate)
+        self.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.verticalHeader().setDefaultSectionSize(36)
 
         # Set column widths
         header = self.horizontalHeader()
@@ -35,7 +42,7 @@ class TransactionTable(QTableWidget):
 
         # Style the table
         self.setStyleSheet("""
-            QTableWidget {
+            QTableView {
                 background-color: white;
                 gridline-color: #dcdde1;
                 border: 1px solid #dcdde1;
@@ -47,7 +54,7 @@ class TransactionTable(QTableWidget):
                 border: 1px solid #dcdde1;
                 font-weight: bold;
             }
-            QTableWidget::item {
+            QTableView::item {
                 padding: 5px;
             }
         """)
@@ -55,106 +62,16 @@ class TransactionTable(QTableWidget):
     def update_transactions(self, transactions):
         """Update transaction table with new data"""
         self.transactions = transactions if transactions else []
-        self.setRowCount(0)  # Clear existing rows
-        
-        if not self.transactions:
-            return
-            
-        self.setRowCount(len(self.transactions))
-        
-        for row, transaction in enumerate(self.transactions):
-            try:
-                # Date
-                date_str = transaction.get('date', '')
-                date_item = QTableWidgetItem(date_str)
-                date_item.setTextAlignment(Qt.AlignCenter)
-                self.setItem(row, 0, date_item)
-                
-                # Type
-                type_str = "Thu nhập" if transaction.get('type') == 'income' else "Chi tiêu"
-                type_label = QLabel(type_str)
-                type_label.setAlignment(Qt.AlignCenter)
-                type_label.setStyleSheet(f"""
-                    QLabel {{
-                        color: {'#27ae60' if transaction.get('type') == 'income' else '#e74c3c'};
-                        font-weight: bold;
-                        padding: 2px 8px;
-                        border-radius: 3px;
-                        background: {'#ebfaf0' if transaction.get('type') == 'income' else '#fdf3f2'};
-                    }}
-                """)
-                self.setCellWidget(row, 1, type_label)
-                
-                # Category - now using the category_name passed from UserDashboard
-                category_name = transaction.get('category_name', 'Không phân loại')
-                category_item = QTableWidgetItem(category_name)
-                category_item.setTextAlignment(Qt.AlignCenter)
-                self.setItem(row, 2, category_item)
-                
-                # Description
-                desc_item = QTableWidgetItem(transaction.get('description', ''))
-                self.setItem(row, 3, desc_item)
-                
-                # Amount
-                amount = transaction.get('amount', 0)
-                amount_str = f"{amount:,.0f} đ"
-                amount_item = QTableWidgetItem(amount_str)
-                amount_item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
-                amount_item.setForeground(Qt.darkGreen if transaction.get('type') == 'income' else Qt.red)
-                self.setItem(row, 4, amount_item)
-                
-                # Notes/Tags
-                tags = transaction.get('tags', [])
-                notes = ", ".join(tags) if tags else ""
-                notes_item = QTableWidgetItem(notes)
-                self.setItem(row, 5, notes_item)
-                
-                # Actions
-                actions_layout = QHBoxLayout()
-                actions_layout.setContentsMargins(5, 0, 5, 0)
-                actions_layout.setSpacing(5)
-                
-                edit_btn = QPushButton("Sửa")
-                edit_btn.setStyleSheet("""
-                    QPushButton {
-                        background-color: #3498db;
-                        color: white;
-                        border: none;
-                        padding: 5px 10px;
-                        border-radius: 3px;
-                    }
-                    QPushButton:hover {
-                        background-color: #2980b9;
-                    }
-                """)
-                edit_btn.clicked.connect(lambda checked, t=transaction: self.handle_edit_click(t))
-                
-                delete_btn = QPushButton("Xóa")
-                delete_btn.setStyleSheet("""
-                    QPushButton {
-                        background-color: #e74c3c;
-                        color: white;
-                        border: none;
-                        padding: 5px 10px;
-                        border-radius: 3px;
-                    }
-                    QPushButton:hover {
-                        background-color: #c0392b;
-                    }
-                """)
-                delete_btn.clicked.connect(lambda checked, t=transaction: self.handle_delete_click(t))
-                
-                actions_widget = QWidget()
-                actions_layout.addWidget(edit_btn)
-                actions_layout.addWidget(delete_btn)
-                actions_widget.setLayout(actions_layout)
-                self.setCellWidget(row, 6, actions_widget)
-                
-            except Exception as e:
-                print(f"Error updating transaction row {row}: {str(e)}")
-                continue
-        
-        self.resizeRowsToContents()
+        categories = self.category_manager.resolve_categories(
+            {transaction.get('category_id') for transaction in self.transactions}
+        )
+        self.transaction_model.set_transactions(self.transactions, categories)
+
+    def handle_action(self, action, transaction):
+        if action == 'edit':
+            self.handle_edit_click(transaction)
+        elif action == 'delete':
+            self.handle_delete_click(transaction)
 
     def handle_edit_click(self, transaction):
         """Handle edit button click by emitting edit_transaction signal"""
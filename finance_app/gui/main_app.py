@@ -1,16 +1,14 @@
 from PyQt5.QtWidgets import QMainWindow
 from finance_app.gui.auth.login_form import LoginForm
-from finance_app.gui.admin.admin_dashboard import AdminDashboard
-from finance_app.gui.user.user_dashboard import UserDashboard
-from finance_app.data_manager.user_manager import UserManager
-from finance_app.data_manager.setting_manager import SettingManager # Import SettingManager
+# Dashboards (and all their pages) are imported on login so only the login form
+# is loaded before it is shown
 
 class MainApp(QMainWindow):
     def __init__(self):
         super().__init__()
         self.admin_dashboard = None
         self.user_dashboard = None
-        self.setting_manager = SettingManager() # Create an instance of SettingManager
+        self.setting_manager = None # Created on login, shared by the dashboards
         self.init_ui()
 
     def init_ui(self):
@@ -43,27 +41,24 @@ class MainApp(QMainWindow):
         frame_geometry.moveCenter(center_point)
         self.move(frame_geometry.topLeft())
 
-    def on_login_success(self, user_id):
-        user_manager = UserManager()
-        user_data = user_manager.get_user_by_id(user_id)
-        if not user_data:
-            # Nên thêm xử lý nếu ko tìm thấy user, vd show message rồi thoát app hoặc quay lại login
-            # For now, let's ensure the app exits if user data is not found after supposed success
-            from PyQt5.QtWidgets import QApplication, QMessageBox
-            QMessageBox.critical(self, "Lỗi người dùng", "Không tìm thấy dữ liệu người dùng sau khi đăng nhập.")
-            QApplication.instance().quit()
-            return
-
+    def on_login_success(self, user_data):
+        # user_data is the record LoginForm authenticated against; no second lookup needed
         is_admin = user_data.get('is_admin', False)
 
+        if self.setting_manager is None:
+            from finance_app.data_manager.setting_manager import SettingManager
+            self.setting_manager = SettingManager()
+
         # Pass the setting_manager to the dashboards
         if is_admin:
             if not self.admin_dashboard:
+                from finance_app.gui.admin.admin_dashboard import AdminDashboard
                 self.admin_dashboard = AdminDashboard(parent=self, setting_manager=self.setting_manager)
             self.setCentralWidget(self.admin_dashboard)
             self.admin_dashboard.set_current_user(user_data)
         else:
             if not self.user_dashboard:
+                from finance_app.gui.user.user_dashboard import UserDashboard
                 # Pass setting_manager to UserDashboard
                 self.user_dashboard = UserDashboard(parent=self, setting_manager=self.setting_manager) 
             self.setCentralWidget(self.user_dashboard)
@@ -36,7 +36,7 @@ class BudgetCard(QFrame):
         # Title and type
         title_layout = QVBoxLayout()
         
-        name_label = QLabel(self.budget_data.get('name', ''))
+        name_label = QLabel(self.budget_data.get('name') or self.budget_data.get('category_name', ''))
         name_label.setStyleSheet("font-size: 16px; font-weight: bold;")
         title_layout.addWidget(name_label)
         
@@ -81,11 +81,9 @@ class BudgetCard(QFrame):
         # Progress bar
         progress_layout = QVBoxLayout()
         
-        # Get total amount and limit
-        total = self.parent.parent.transaction_manager.get_budget_total(
-            self.budget_data.get('budget_id')
-        )
-        limit = self.budget_data.get('limit', 0)
+        # Spent amount is computed by the budget manager when the page loads
+        total = self.budget_data.get('spent_amount', 0)
+        limit = self.budget_data.get('amount', self.budget_data.get('limit', 0))
         
         # Progress percentage
         progress = min(int((total / limit * 100) if limit > 0 else 0), 100)
@@ -151,15 +149,9 @@ class BudgetCard(QFrame):
         categories_label.setStyleSheet("color: #5f6368; margin-top: 10px;")
         categories_layout.addWidget(categories_label)
         
-        category_ids = self.budget_data.get('category_ids', [])
-        if category_ids:
-            categories = []
-            for category_id in category_ids:
-                category = self.parent.parent.category_manager.get_category_by_id(category_id)
-                if category:
-                    categories.append(category.get('name', ''))
-                    
-            category_list = QLabel(", ".join(categories))
+        category_name = self.budget_data.get('category_name')
+        if category_name:
+            category_list = QLabel(category_name)
             category_list.setWordWrap(True)
             categories_layout.addWidget(category_list)
         else:
@@ -186,6 +178,8 @@ class BudgetCard(QFrame):
         self.setLayout(layout)
 
 class BudgetsPage(BaseWidget):
+    data_collections = ('budgets', 'transactions', 'categories')
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.parent = parent
@@ -219,6 +213,9 @@ class BudgetsPage(BaseWidget):
         
         self.period_filter = PeriodFilter()
         self.period_filter.filter_changed.connect(self.on_filter_changed)
+        start_date, end_date = self.period_filter.get_date_range()
+        self.current_start_date_str = start_date.toString("yyyy-MM-dd")
+        self.current_end_date_str = end_date.toString("yyyy-MM-dd")
         filter_layout.addWidget(self.period_filter)
         
         filter_layout.addStretch()
@@ -234,10 +231,45 @@ class BudgetsPage(BaseWidget):
         self.setLayout(layout)
         
     def refresh_data(self):
-        """Refresh budgets data"""
+        """Refresh budgets data (queried off the GUI thread)"""
         if not self.parent or not self.parent.current_user_id:
             return
             
+        user_id = self.parent.current_user_id
+        start_date_str = self.current_start_date_str
+        end_date_str = self.current_end_date_str
+        self.load_async(
+            lambda: self.fetch_data(user_id, start_date_str, end_date_str),
+            self.apply_data,
+            lambda message: self.parent.show_error(
+                "Lỗi",
+                f"Không thể tải danh sách ngân sách: {message}"
+            )
+        )
+        
+    def fetch_data(self, user_id, start_date_str, end_date_str):
+        """Budgets of the period with their spent amount and category (runs on a worker thread)"""
+        budget_manager = self.parent.budget_manager
+        # Get budgets for current period (using start and end dates)
+        budgets = budget_manager.with_spending(
+            budget_manager.get_user_budgets_by_date_range(
+                user_id=user_id,
+                start_date_str=start_date_str,
+                end_date_str=end_date_str
+            )
+        )
+        categories = self.parent.category_manager.resolve_categories(
+            {budget.get('category_id') for budget in budgets}
+        )
+        for budget in budgets:
+            category = categories.get(budget.get('category_id'))
+            budget['category_name'] = category.get('name', '') if category else ''
+            if category:
+                budget.setdefault('type', category.get('type'))
+        return budgets
+        
+    def apply_data(self, budgets):
+        """Rebuild budget cards from fetched budgets (runs on the GUI thread)"""
         try:
             # Clear existing budget cards
             for i in reversed(range(self.budgets_layout.count())):
@@ -245,13 +277,6 @@ class BudgetsPage(BaseWidget):
                 if widget:
                     widget.deleteLater()
                     
-            # Get budgets for current period (using start and end dates)
-            budgets = self.parent.budget_manager.get_user_budgets_by_date_range(
-                user_id=self.parent.current_user_id,
-                start_date_str=getattr(self, 'current_start_date_str', None),
-                end_date_str=getattr(self, 'current_end_date_str', None)
-            )
-            
             # Add budget cards
             for budget in budgets:
                 card = BudgetCard(budget, self)
@@ -267,7 +292,7 @@ class BudgetsPage(BaseWidget):
         """Show dialog to add new budget"""
         dialog = BudgetDialog(self, user_id=self.parent.current_user_id if self.parent else None)
         if dialog.exec_() == QDialog.Accepted:
-            self.refresh_data()
+            self.schedule_refresh()
             
     def edit_budget(self, budget_data):
         """Show dialog to edit budget
@@ -277,7 +302,7 @@ class BudgetsPage(BaseWidget):
         """
         dialog = BudgetDialog(self, budget_data, user_id=self.parent.current_user_id if self.parent else None)
         if dialog.exec_() == QDialog.Accepted:
-            self.refresh_data()
+            self.schedule_refresh()
             
     def delete_budget(self, budget_data):
         """Delete budget
@@ -294,14 +319,16 @@ class BudgetsPage(BaseWidget):
             "Bạn có chắc chắn muốn xóa ngân sách này? Hành động này không thể hoàn tác."
         ):
             try:
-                success = self.parent.budget_manager.delete_budget(budget_id)
+                success, _ = self.parent.budget_manager.delete_budget(
+                    self.parent.current_user_id, budget_id
+                )
                 
                 if success:
                     self.parent.show_info(
                         "Thành công",
                         "Đã xóa ngân sách thành công"
                     )
-                    self.refresh_data()
+                    self.schedule_refresh()
                 else:
                     self.parent.show_error(
                         "Lỗi",
@@ -323,4 +350,4 @@ class BudgetsPage(BaseWidget):
         """
         self.current_start_date_str = start_date.toString("yyyy-MM-dd")
         self.current_end_date_str = end_date.toString("yyyy-MM-dd")
-        self.refresh_data() 
\ No newline at end of file
+        self.schedule_refresh() 
\ No newline at end of file
@@ -8,6 +8,8 @@ from finance_app.gui.user.dialogs.user_category_dialog import UserCategoryDialog
 import os
 
 class UserCategoriesPage(BaseWidget):
+    data_collections = ('categories',)
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.parent = parent # UserDashboard
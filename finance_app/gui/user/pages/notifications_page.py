@@ -1,6 +1,7 @@
 import os
 from PyQt5.QtWidgets import (QVBoxLayout, QHBoxLayout, QLabel,
-                             QPushButton, QFrame, QScrollArea, QWidget)
+                             QPushButton, QFrame, QScrollArea, QWidget,
+                             QMessageBox)
 from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QIcon
 from finance_app.gui.base.base_widget import BaseWidget
@@ -56,6 +57,8 @@ class NotificationCard(QFrame):
         self.setLayout(layout)
 
 class NotificationsPage(BaseWidget):
+    data_collections = ('notifications',)
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.parent = parent
@@ -202,12 +205,22 @@ class NotificationsPage(BaseWidget):
         return card
         
     def load_notifications(self):
-        """Load notifications"""
-        try:
-            notifications = self.parent.notification_manager.get_user_notifications(
-                self.parent.current_user_id
+        """Load notifications (queried off the GUI thread)"""
+        user_id = self.parent.current_user_id
+        self.load_async(
+            lambda: self.parent.notification_manager.get_user_notifications(user_id),
+            self.apply_notifications,
+            lambda message: QMessageBox.critical(
+                self,
+                "Lỗi",
+                f"Không thể tải thông báo: {message}",
+                QMessageBox.Ok
             )
-            
+        )
+        
+    def apply_notifications(self, notifications):
+        """Show fetched notifications (runs on the GUI thread)"""
+        try:
             # Update statistics
             total_notifications = len(notifications)
             unread_notifications = len([n for n in notifications if not n.get('is_read', False)])
@@ -218,9 +231,9 @@ class NotificationsPage(BaseWidget):
             if self.unread_notifications_label:
                 self.unread_notifications_label.setText(str(unread_notifications))
             
-            # Clear notifications container
-            for i in reversed(range(self.notifications_layout.count())):
-                widget = self.notifications_layout.itemAt(i).widget()
+            # Clear notifications container (cards and the trailing stretch)
+            while self.notifications_layout.count():
+                widget = self.notifications_layout.takeAt(0).widget()
                 if widget:
                     widget.deleteLater()
             
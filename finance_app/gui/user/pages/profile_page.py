@@ -5,6 +5,8 @@ from finance_app.gui.base.base_widget import BaseWidget
 from finance_app.gui.components.statistics_panel import StatisticsPanel
 
 class UserProfilePage(BaseWidget):
+    data_collections = ('users',)
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.parent = parent
@@ -6,6 +6,8 @@ import logging # Add this import
 logger = logging.getLogger(__name__) # Add logger instance
 
 class UserSettingsPage(BaseWidget):
+    data_collections = ('settings',)
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.parent = parent
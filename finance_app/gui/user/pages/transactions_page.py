@@ -1,15 +1,22 @@
 from PyQt5.QtWidgets import (QVBoxLayout, QHBoxLayout, QLabel, 
-                             QPushButton, QFrame, QTableWidget, QTableWidgetItem,
-                             QMessageBox, QHeaderView, QMenu)
+                             QPushButton, QFrame, QTableView, QDialog,
+                             QMessageBox, QHeaderView, QAbstractItemView, QFileDialog)
 from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QIcon
 from finance_app.gui.base.base_widget import BaseWidget
 from finance_app.gui.user.dialogs.transaction_dialog import TransactionDialog
 from finance_app.gui.components.period_filter import PeriodFilter
 from finance_app.gui.components.statistics_panel import StatisticsPanel
-from datetime import datetime
+from finance_app.gui.components.progress_dialog import TaskProgressDialog
+from finance_app.gui.components.transaction_model import (TransactionTableModel, TypeBadgeDelegate,
+                                                         ActionButtonsDelegate)
+
+# Number of rejected rows listed after an import
+IMPORT_ERRORS_SHOWN = 10
 
 class TransactionsPage(BaseWidget):
+    data_collections = ('transactions', 'categories', 'budgets')
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.parent = parent
@@ -33,6 +40,16 @@ class TransactionsPage(BaseWidget):
         add_btn.clicked.connect(self.add_transaction)
         header_layout.addWidget(add_btn)
         
+        # Import button (CSV/JSON bank statements or files exported by the app)
+        import_btn = self.create_secondary_button("Nhập file")
+        import_btn.clicked.connect(self.import_transactions)
+        header_layout.addWidget(import_btn)
+        
+        # Export button (exports the selected period)
+        export_btn = self.create_secondary_button("Xuất CSV")
+        export_btn.clicked.connect(self.export_transactions)
+        header_layout.addWidget(export_btn)
+        
         layout.addLayout(header_layout)
         
         # Statistics panel
@@ -47,18 +64,31 @@ class TransactionsPage(BaseWidget):
         
         self.period_filter = PeriodFilter()
         self.period_filter.filter_changed.connect(self.on_filter_changed)
+        start_date, end_date = self.period_filter.get_date_range()
+        self.current_start_date_str = start_date.toString("yyyy-MM-dd")
+        self.current_end_date_str = end_date.toString("yyyy-MM-dd")
         filter_layout.addWidget(self.period_filter)
         
         filter_layout.addStretch()
         layout.addLayout(filter_layout)
         
-        # Transactions table
-        self.transactions_table = QTableWidget()
-        self.transactions_table.setColumnCount(7)
-        self.transactions_table.setHorizontalHeaderLabels([
-            "Ngày", "Danh mục", "Mô tả", "Số tiền",
-            "Loại", "Ngân sách", "Thao tác"
+        # Transactions table (model/view: only visible rows are painted)
+        self.transactions_table = QTableView()
+        self.transactions_model = TransactionTableModel(
+            ['date_dmy', 'category', 'description', 'amount', 'type', 'budget', 'actions'],
+            self.transactions_table
+        )
+        self.transactions_table.setModel(self.transactions_model)
+        self.transactions_table.setItemDelegateForColumn(4, TypeBadgeDelegate(self.transactions_table))
+        self.actions_delegate = ActionButtonsDelegate(self.transactions_table, actions=[
+            ('edit', 'Chỉnh sửa', '#3498db'),
+            ('delete', 'Xóa', '#e74c3c'),
         ])
+        self.actions_delegate.action_triggered.connect(self.on_transaction_action)
+        self.transactions_table.setItemDelegateForColumn(6, self.actions_delegate)
+        self.transactions_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.transactions_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.transactions_table.verticalHeader().setDefaultSectionSize(40)
         
         # Set column widths
         self.transactions_table.horizontalHeader().setStretchLastSection(True)
@@ -71,13 +101,13 @@ class TransactionsPage(BaseWidget):
         
         # Style the table
         self.transactions_table.setStyleSheet("""
-            QTableWidget {
+            QTableView {
                 background-color: white;
                 border: 1px solid #e0e0e0;
                 border-radius: 8px;
                 padding: 10px;
             }
-            QTableWidget::item {
+            QTableView::item {
                 padding: 10px;
             }
             QHeaderView::section {
@@ -92,99 +122,63 @@ class TransactionsPage(BaseWidget):
         self.setLayout(layout)
         
     def refresh_data(self):
-        """Refresh transactions table data"""
+        """Refresh transactions table data (queried off the GUI thread)"""
         if not self.parent or not self.parent.current_user_id:
             return
             
-        try:
-            # Get transactions for current period
-            transactions = self.parent.transaction_manager.get_transactions_by_date_range(
-                user_id=self.parent.current_user_id,
-                start_date=self.current_start_date_str,
-                end_date=self.current_end_date_str
+        user_id = self.parent.current_user_id
+        start_date = self.current_start_date_str
+        end_date = self.current_end_date_str
+        self.load_async(
+            lambda: self.fetch_data(user_id, start_date, end_date),
+            self.apply_data,
+            lambda message: self.parent.show_error(
+                "Lỗi",
+                f"Không thể tải danh sách giao dịch: {message}"
             )
-            
-            # Clear existing items
-            self.transactions_table.setRowCount(0)
-            
-            # Add transactions to table
-            for transaction in transactions:
-                row = self.transactions_table.rowCount()
-                self.transactions_table.insertRow(row)
-                
-                # Date
-                date = datetime.fromisoformat(transaction.get('date')).strftime('%d/%m/%Y')
-                self.transactions_table.setItem(row, 0, QTableWidgetItem(date))
-                
-                # Category
-                category = self.parent.category_manager.get_category_by_id(
-                    transaction.get('category_id')
-                )
-                category_name = category.get('name', '') if category else ''
-                self.transactions_table.setItem(row, 1, QTableWidgetItem(category_name))
-                
-                # Description
-                self.transactions_table.setItem(row, 2, QTableWidgetItem(transaction.get('description', '')))
-                
-                # Amount
-                amount = f"{transaction.get('amount', 0):,.0f} đ"
-                amount_item = QTableWidgetItem(amount)
-                amount_item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
-                if transaction.get('type') == 'expense':
-                    amount_item.setForeground(Qt.red)
-                else:
-                    amount_item.setForeground(Qt.darkGreen)
-                self.transactions_table.setItem(row, 3, amount_item)
-                
-                # Type
-                transaction_type = "Chi tiêu" if transaction.get('type') == 'expense' else "Thu nhập"
-                type_item = QTableWidgetItem(transaction_type)
-                type_item.setTextAlignment(Qt.AlignCenter)
-                self.transactions_table.setItem(row, 4, type_item)
-                
-                # Budget
-                budget = self.parent.budget_manager.get_budget_by_id(
-                    transaction.get('budget_id')
-                )
-                budget_name = budget.get('name', '') if budget else ''
-                self.transactions_table.setItem(row, 5, QTableWidgetItem(budget_name))
-                
-                # Actions button
-                actions_btn = QPushButton("...")
-                actions_btn.setStyleSheet("""
-                    QPushButton {
-                        background-color: transparent;
-                        border: none;
-                        padding: 5px 10px;
-                        font-weight: bold;
-                    }
-                    QPushButton:hover {
-                        background-color: #f1f3f4;
-                        border-radius: 4px;
-                    }
-                """)
-                
-                # Create actions menu
-                menu = QMenu(self)
-                
-                edit_action = menu.addAction("Chỉnh sửa")
-                edit_action.triggered.connect(lambda checked, t=transaction: self.edit_transaction(t))
-                
-                menu.addSeparator()
-                
-                delete_action = menu.addAction("Xóa")
-                delete_action.triggered.connect(lambda checked, t=transaction: self.delete_transaction(t))
-                
-                actions_btn.setMenu(menu)
-                
-                self.transactions_table.setCellWidget(row, 6, actions_btn)
-                
-            # Update statistics panel
-            self.stats_panel.update_data(
-                user_id=self.parent.current_user_id,
-                start_date=self.current_start_date_str,
-                end_date=self.current_end_date_str
+        )
+        
+    def fetch_data(self, user_id, start_date, end_date):
+        """Query transactions with their categories and budgets (runs on a worker thread)
+        
+        The table and the statistics panel share this single result set.
+        """
+        transactions = self.parent.transaction_manager.get_transactions_by_date_range(
+            user_id=user_id,
+            start_date=start_date,
+            end_date=end_date
+        )
+        
+        # Resolve categories and budgets once for the whole result set
+        categories = self.parent.category_manager.resolve_categories(
+            {transaction.get('category_id') for transaction in transactions}
+        )
+        budgets = {}
+        for budget_id in {transaction.get('budget_id') for transaction in transactions}:
+            if budget_id:
+                budget = self.parent.budget_manager.get_budget_by_id(user_id, budget_id)
+                if budget:
+                    budgets[budget_id] = budget
+                    
+        period_budgets = self.parent.budget_manager.with_spending(
+            self.parent.budget_manager.get_user_budgets_by_date_range(
+                user_id=user_id,
+                start_date_str=start_date,
+                end_date_str=end_date
             )
+        )
+        stats = StatisticsPanel.compute_statistics(transactions, period_budgets)
+        return transactions, categories, budgets, stats
+        
+    def apply_data(self, result):
+        """Show fetched transactions (runs on the GUI thread)"""
+        transactions, categories, budgets, stats = result
+        try:
+            # A single model reset instead of rebuilding every cell widget
+            self.transactions_model.set_transactions(transactions, categories, budgets)
+                
+            # Update statistics panel from the same query result
+            self.stats_panel.update_statistics(stats)
                 
         except Exception as e:
             self.parent.show_error(
@@ -192,11 +186,18 @@ class TransactionsPage(BaseWidget):
                 f"Không thể tải danh sách giao dịch: {str(e)}"
             )
             
+    def on_transaction_action(self, action, transaction):
+        """Handle a click on one of the painted row action buttons"""
+        if action == 'edit':
+            self.edit_transaction(transaction)
+        elif action == 'delete':
+            self.delete_transaction(transaction)
+            
     def add_transaction(self):
         """Show dialog to add new transaction"""
         dialog = TransactionDialog(self, user_id=self.parent.current_user_id if self.parent else None)
         if dialog.exec_() == QDialog.Accepted:
-            self.refresh_data()
+            self.schedule_refresh()
             
     def edit_transaction(self, transaction_data):
         """Show dialog to edit transaction
@@ -206,7 +207,7 @@ class TransactionsPage(BaseWidget):
         """
         dialog = TransactionDialog(self, transaction_data, user_id=self.parent.current_user_id if self.parent else None)
         if dialog.exec_() == QDialog.Accepted:
-            self.refresh_data()
+            self.schedule_refresh()
             
     def delete_transaction(self, transaction_data):
         """Delete transaction
@@ -223,14 +224,16 @@ class TransactionsPage(BaseWidget):
             "Bạn có chắc chắn muốn xóa giao dịch này? Hành động này không thể hoàn tác."
         ):
             try:
-                success = self.parent.transaction_manager.delete_transaction(transaction_id)
+                success, _ = self.parent.transaction_manager.delete_transaction(
+                    self.parent.current_user_id, transaction_id
+                )
                 
                 if success:
                     self.parent.show_info(
                         "Thành công",
                         "Đã xóa giao dịch thành công"
                     )
-                    self.refresh_data()
+                    self.schedule_refresh()
                 else:
                     self.parent.show_error(
                         "Lỗi",
@@ -243,6 +246,84 @@ class TransactionsPage(BaseWidget):
                     f"Không thể xóa giao dịch: {str(e)}"
                 )
                 
+    def export_transactions(self):
+        """Export the transactions of the selected period to a CSV file"""
+        if not self.parent or not self.parent.current_user_id:
+            return
+            
+        user_id = self.parent.current_user_id
+        start_date = self.current_start_date_str
+        end_date = self.current_end_date_str
+        file_path, _ = QFileDialog.getSaveFileName(
+            self,
+            "Xuất giao dịch",
+            f"giao_dich_{start_date}_{end_date}.csv",
+            "CSV (*.csv)"
+        )
+        if not file_path:
+            return
+            
+        # Streamed in chunks on a worker thread; the dialog can cancel between chunks
+        dialog = TaskProgressDialog("Đang xuất giao dịch...", self)
+        success, error, cancelled = dialog.run(
+            lambda progress: self.parent.transaction_manager.export_transactions(
+                user_id=user_id,
+                file_path=file_path,
+                start_date=start_date,
+                end_date=end_date,
+                progress=progress
+            )
+        )
+        if cancelled:
+            return
+        if success:
+            self.parent.show_info("Thành công", f"Đã xuất giao dịch ra file:\n{file_path}")
+        else:
+            self.parent.show_error("Lỗi", f"Không thể xuất giao dịch: {error or 'lỗi ghi file'}")
+            
+    def import_transactions(self):
+        """Import transactions from a CSV or JSON file"""
+        if not self.parent or not self.parent.current_user_id:
+            return
+            
+        file_path, _ = QFileDialog.getOpenFileName(
+            self,
+            "Nhập giao dịch",
+            "",
+            "CSV/JSON (*.csv *.json)"
+        )
+        if not file_path:
+            return
+            
+        user_id = self.parent.current_user_id
+        # Validated as one batch and committed in a single write on a worker thread
+        dialog = TaskProgressDialog("Đang nhập giao dịch...", self)
+        result, error, cancelled = dialog.run(
+            lambda progress: self.parent.transaction_manager.import_transactions(
+                user_id=user_id,
+                file_path=file_path,
+                progress=progress
+            )
+        )
+        if cancelled:
+            return
+        if error or result is None:
+            self.parent.show_error("Lỗi", f"Không thể nhập giao dịch: {error}")
+            return
+            
+        if result['imported']:
+            self.schedule_refresh()
+        message = f"Đã nhập {result['imported']} giao dịch."
+        if result['errors']:
+            shown = result['errors'][:IMPORT_ERRORS_SHOWN]
+            lines = [f"Dòng {row}: {text}" if row else text for row, text in shown]
+            if len(result['errors']) > len(shown):
+                lines.append(f"... và {len(result['errors']) - len(shown)} lỗi khác")
+            message += f"\n{len(result['errors'])} dòng bị bỏ qua:\n" + "\n".join(lines)
+            self.parent.show_warning("Nhập giao dịch", message)
+        else:
+            self.parent.show_info("Thành công", message)
+            
     def on_filter_changed(self, start_date, end_date):
         """Handle period filter change
         
@@ -252,4 +333,4 @@ class TransactionsPage(BaseWidget):
         """
         self.current_start_date_str = start_date.toString("yyyy-MM-dd")
         self.current_end_date_str = end_date.toString("yyyy-MM-dd")
-        self.refresh_data() 
\ No newline at end of file
+        self.schedule_refresh() 
\ No newline at end of file
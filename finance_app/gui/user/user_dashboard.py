@@ -1,4 +1,3 @@
-from PyQt5.QtWidgets import QLabel # Keep if used for placeholder pages
 from finance_app.gui.base.base_dashboard import BaseDashboard
 from finance_app.gui.user.pages.profile_page import UserProfilePage
 from finance_app.gui.user.pages.settings_page import UserSettingsPage
@@ -11,6 +10,15 @@ from finance_app.data_manager.category_manager import CategoryManager
 from finance_app.data_manager.budget_manager import BudgetManager
 from finance_app.data_manager.transaction_manager import TransactionManager
 from finance_app.data_manager.notification_manager import NotificationManager
+from finance_app.data_manager.recurring_transaction_manager import RecurringTransactionManager
+from finance_app.gui.base.data_loader import DataLoader
+from PyQt5.QtCore import QTimer
+import logging
+
+logger = logging.getLogger(__name__)
+
+# How often due recurring transactions are processed while the dashboard is open
+RECURRING_CHECK_INTERVAL_MS = 60 * 60 * 1000
 
 class UserDashboard(BaseDashboard):
     def __init__(self, parent=None, setting_manager=None): # Add setting_manager parameter
@@ -20,37 +28,17 @@ class UserDashboard(BaseDashboard):
         self.budget_manager = BudgetManager()
         self.transaction_manager = TransactionManager(category_manager=self.category_manager)
         self.notification_manager = NotificationManager()
+        self.recurring_manager = RecurringTransactionManager()
         self.setting_manager = setting_manager # Store the passed setting_manager
         
         super().__init__(parent)
         
-    def setup_navigation(self):
-        self.nav_tree.setHeaderHidden(True)
-        # Add navigation items
-        # self.nav_tree.addTopLevelItem("Trang chính") # Example if you have a main summary page
-        self.nav_tree.addTopLevelItem("Giao dịch")
-        self.nav_tree.addTopLevelItem("Ngân sách")
-        self.nav_tree.addTopLevelItem("Danh mục")
-        self.nav_tree.addTopLevelItem("Hồ sơ")
-        self.nav_tree.addTopLevelItem("Cài đặt")
-        self.nav_tree.expandAll()
-
-    def init_pages(self):
-        self.pages = {
-            # "Trang chính": QLabel("Welcome to User Dashboard!"), # Example placeholder
-            "Giao dịch": TransactionsPage(self), # Parent is UserDashboard
-            "Ngân sách": BudgetsPage(self),       # Parent is UserDashboard
-            "Danh mục": UserCategoriesPage(self), # Parent is UserDashboard
-            "Hồ sơ": UserProfilePage(self),       # Parent is UserDashboard
-            "Cài đặt": UserSettingsPage(self)    # Parent is UserDashboard, it will get setting_manager via self.parent.setting_manager
-        }
-        # Set initial page to the first item in navigation or a default like "Giao dịch"
-        if self.nav_tree.topLevelItemCount() > 0:
-            initial_page_text = self.nav_tree.topLevelItem(0).text(0)
-            self.navigate(initial_page_text)
-        elif "Giao dịch" in self.pages:
-             self.navigate("Giao dịch")
-
+        # Recurring transactions are processed at login and then periodically, off the GUI thread
+        self.recurring_loader = DataLoader(self)
+        self.recurring_timer = QTimer(self)
+        self.recurring_timer.setInterval(RECURRING_CHECK_INTERVAL_MS)
+        self.recurring_timer.timeout.connect(self.process_recurring)
+        
     def get_nav_items(self):
         """Get navigation items for user dashboard"""
         return [
@@ -87,34 +75,16 @@ class UserDashboard(BaseDashboard):
             }
         ]
         
-    def create_pages(self):
-        """Create user dashboard pages"""
-        # Transactions page
-        self.transactions_page = TransactionsPage(self)
-        self.stack.addWidget(self.transactions_page)
-        
-        # Budgets page
-        self.budgets_page = BudgetsPage(self)
-        self.stack.addWidget(self.budgets_page)
-        
-        # Categories page
-        self.categories_page = UserCategoriesPage(self)
-        self.stack.addWidget(self.categories_page)
-        
-        # Notifications page
-        self.notifications_page = NotificationsPage(self)
-        self.stack.addWidget(self.notifications_page)
-        
-        # Settings page
-        self.settings_page = UserSettingsPage(self)
-        self.stack.addWidget(self.settings_page)
-        
-        # Profile page
-        self.profile_page = UserProfilePage(self)
-        self.stack.addWidget(self.profile_page)
-        
-        # Show default page
-        self.show_page('transactions')
+    def get_page_classes(self):
+        """Get user dashboard pages (built on first navigation)"""
+        return {
+            'transactions': TransactionsPage,
+            'budgets': BudgetsPage,
+            'categories': UserCategoriesPage,
+            'notifications': NotificationsPage,
+            'settings': UserSettingsPage,
+            'profile': UserProfilePage
+        }
         
     def get_dashboard_title(self):
         """Get dashboard title"""
@@ -122,34 +92,48 @@ class UserDashboard(BaseDashboard):
         
     def set_current_user(self, user_data):
         """Set current user and update dashboard-specific elements."""
-        # Call super first to set self.current_user, self.current_user_id 
-        # and trigger the base refresh_data mechanism (which refreshes all pages)
+        user_id = user_data.get('user_id') if user_data else None
+        if user_id:
+            # Propagate current_user_id to the managers before any page loads its data
+            self.user_manager.set_current_user(user_id)
+            self.category_manager.set_current_user(user_id)
+            self.budget_manager.set_current_user(user_id)
+            self.transaction_manager.set_current_user(user_id)
+            self.notification_manager.set_current_user(user_id)
+            self.recurring_manager.set_current_user(user_id)
+        
+        # BaseDashboard.refresh_data() marks every page dirty and loads only the visible one
         super().set_current_user(user_data)
         
-        # UserDashboard specific tasks after user is set:
-        if self.current_user_id: # self.current_user_id is set by super().set_current_user
-            # Propagate current_user_id to managers specific to UserDashboard context if needed
-            # (BaseDashboard might not know about all managers of a subclass)
-            self.user_manager.set_current_user(self.current_user_id)
-            self.category_manager.set_current_user(self.current_user_id)
-            self.budget_manager.set_current_user(self.current_user_id)
-            self.transaction_manager.set_current_user(self.current_user_id)
-            self.notification_manager.set_current_user(self.current_user_id)
+        if user_id:
+            self.process_recurring()
+            self.recurring_timer.start()
         
-        # The page-specific refresh calls that were here are now redundant 
-        # because super().set_current_user() calls self.refresh_data(), 
-        # and UserDashboard.refresh_data() calls super().refresh_data() (BaseDashboard.refresh_data),
-        # which iterates through self.pages and calls .refresh_data() on each page.
-
-    def refresh_data(self):
-        """Refreshes data for all relevant pages in the dashboard."""
-        # This method is called by BaseDashboard.set_current_user.
-        # The base implementation (super().refresh_data()) iterates through self.pages 
-        # and calls refresh_data if available on each page.
-        # Add any UserDashboard-specific global refresh logic here if necessary, 
-        # then call super().
-        # Example: self.update_user_specific_summary_widget_if_any()
-        super().refresh_data()
+    def handle_logout(self):
+        """Stop background recurring processing before leaving the dashboard"""
+        self.recurring_timer.stop()
+        self.recurring_loader.cancel()
+        super().handle_logout()
+        
+    def process_recurring(self):
+        """Create due recurring transactions (all users, catching up missed periods) in the background"""
+        if self.recurring_loader.is_loading():
+            return
+        self.recurring_loader.load(self.run_recurring_job, self.on_recurring_processed)
+        
+    def run_recurring_job(self):
+        """Worker-thread body of process_recurring; logs failures with their traceback"""
+        try:
+            return self.recurring_manager.process_due()
+        except Exception:
+            # Unattended hourly job: keep the traceback, the next timer tick retries
+            logger.exception("Error processing recurring transactions")
+            raise
+        
+    def on_recurring_processed(self, count):
+        """Reload pages showing the generated transactions and notifications"""
+        if count:
+            self.mark_dirty('transactions', 'budgets', 'notifications')
 
     def get_unread_notifications_count(self):
         """Get number of unread notifications
@@ -179,11 +163,8 @@ class UserDashboard(BaseDashboard):
             success = self.notification_manager.mark_as_read(notification_id)
             
             if success:
-                # Update notifications page and badge
-                # self.notifications_page.refresh_data() # This page is likely in self.pages
-                if "Thông báo" in self.pages and hasattr(self.pages["Thông báo"], 'refresh_data'):
-                    self.pages["Thông báo"].refresh_data()
-                self.update_nav_badges()
+                # Notifications page reloads now if visible, otherwise when next shown
+                self.mark_dirty('notifications')
                 
         except Exception as e:
             self.show_error(
@@ -211,11 +192,8 @@ class UserDashboard(BaseDashboard):
             )
             
             if success:
-                # Update notifications page and badge
-                # self.notifications_page.refresh_data()
-                if "Thông báo" in self.pages and hasattr(self.pages["Thông báo"], 'refresh_data'):
-                    self.pages["Thông báo"].refresh_data()
-                self.update_nav_badges()
+                # Notifications page reloads now if visible, otherwise when next shown
+                self.mark_dirty('notifications')
                 
         except Exception as e:
             self.show_error(
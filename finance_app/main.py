@@ -1,11 +1,23 @@
 # main.py
 
+import time
+
+# Mốc thời gian đầu tiên của quá trình khởi động (dùng cho --profile-startup)
+STARTUP_STARTED_AT = time.perf_counter()
+
 import sys
 import os
 import traceback
+import logging
 from PyQt5.QtWidgets import QApplication, QMessageBox
 from PyQt5.QtGui import QIcon
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QTimer
+
+# Command line flags handled by the app itself (removed before Qt sees argv)
+PROFILE_STARTUP_FLAG = '--profile-startup'   # log startup timeline and save logs/startup.prof
+EXIT_AT_LOGIN_FLAG = '--exit-at-login'       # quit as soon as the login form is visible (benchmarks)
+
+logger = logging.getLogger('finance_app')
 
 # Define error dialog function first, as it's used in init_app
 def show_error_dialog(error_msg):
@@ -19,55 +31,80 @@ def show_error_dialog(error_msg):
 
 # Initialize environment paths first
 def init_app():
-    """Initialize application environment"""
+    """Initialize application environment (called once, before QApplication is created)"""
     try:
         # Add parent directory to Python path
         parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
         if parent_dir not in sys.path:
             sys.path.insert(0, parent_dir)
-            
+
         # Enable High DPI support
         QApplication.setAttribute(Qt.AA_EnableHighDpiScaling)
         QApplication.setAttribute(Qt.AA_UseHighDpiPixmaps)
-        
+
     except Exception as e:
         show_error_dialog(f"Error initializing application: {str(e)}")
         sys.exit(1)
 
-# Call init_app before importing from the package
-init_app()
-
-# Now we can import from finance_app
-from finance_app.utils.logging_config import setup_logging
-
-# Set up logging
-logger = setup_logging()
-
 def main():
+    profile_startup = PROFILE_STARTUP_FLAG in sys.argv
+    exit_at_login = EXIT_AT_LOGIN_FLAG in sys.argv
+    argv = [arg for arg in sys.argv if arg not in (PROFILE_STARTUP_FLAG, EXIT_AT_LOGIN_FLAG)]
+
     # Initialize environment
     init_app()
-    
+
+    # Import after path setup
+    from finance_app.utils.startup_profiler import StartupProfiler
+    profiler = StartupProfiler(enabled=profile_startup, started_at=STARTUP_STARTED_AT)
+
+    # Set up logging
+    from finance_app.utils.logging_config import setup_logging
+    setup_logging()
+
     try:
-        # Import after path setup
+        from finance_app.data_manager import init_data_files
+        init_data_files()
+
+        # Only the login form is imported here; dashboards are imported after login
         from finance_app.gui.main_app import MainApp
-        
+        profiler.mark('imports')
+
         logger.info("Starting Finance App")
-        
+
         # Create QApplication instance
-        app = QApplication(sys.argv)
-        
+        app = QApplication(argv)
+        profiler.mark('qapplication')
+
         # Set application icon
         icon_path = os.path.join(os.path.dirname(__file__), 'assets', 'logo.png')
         if os.path.exists(icon_path):
             app.setWindowIcon(QIcon(icon_path))
-        
+
+        def on_login_visible():
+            profiler.mark('login_visible')
+            profiler.finish()
+            if exit_at_login:
+                login_form = QApplication.activeModalWidget()
+                if login_form:
+                    login_form.reject()
+
+        # MainApp shows the login form modally from its constructor; this timer fires
+        # once that form's event loop is running, i.e. when the form is on screen
+        QTimer.singleShot(0, on_login_visible)
+
         # Create and show main window
         main_window = MainApp()
         main_window.show()
-        
+
         # Start event loop
-        sys.exit(app.exec_())
-        
+        exit_code = app.exec_()
+
+        # Merge pending journal entries into the data files before exiting
+        from finance_app.data_manager.storage import get_storage
+        get_storage().close()
+        sys.exit(exit_code)
+
     except Exception as e:
         error_msg = f"Application error: {str(e)}\n\n{traceback.format_exc()}"
         logger.error(error_msg)
@@ -76,5 +113,3 @@ def main():
 
 if __name__ == '__main__':
     main()
-
-
@@ -3,6 +3,7 @@
 import json
 import os
 import re # Import re for regex operations
+import tempfile
 from datetime import datetime
 
 def load_json(file_path):
@@ -16,19 +17,98 @@ def load_json(file_path):
         print(f"Lỗi khi đọc file {file_path}: {e}")
         return []
 
-def save_json(file_path, data):
-    """Lưu dữ liệu vào file JSON"""
+def save_json(file_path, data, compact=None):
+    """Lưu dữ liệu vào file JSON
+
+    Ghi ra file tạm cùng thư mục, fsync rồi os.replace để thay thế file đích một cách
+    nguyên tử: nếu ứng dụng dừng giữa chừng, file cũ vẫn còn nguyên. File tạm nhận quyền
+    của file cũ (hoặc quyền mặc định theo umask) và thư mục được fsync sau khi đổi tên.
+
+    Args:
+        compact (bool): Ghi JSON gọn (không thụt lề). None để dùng database.compact_json
+            trong config.json (mặc định False)
+    """
+    if compact is None:
+        compact = _compact_json_enabled()
+    tmp_path = None
     try:
         # Tạo thư mục nếu chưa tồn tại
-        os.makedirs(os.path.dirname(file_path), exist_ok=True)
-        
-        with open(file_path, 'w', encoding='utf-8') as file:
-            json.dump(data, file, ensure_ascii=False, indent=2)
+        directory = os.path.dirname(file_path) or '.'
+        os.makedirs(directory, exist_ok=True)
+
+        fd, tmp_path = tempfile.mkstemp(
+            dir=directory, prefix=f".{os.path.basename(file_path)}.", suffix='.tmp'
+        )
+        if hasattr(os, 'fchmod'):
+            # mkstemp tạo file quyền 0600; os.replace sẽ mang quyền đó sang file đích
+            try:
+                mode = os.stat(file_path).st_mode & 0o7777
+            except FileNotFoundError:
+                mode = _DEFAULT_FILE_MODE
+            os.fchmod(fd, mode)
+        with os.fdopen(fd, 'w', encoding='utf-8') as file:
+            if compact:
+                json.dump(data, file, ensure_ascii=False, separators=(',', ':'))
+            else:
+                json.dump(data, file, ensure_ascii=False, indent=2)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, file_path)
+        _fsync_dir(directory)
         return True
     except Exception as e:
         print(f"Lỗi khi lưu file {file_path}: {e}")
+        if tmp_path and os.path.exists(tmp_path):
+            os.remove(tmp_path)
         return False
 
+def _current_umask():
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+# Quyền của file mới như khi tạo bằng open() (đọc umask một lần lúc import)
+_DEFAULT_FILE_MODE = 0o666 & ~_current_umask()
+
+def _fsync_dir(directory):
+    """fsync thư mục để lần đổi tên file trong đó được ghi bền vững (bỏ qua nếu hệ điều hành không hỗ trợ)"""
+    if os.name == 'nt':
+        return
+    dir_fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(dir_fd)
+    finally:
+        os.close(dir_fd)
+
+_compact_json = None
+
+def _compact_json_enabled():
+    """Đọc (một lần) tùy chọn database.compact_json từ config.json"""
+    global _compact_json
+    if _compact_json is None:
+        _compact_json = bool(load_config('database').get('compact_json', False))
+    return _compact_json
+
+def get_data_dir():
+    """Trả về đường dẫn thư mục data của package"""
+    package_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return os.path.join(package_dir, 'data')
+
+def load_config(section=None, data_dir=None):
+    """Đọc cấu hình từ data/config.json
+
+    Args:
+        section (str): Tên mục cấu hình (vd: 'database', 'security'), None để lấy toàn bộ
+        data_dir (str): Thư mục chứa config.json, mặc định là thư mục data của package
+    """
+    config_path = os.path.join(data_dir or get_data_dir(), 'config.json')
+    config = load_json(config_path) if os.path.exists(config_path) else {}
+    if not isinstance(config, dict):
+        config = {}
+    if section is None:
+        return config
+    return config.get(section, {})
+
 def generate_id(prefix=None, data_list=None):
     """Tạo ID tự động dựa trên prefix và danh sách hiện có"""
     if data_list is None:
@@ -0,0 +1,54 @@
+import cProfile
+import io
+import os
+import pstats
+import sys
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Dòng mốc thời gian in ra stderr, benchmarks/bench_cold_start.py đọc dòng này
+MARK_PREFIX = "startup:"
+
+class StartupProfiler:
+    """Đo thời gian khởi động ứng dụng (chế độ `--profile-startup`)
+
+    Ghi lại các mốc (import, tạo QApplication, form đăng nhập hiển thị...) tính từ lúc
+    main.py bắt đầu chạy. Khi bật, toàn bộ quá trình khởi động được chạy dưới cProfile
+    và thống kê được lưu vào logs/startup.prof.
+    """
+
+    def __init__(self, enabled=False, started_at=None):
+        self.enabled = enabled
+        self.started_at = started_at if started_at is not None else time.perf_counter()
+        self.marks = []
+        self._profile = None
+        if enabled:
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+
+    def mark(self, phase):
+        """Ghi lại một mốc khởi động"""
+        elapsed = time.perf_counter() - self.started_at
+        self.marks.append((phase, elapsed))
+        if self.enabled:
+            print(f"{MARK_PREFIX} {phase} {elapsed * 1000:.1f}ms", file=sys.stderr, flush=True)
+
+    def finish(self, top=25):
+        """Dừng profiler, ghi log các mốc và lưu thống kê cProfile"""
+        if not self.enabled or self._profile is None:
+            return None
+        self._profile.disable()
+        log_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'logs')
+        os.makedirs(log_dir, exist_ok=True)
+        stats_path = os.path.join(log_dir, 'startup.prof')
+        self._profile.dump_stats(stats_path)
+
+        output = io.StringIO()
+        pstats.Stats(self._profile, stream=output).sort_stats('cumulative').print_stats(top)
+        timeline = ", ".join(f"{phase}={elapsed * 1000:.1f}ms" for phase, elapsed in self.marks)
+        logger.info(f"Startup timeline: {timeline}")
+        logger.debug(output.getvalue())
+        self._profile = None
+        return stats_path
@@ -0,0 +1,30 @@
+from finance_app.data_manager.storage import migrate_json_to_sqlite
+from finance_app.utils.file_helper import get_data_dir, load_json, save_json
+import os
+import sys
+
+def activate_sqlite():
+    """Chuyển config.json sang dùng backend SQLite"""
+    config_path = os.path.join(get_data_dir(), 'config.json')
+    config = load_json(config_path) or {}
+    config.setdefault('database', {})['type'] = 'sqlite'
+    return save_json(config_path, config, compact=False)
+
+def main():
+    try:
+        migrated = migrate_json_to_sqlite()
+        for collection, count in migrated.items():
+            print(f"{collection}: {count} bản ghi")
+        print(f"Đã chuyển {sum(migrated.values())} bản ghi sang SQLite")
+        if '--activate' in sys.argv:
+            if not activate_sqlite():
+                raise RuntimeError("Không thể cập nhật config.json")
+            print("Đã chuyển ứng dụng sang backend SQLite")
+        else:
+            print("Chạy lại với --activate để chuyển ứng dụng sang backend SQLite")
+    except Exception as e:
+        print(f"Lỗi: {str(e)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+from finance_app.data_manager.recurring_transaction_manager import RecurringTransactionManager
+from datetime import date
+import sys
+import time
+
+# Với --watch: kiểm tra lại các giao dịch đến hạn sau mỗi chừng này giây
+WATCH_INTERVAL_SECONDS = 3600
+
+def run_once(manager, today=None):
+    count = manager.process_due(today)
+    print(f"Đã tạo {count} giao dịch định kỳ")
+    next_date = manager.next_due_date()
+    if next_date:
+        print(f"Kỳ đến hạn tiếp theo: {next_date}")
+
+def main():
+    """Tạo giao dịch cho các giao dịch định kỳ đến hạn của mọi người dùng
+
+    Dùng: python process_recurring.py [YYYY-MM-DD]   (chạy một lần, ví dụ từ cron)
+          python process_recurring.py --watch        (chạy như dịch vụ)
+    """
+    try:
+        args = [arg for arg in sys.argv[1:] if arg != '--watch']
+        manager = RecurringTransactionManager()
+        if '--watch' in sys.argv:
+            while True:
+                run_once(manager)
+                time.sleep(WATCH_INTERVAL_SECONDS)
+        run_once(manager, date.fromisoformat(args[0]) if args else None)
+    except KeyboardInterrupt:
+        pass
+    except Exception as e:
+        print(f"Lỗi: {str(e)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,24 @@
+from finance_app.data_manager.budget_manager import BudgetManager
+from datetime import date
+import sys
+
+def main():
+    """Gia hạn các ngân sách hàng tháng (chạy định kỳ, ví dụ cron ngày đầu tháng)
+
+    Dùng: python renew_budgets.py [YYYY-MM-DD]
+    Chạy lại nhiều lần trong tháng không tạo ngân sách trùng.
+    """
+    try:
+        today = date.fromisoformat(sys.argv[1]) if len(sys.argv) > 1 else None
+        result = BudgetManager().renew_monthly_budgets(today)
+        for budget_id, message in result['errors']:
+            print(f"Bỏ qua {budget_id}: {message}" if budget_id else message)
+        if result['status'] != 'success':
+            sys.exit(1)
+        print(f"Đã gia hạn {len(result['renewed'])} ngân sách")
+    except Exception as e:
+        print(f"Lỗi: {str(e)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
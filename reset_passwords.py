@@ -1,10 +1,15 @@
 from finance_app.data_manager.user_manager import UserManager
 import sys
 
+def print_progress(done, total):
+    print(f"\rĐang băm mật khẩu: {done}/{total}", end='', flush=True)
+    if done == total:
+        print()
+
 def main():
     try:
         user_manager = UserManager()
-        updated_count = user_manager.reset_all_passwords("123456aA@")
+        updated_count = user_manager.reset_all_passwords("123456aA@", progress=print_progress)
         print(f"Đã reset mật khẩu thành công cho {updated_count} tài khoản")
         print("Mật khẩu mới: 123456aA@")
     except Exception as e:
@@ -0,0 +1,101 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from finance_app.data_manager import transaction_manager
+from finance_app.data_manager.data_store import DataStore
+from finance_app.data_manager.storage import SqliteStorage
+
+USER_ID = 'user_002'
+OTHER_USER_ID = 'user_006'
+CATEGORY_ID = 'cat_001'
+
+
+def _txn(txn_id, date, user_id=USER_ID, category_id=CATEGORY_ID, is_active=True):
+    return {
+        'transaction_id': txn_id,
+        'user_id': user_id,
+        'category_id': category_id,
+        'amount': 1000,
+        'type': 'expense',
+        'description': txn_id,
+        'date': date,
+        'is_active': is_active,
+    }
+
+
+class SqliteQueryPathTest(unittest.TestCase):
+    """The SQLite query path must return the same rows as the in-memory index"""
+
+    def setUp(self):
+        self.data_dir = tempfile.mkdtemp()
+        self.storage = SqliteStorage(os.path.join(self.data_dir, 'finance.db'))
+        self.storage.save_all('transactions', [
+            _txn('txn_001', '2024-05-03'),
+            _txn('txn_002', '2024-05-01'),
+            _txn('txn_003', '2024-05-20', category_id='cat_002'),
+            _txn('txn_004', '2024-05-10', is_active=False),
+            _txn('txn_005', '2024-06-02'),
+            _txn('txn_006', '2024-05-05', user_id=OTHER_USER_ID),
+            _txn('txn_007', '2024-05-01'),
+        ])
+
+    def tearDown(self):
+        self.storage.close()
+        shutil.rmtree(self.data_dir, ignore_errors=True)
+
+    def _manager(self):
+        """A TransactionManager on a fresh store: transactions are not loaded yet"""
+        store = DataStore(self.storage)
+        with mock.patch.object(transaction_manager, 'get_data_store', return_value=store):
+            manager = transaction_manager.TransactionManager()
+        manager.current_user_id = USER_ID
+        return manager, store
+
+    def _reads(self, manager):
+        return {
+            'date_range': manager.get_transactions_by_date_range(USER_ID, '2024-05-01', '2024-05-31'),
+            'category': manager.get_transactions_by_category(USER_ID, CATEGORY_ID),
+            'category_range': manager.get_transactions_by_category(
+                USER_ID, CATEGORY_ID, '2024-05-02', '2024-06-30'
+            ),
+            'user': manager.get_user_transactions(USER_ID, is_admin=True),
+        }
+
+    def assertSamePaths(self, query_manager, query_store, memory_manager):
+        query_results = self._reads(query_manager)
+        self.assertNotIn('transactions', query_store._entries, "query path loaded the collection")
+        memory_manager._load_data_if_needed()
+        memory_results = self._reads(memory_manager)
+        for name, rows in memory_results.items():
+            self.assertEqual(
+                [txn['transaction_id'] for txn in query_results[name]],
+                [txn['transaction_id'] for txn in rows],
+                name
+            )
+        return memory_results
+
+    def test_query_and_memory_paths_match(self):
+        query_manager, query_store = self._manager()
+        memory_manager, _ = self._manager()
+        results = self.assertSamePaths(query_manager, query_store, memory_manager)
+        self.assertEqual(
+            [txn['transaction_id'] for txn in results['date_range']],
+            ['txn_002', 'txn_007', 'txn_001', 'txn_003']
+        )
+
+    def test_soft_deleted_transaction_is_hidden_on_both_paths(self):
+        memory_manager, _ = self._manager()
+        ok, _ = memory_manager.delete_transaction(USER_ID, 'txn_001')
+        self.assertTrue(ok)
+        query_manager, query_store = self._manager()
+        results = self.assertSamePaths(query_manager, query_store, memory_manager)
+        for rows in results.values():
+            self.assertNotIn('txn_001', [txn['transaction_id'] for txn in rows])
+            self.assertNotIn('txn_004', [txn['transaction_id'] for txn in rows])
+
+
+if __name__ == '__main__':
+    unittest.main()